@@ -0,0 +1,207 @@
+# Appdetails_Store.py
+import os
+import json
+import gzip
+import hashlib
+import logging
+import tempfile
+import threading
+from time import time
+from collections import Counter
+from Config import CONFIG_DIR, write_json_atomic, read_json_file
+
+APPDETAILS_DIR = CONFIG_DIR / "appdetails"
+
+class AppDetailsStore:
+    """
+    Keeps the full appdetails "data" object of every app the fetcher requested, gzip-compressed and
+    content-addressed: objects/<sha256[:2]>/<sha256>.json.gz, with index.json mapping app_id to its object
+    and fetch time. A refetch that returns the same payload writes nothing. Objects no app points at any more are
+    deleted once save() has written an index without them, and load() removes any that a crash left behind.
+    """
+    def __init__(self, root=APPDETAILS_DIR):
+        self.root = root
+        self.index_path = os.path.join(root, "index.json")
+        self._lock = threading.Lock()
+        self._index = {}  # app_id -> {"sha256", "fetched_at"}
+        self._refs = Counter()
+        self._released = set()  # Unreferenced objects the index on disk may still point at, deleted by save()
+        self._dirty = False
+        self.load()
+
+    def __len__(self):
+        return len(self._index)
+
+    def load(self):
+        data = read_json_file(self.index_path, {})
+        self._index = data if isinstance(data, dict) else {}
+        self._refs = Counter(entry["sha256"] for entry in self._index.values())
+        self._released = set()
+        self._sweep_unreferenced()
+
+    def _sweep_unreferenced(self):
+        """Delete objects and temp files no index entry points at, left by a run that ended before its save()"""
+        for folder, _, files in os.walk(os.path.join(self.root, "objects")):
+            for name in files:
+                if name.endswith(".json.gz") and name[:-len(".json.gz")] in self._refs:
+                    continue
+                try:
+                    os.unlink(os.path.join(folder, name))
+                except OSError as e:
+                    logging.error(f" removing unused appdetails object {name}: {e}")
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            write_json_atomic(self.index_path, self._index)
+            self._dirty = False
+            # Only now does no index on disk point at the released objects any more
+            for sha256 in self._released:
+                if sha256 not in self._refs:
+                    try:
+                        os.unlink(self._object_path(sha256))
+                    except OSError:
+                        pass
+            self._released.clear()
+
+    def _object_path(self, sha256):
+        return os.path.join(self.root, "objects", sha256[:2], f"{sha256}.json.gz")
+
+    def put(self, app_id, data, fetched_at=None):
+        """Store the appdetails data object of app_id"""
+        payload = json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        sha256 = hashlib.sha256(payload).hexdigest()
+        path = self._object_path(sha256)
+        # Held while writing too, so a concurrent put can't release the object between the check and the index update
+        with self._lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+                try:
+                    with os.fdopen(fd, "wb") as f:
+                        f.write(gzip.compress(payload, 6))
+                    os.replace(temp_path, path)
+                except BaseException:
+                    try:
+                        os.unlink(temp_path)
+                    except OSError:
+                        pass
+                    raise
+
+            previous = self._index.get(app_id)
+            self._index[app_id] = {"sha256": sha256, "fetched_at": int(time() if fetched_at is None else fetched_at)}
+            self._refs[sha256] += 1
+            self._dirty = True
+            if previous is not None:
+                self._release(previous["sha256"])
+
+    def _release(self, sha256):
+        self._refs[sha256] -= 1
+        if self._refs[sha256] <= 0:
+            del self._refs[sha256]
+            self._released.add(sha256)
+
+    def get(self, app_id):
+        """
+        Returns:
+            The stored appdetails data object, or None if there is none
+        """
+        with self._lock:
+            entry = self._index.get(app_id)
+        if entry is None:
+            return None
+        try:
+            with gzip.open(self._object_path(entry["sha256"]), "rb") as f:
+                return json.loads(f.read())
+        except (OSError, ValueError) as e:
+            logging.error(f" reading stored appdetails for app_id {app_id}: {e}")
+            return None
+
+    def fetched_at(self, app_id):
+        with self._lock:
+            entry = self._index.get(app_id)
+            return entry["fetched_at"] if entry else None
+
+    def app_ids(self):
+        with self._lock:
+            return list(self._index)
+
+    def storage_bytes(self):
+        total = 0
+        for folder, _, files in os.walk(os.path.join(self.root, "objects")):
+            total += sum(os.path.getsize(os.path.join(folder, name)) for name in files)
+        return total
+
+# Extractors derive a game field from a stored appdetails data object, returning "" or None if it has none.
+# Registering one is all a new field needs, backfill() then fills it in for the whole library offline.
+EXTRACTORS = {}
+
+def extractor(field):
+    def register(function):
+        EXTRACTORS[field] = function
+        return function
+    return register
+
+@extractor("developer")
+def extract_developer(details):
+    return ", ".join(details.get("developers") or [])
+
+@extractor("publisher")
+def extract_publisher(details):
+    return ", ".join(details.get("publishers") or [])
+
+@extractor("genres")
+def extract_genres(details):
+    return ", ".join(genre.get("description", "") for genre in details.get("genres") or [] if genre.get("description"))
+
+@extractor("release_date")
+def extract_release_date(details):
+    release = details.get("release_date") or {}
+    return "" if release.get("coming_soon") else release.get("date", "")
+
+def extract_fields(details, fields):
+    """Run the extractors of fields over a stored data object, leaving out fields it has no value for"""
+    values = {}
+    for field in fields:
+        try:
+            value = EXTRACTORS[field](details)
+        except (AttributeError, TypeError, KeyError) as e:
+            logging.error(f" extracting {field}: {e}")
+            continue
+        if value:
+            values[field] = value
+    return values
+
+def backfill(games, store, fields, overwrite=False):
+    """
+    Fill in derived fields for every game whose app_id has stored appdetails, without any request.
+    Fields a game already has are only replaced with overwrite. Each stored object is read once
+    however many games share its app_id.
+
+    Returns:
+        Dict of game_id to the fields that were set
+    """
+    by_app_id = {}
+    for game_id, game_data in games.items():
+        app_id = game_data.get("app_id", "").strip()
+        if app_id:
+            by_app_id.setdefault(app_id, []).append(game_id)
+
+    changes = {}
+    for app_id, game_ids in by_app_id.items():
+        wanted = [field for field in fields if overwrite or any(not games[game_id].get(field) for game_id in game_ids)]
+        if not wanted:
+            continue
+        details = store.get(app_id)
+        if details is None:
+            continue
+        values = extract_fields(details, wanted)
+        for game_id in game_ids:
+            game_data = games[game_id]
+            updated = {field: value for field, value in values.items()
+                       if (overwrite or not game_data.get(field)) and game_data.get(field) != value}
+            if updated:
+                game_data.update(updated)
+                changes[game_id] = updated
+    return changes
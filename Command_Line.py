@@ -0,0 +1,332 @@
+# Command_Line.py
+import os
+import sys
+import json
+import signal
+import getpass
+import argparse
+from pathlib import Path
+from time import time, perf_counter
+from Config import ConfigManager, GAME_PICTURES_DIR
+from Vault import Vault, LibraryLock
+from Library_Formats import (merge_games_from_txt, merge_games_data, read_encrypted_backup, import_file_type, export_format, export_games,
+                             EXPORT_FORMATS)
+
+PASSWORD_ENV = "STEAMKM_PASSWORD"
+PASSWORD_FILE_ENV = "STEAMKM_PASSWORD_FILE"
+EXIT_ERROR = 1
+EXIT_WRONG_PASSWORD = 3
+EXIT_INTERRUPTED = 4
+EXIT_LOCKED = 5
+SEARCH_FIELDS = ("title", "key", "app_id", "developer")
+COMMANDS = ("fetch", "list", "search", "import", "export")  # Main.py only runs these headless, anything else opens the app
+
+class CommandError(Exception):
+    def __init__(self, message, exit_code=EXIT_ERROR):
+        super().__init__(message)
+        self.exit_code = exit_code
+
+def read_password_file(password_file):
+    try:
+        with open(password_file, "r", encoding="utf-8") as f:
+            password = f.readline().rstrip("\r\n")
+    except OSError as e:
+        raise CommandError(f"Couldn't read the password file: {e}")
+    if not password:
+        raise CommandError("Password cannot be empty")
+    return password
+
+def read_password(password_file=None):
+    """
+    The vault password from password_file, the file named by STEAMKM_PASSWORD_FILE or STEAMKM_PASSWORD,
+    prompted for only when running in a terminal
+    """
+    password_file = password_file or os.environ.get(PASSWORD_FILE_ENV)
+    if password_file:
+        password = read_password_file(password_file)
+    elif os.environ.get(PASSWORD_ENV):
+        password = os.environ[PASSWORD_ENV]
+    elif sys.stdin.isatty():
+        password = getpass.getpass("Encryption key: ")
+    else:
+        raise CommandError(f"No password given, use --password-file, {PASSWORD_FILE_ENV} or {PASSWORD_ENV}")
+    if not password:
+        raise CommandError("Password cannot be empty")
+    return password
+
+def unlock_library(vault, password):
+    """
+    Returns:
+        The games dict stored in the vault
+    """
+    if not vault.exists():
+        raise CommandError("No game library found, set one up in the app first")
+    data = vault.read(password)
+    if data is None:
+        raise CommandError("Incorrect password or corrupted data", EXIT_WRONG_PASSWORD)
+    return json.loads(data)
+
+def lock_library():
+    """Take the LibraryLock for a command that writes, so neither the app nor another command overwrites its results"""
+    lock = LibraryLock()
+    if not lock.acquire():
+        raise CommandError("The library is in use by the app or another command, close it and try again", EXIT_LOCKED)
+    return lock
+
+def commit_fetched_data(vault, password, updates):
+    """
+    Merge fetched results into the library as it is on disk right now and write it back atomically.
+    The caller holds the LibraryLock, so nothing else writes the library in between.
+
+    Returns:
+        Number of games that were updated
+    """
+    from Fetch_Planner import apply_fetched_data
+    games = unlock_library(vault, password)
+    changed = 0
+    for game_id, update in updates.items():
+        if game_id in games:
+            apply_fetched_data(games[game_id], *update)
+            changed += 1
+    vault.write(json.dumps(games, indent=4), password)
+    updates.clear()
+    return changed
+
+def run_fetch(args):
+    """Fetch missing data or stale reviews with the same pipeline the app uses, without a window or event loop"""
+    # The fetch engine is only loaded by the command that needs it
+    from Fetch_Jobs import FetchJobStore
+    from Fetch_Failures import FailureCache
+    from Icon_Store import IconStore
+    from Appdetails_Store import AppDetailsStore
+    from Fetch_Planner import incomplete_games, select_stale_games
+    from Fetch_Pipeline import STAGES
+    from Fetch_Session import plan_fetch, create_pipeline
+
+    config_manager = ConfigManager()
+    vault = Vault()
+    password = read_password(args.password_file)
+    games = unlock_library(vault, password)
+
+    if args.mode == "reviews":
+        if args.all:
+            games_to_process = games
+        else:
+            games_to_process = select_stale_games(games, "reviews", config_manager.get("review_max_age_days") * 86400,
+                                                  config_manager.get("review_refresh_order"))
+    else:
+        games_to_process = incomplete_games(games)
+
+    job_store = FetchJobStore()
+    if job_store.has_pending_job() and job_store.mode != args.mode and not args.discard_pending:
+        raise CommandError(f"An interrupted '{job_store.mode}' fetch is pending, finish it first or pass --discard-pending to drop it")
+    if job_store.has_pending_job() and job_store.mode == args.mode:
+        resumed = job_store.resume_job(games)
+        if resumed:
+            print(f"Resuming an interrupted fetch of {len(resumed)} games")
+            games_to_process = resumed
+    elif games_to_process:
+        job_store.start_job(args.mode, games_to_process)
+    if not games_to_process:
+        print("Nothing to fetch")
+        return 0
+
+    icons_folder = str(GAME_PICTURES_DIR)
+    failure_cache = FailureCache(config_manager.get("failure_cache_days") * 86400)
+    icon_store = IconStore(icons_folder)
+    details_store = AppDetailsStore()
+    plan = plan_fetch(games_to_process, args.mode, job_store, failure_cache, icon_store, details_store)
+    if args.verbose:
+        for line in plan.summary_lines():
+            print(line)
+
+    updates = {}
+    saved = 0
+    last_checkpoint = time()
+    checkpoint_games = config_manager.get("checkpoint_game_count")
+    checkpoint_seconds = config_manager.get("checkpoint_interval_seconds")
+
+    def on_progress(game_id, app_id, icon_path, review_data, developer):
+        # Called on this thread by the pipeline, results are committed in checkpoints like the app's batch fetches
+        nonlocal saved, last_checkpoint
+        updates[game_id] = (app_id, icon_path, review_data, developer, int(time()))
+        if len(updates) >= checkpoint_games or time() - last_checkpoint >= checkpoint_seconds:
+            saved += commit_fetched_data(vault, password, updates)
+            last_checkpoint = time()
+
+    def on_status(text):
+        if args.verbose:
+            print(text.replace("\n", " "), file=sys.stderr)
+
+    stage_workers = dict.fromkeys(STAGES, args.concurrency) if args.concurrency else None
+    pipeline = create_pipeline(games_to_process, icons_folder, args.mode, plan, job_store, failure_cache, icon_store,
+                               details_store, on_progress=on_progress, on_status=on_status, stage_workers=stage_workers)
+
+    # SIGINT from the terminal or SIGTERM from a scheduler cancels cleanly, keeping what was fetched so far
+    def cancel(signum, frame):
+        pipeline.cancel()
+    previous_handlers = {signum: signal.signal(signum, cancel) for signum in (signal.SIGINT, signal.SIGTERM)}
+    start = perf_counter()
+    try:
+        pipeline.run()
+    finally:
+        for signum, handler in previous_handlers.items():
+            signal.signal(signum, handler)
+    if updates:
+        saved += commit_fetched_data(vault, password, updates)
+    if pipeline.running:
+        job_store.finish_job()  # An interrupted run is kept, the next run or the app resumes it
+
+    print(f"Updated {saved} of {len(games_to_process)} games in {perf_counter() - start:.1f}s")
+    for title in pipeline.failed_titles:
+        print(f"Failed: {title}")
+    for title in pipeline.skipped_titles:
+        print(f"Skipped: {title}")
+    if args.verbose:
+        for line in pipeline.telemetry.summary_lines():
+            print(line)
+    return 0 if pipeline.running else EXIT_INTERRUPTED
+
+def matching_games(games, query=None, category=None):
+    """Games whose title, key, AppID or developer contains query (case-insensitive), sorted by title"""
+    query = query.casefold() if query else None
+    matches = []
+    for game_id, game_data in games.items():
+        if category and game_data.get("category") != category:
+            continue
+        if query and not any(query in str(game_data.get(field, "")).casefold() for field in SEARCH_FIELDS):
+            continue
+        matches.append((game_id, game_data))
+    matches.sort(key=lambda item: item[1].get("title", "").casefold())
+    return dict(matches)
+
+def print_games(games, as_json=False):
+    if as_json:
+        print(json.dumps(games, indent=4))
+        return
+    for game_data in games.values():
+        print("\t".join((game_data.get("title", ""), game_data.get("key", ""), game_data.get("category", ""), game_data.get("app_id", ""))))
+
+def run_list(args):
+    games = unlock_library(Vault(), read_password(args.password_file))
+    print_games(matching_games(games, category=args.category), args.json)
+    return 0
+
+def run_search(args):
+    games = unlock_library(Vault(), read_password(args.password_file))
+    matches = matching_games(games, args.query, args.category)
+    print_games(matches, args.json)
+    return 0 if matches else EXIT_ERROR
+
+def run_import(args):
+    """Merge a .txt, .json or .enc file into the library, skipping keys it already has"""
+    import_file = Path(args.file)
+    if not import_file.is_file():
+        raise CommandError(f"No such file: {import_file}")
+    vault = Vault()
+    password = read_password(args.password_file)
+    games = unlock_library(vault, password)
+    config_manager = ConfigManager()
+    categories = list(config_manager.get("categories"))
+
+    file_type = import_file_type(import_file)
+    if file_type == "txt":
+        added_count, added_titles, added_ids, invalid_lines, invalid_count = merge_games_from_txt(import_file, games, categories)
+        for line, error in invalid_lines:
+            print(f"Skipped line: {line.rstrip()} ({error})", file=sys.stderr)
+        if invalid_count > len(invalid_lines):
+            print(f"Skipped {invalid_count - len(invalid_lines)} more lines with problems", file=sys.stderr)
+    elif file_type == "json":
+        with open(import_file, "r") as f:
+            added_count, added_titles, added_ids = merge_games_data(json.load(f), games, categories)
+    elif file_type == "enc":
+        # Backups of this library share its password, others need their own
+        import_password = read_password_file(args.import_password_file) if args.import_password_file else password
+        imported_data = read_encrypted_backup(import_file, import_password)
+        if imported_data is None:
+            raise CommandError("Incorrect password for the imported file or corrupted data", EXIT_WRONG_PASSWORD)
+        added_count, added_titles, added_ids = merge_games_data(imported_data, games, categories)
+    else:
+        raise CommandError("Unsupported file type, expected .txt, .json or .enc")
+
+    if added_count:
+        vault.write(json.dumps(games, indent=4), password)
+    if categories != config_manager.get("categories"):
+        config_manager.set("categories", categories)
+    for title in added_titles:
+        print(f"Imported: {title}")
+    print(f"Imported {added_count} game(s)" + (", run 'fetch --missing' to fetch their Steam data" if added_count else ""))
+    return 0
+
+def run_export(args):
+    fmt = args.format or export_format(args.file)
+    if fmt is None:
+        raise CommandError(f"Can't tell the format from the file name, use --format {', '.join(EXPORT_FORMATS)}")
+    password = read_password(args.password_file)
+    games = matching_games(unlock_library(Vault(), password), category=args.category)
+    export_games(games, args.file, fmt, password)
+    print(f"Exported {len(games)} game(s) to {args.file}")
+    return 0
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be at least 1")
+    return number
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="Main.py", description="SteamKM without the window. Run without a command to open the app.")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--password-file", help=f"File whose first line is the encryption key (or set {PASSWORD_FILE_ENV} or {PASSWORD_ENV})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    fetch = commands.add_parser("fetch", parents=[common], help="Fetch Steam data for the library")
+    mode = fetch.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--missing", action="store_const", dest="mode", const="missing", help="Fetch whatever games are missing")
+    mode.add_argument("--reviews", action="store_const", dest="mode", const="reviews", help="Refresh reviews older than review_max_age_days")
+    fetch.add_argument("--all", action="store_true", help="With --reviews, refresh every game's reviews")
+    fetch.add_argument("--concurrency", type=positive_int, help="Workers per fetch stage (default: fetch_stage_workers from the config)")
+    fetch.add_argument("--verbose", action="store_true", help="Print the fetch plan, progress and request statistics")
+    fetch.add_argument("--discard-pending", action="store_true", help="Drop an interrupted fetch of the other mode instead of stopping")
+    fetch.set_defaults(handler=run_fetch, writes=True)
+
+    list_command = commands.add_parser("list", parents=[common], help="Print the library, one game per line: title, key, category, AppID")
+    list_command.add_argument("--category", help="Only games in this category")
+    list_command.add_argument("--json", action="store_true", help="Print the games as JSON")
+    list_command.set_defaults(handler=run_list)
+
+    search = commands.add_parser("search", parents=[common], help="Print the games whose title, key, AppID or developer contain a text")
+    search.add_argument("query")
+    search.add_argument("--category", help="Only games in this category")
+    search.add_argument("--json", action="store_true", help="Print the games as JSON")
+    search.set_defaults(handler=run_search)
+
+    import_command = commands.add_parser("import", parents=[common], help="Import games from a .txt, .json or .enc file")
+    import_command.add_argument("file")
+    import_command.add_argument("--import-password-file", help="Password of an .enc file from another library (default: the library's own)")
+    import_command.set_defaults(handler=run_import, writes=True)
+
+    export = commands.add_parser("export", parents=[common], help="Export the library to a .json, .txt or .enc file")
+    export.add_argument("file")
+    export.add_argument("--format", choices=EXPORT_FORMATS, help="Default: from the file extension")
+    export.add_argument("--category", help="Only games in this category")
+    export.set_defaults(handler=run_export)
+    return parser
+
+def main(argv=None):
+    """
+    Returns:
+        Process exit code
+    """
+    args = build_parser().parse_args(argv)
+    lock = None
+    try:
+        if getattr(args, "writes", False):
+            lock = lock_library()
+        return args.handler(args)
+    except CommandError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return e.exit_code
+    finally:
+        if lock is not None:
+            lock.release()
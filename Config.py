@@ -8,8 +8,6 @@ import logging
 import shutil
 from pathlib import Path
 from typing import Dict, Any, Tuple, List
-from PySide6.QtCore import QTimer
-from PySide6.QtWidgets import QMessageBox
 
 def get_config_dir():
     if sys.platform.startswith("win"):
@@ -136,6 +134,44 @@ def migrate_files(old_files: List[str], new_files: List[str]) -> bool:
         logging.error(f"Error during file migration: {e}")
         return False
 
+def write_json_atomic(path, data, indent=None) -> bool:
+    """
+    Writes data as JSON to path using a temporary file and an atomic replace,
+    so a crash mid-write never leaves a truncated file behind.
+    
+    Returns:
+        Boolean indicating if the write was successful
+    """
+    path = Path(path)
+    temp_path = None
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile('w', dir=path.parent, delete=False, encoding='utf-8') as tf:
+            temp_path = tf.name
+            json.dump(data, tf, indent=indent)
+        os.replace(temp_path, path)
+        return True
+    except (IOError, OSError, TypeError, ValueError) as e:
+        logging.error(f" writing {path.name}: {e}")
+        if temp_path:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+        return False
+
+def read_json_file(path, default=None):
+    """Reads a JSON file, returning default if it is missing or unreadable"""
+    path = Path(path)
+    if not path.exists():
+        return default
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (json.JSONDecodeError, IOError, OSError) as e:
+        logging.error(f" reading {path.name}: {e}")
+        return default
+
 class ConfigManager:
     """
     Centralized configuration manager that provides in-memory access to config settings
@@ -156,9 +192,7 @@ class ConfigManager:
             return
         
         self._config = {}
-        self._save_timer = QTimer()
-        self._save_timer.setSingleShot(True)
-        self._save_timer.timeout.connect(self._perform_save)
+        self._save_timer = None  # Created on the first save, command-line runs never load Qt
         self._save_pending = False
         
         # Default config values
@@ -177,6 +211,23 @@ class ConfigManager:
             "bar_thickness":  DEFAULT_BAR_THICKNESS,
             "bar_radius": DEFAULT_BAR_RADIUS,
             "categories": ["New", "Premium", "Good", "Low Effort", "Bad", "VR", "DLC", "Used"],
+            "review_max_age_days": 7,  # "Update Reviews" only refreshes reviews older than this
+            "review_refresh_order": "stalest",  # "stalest" or "popular"
+            "parse_processes": 0,  # Worker processes for store page parsing, 0 parses in the fetch thread
+            "steam_requests_per_second": 5,  # Shared by all fetch stages, 0 for no limit
+            "fetch_stage_workers": {"resolve": 2, "details": 2, "icon": 4, "reviews": 4, "developer": 2},
+            "progress_updates_per_second": 4,  # How often fetch progress is applied to the table and saved
+            "checkpoint_interval_seconds": 30,  # Batch fetches commit their results at least this often
+            "checkpoint_game_count": 50,  # ...or once this many games have results waiting
+            "failure_cache_days": 7,  # Titles and AppIDs that failed are skipped for this long unless edited
+            "stored_detail_fields": ["developer"],  # Filled in from stored appdetails, see EXTRACTORS in Appdetails_Store.py
+            "stored_details_max_age_days": 30,  # Stored appdetails validate an AppID without a request for this long
+            "icon_variants": True,  # Create compact display copies of every downloaded header image
+            "keep_original_icons": True,  # False re-encodes the headers themselves at display size
+            "icon_variant_quality": 85,  # JPEG quality of the display copies
+            "picture_cleanup_interval_days": 7,  # Sweep pictures no game references on startup this often, 0 for never
+            "picture_quarantine_days": 30,  # Swept pictures are kept in game_pictures/quarantine this long, 0 deletes them
+            "last_picture_cleanup": 0,
         }
         
         self.load()
@@ -215,11 +266,20 @@ class ConfigManager:
             self.schedule_save()
     
     def schedule_save(self, delay_ms: int = 500) -> None:
-        """Schedule a save operation with debouncing"""
+        """Schedule a save operation with debouncing, or save right away when there is no Qt application to run a timer"""
+        self._save_pending = True
+        if self._save_timer is None:
+            qt_core = sys.modules.get("PySide6.QtCore")
+            app = qt_core.QCoreApplication.instance() if qt_core else None
+            if app is None or qt_core.QThread.currentThread() != app.thread():
+                self._perform_save()
+                return
+            self._save_timer = qt_core.QTimer()
+            self._save_timer.setSingleShot(True)
+            self._save_timer.timeout.connect(self._perform_save)
         if self._save_timer.isActive():
             self._save_timer.stop()
         self._save_timer.start(delay_ms)
-        self._save_pending = True
     
     def _perform_save(self) -> None:
         """Actually perform the save operation to disk"""
@@ -251,7 +311,7 @@ class ConfigManager:
     
     def save_now(self) -> None:
         """Force an immediate save operation"""
-        if self._save_timer.isActive():
+        if self._save_timer is not None and self._save_timer.isActive():
             self._save_timer.stop()
         self._perform_save()
     
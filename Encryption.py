@@ -1,13 +1,8 @@
 # Encryption.py
-import base64
-import os
 import sys
-from pathlib import Path
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from PySide6.QtWidgets import QMessageBox, QInputDialog, QLineEdit, QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel
-from Config import ConfigManager, get_config_dir
+from Config import ConfigManager
+from Vault import Vault, encrypt_data, decrypt_data
 from Theme_Menu import Theme
 
 class InitialPasswordDialog(QDialog):
@@ -203,40 +198,18 @@ class PasswordDialog(QDialog):
 class EncryptionManager:
     def __init__(self, main_window):
         self.main_window = main_window
-        data_dir = get_config_dir()
-        data_dir.mkdir(parents=True, exist_ok=True)
-        self.data_file = data_dir / "steam_keys.json"
-        self.encrypted_data_file = data_dir / "steam_keys.json.enc"
+        self.vault = Vault()
+        self.vault.encrypted_data_file.parent.mkdir(parents=True, exist_ok=True)
+        self.data_file = self.vault.data_file
+        self.encrypted_data_file = self.vault.encrypted_data_file
         self.password = None
         self.wrong_password_attempts = 0  # Track wrong password attempts
 
-    def _generate_key(self, password, salt=None):
-        salt = salt or os.urandom(16)
-        kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt, iterations=480000)
-        return kdf.derive(password.encode()), salt
-
-    def _cipher_factory(self, password, salt=None, iv=None):
-        key, salt = self._generate_key(password, salt)
-        iv = iv or os.urandom(16)
-        return Cipher(algorithms.AES(key), modes.CBC(iv)), salt, iv
-
     def encrypt_data(self, data, password):
-        cipher, salt, iv = self._cipher_factory(password)
-        encryptor = cipher.encryptor()
-        padded_data = data + (16 - len(data) % 16) * chr(16 - len(data) % 16)
-        ct = encryptor.update(padded_data.encode()) + encryptor.finalize()
-        return base64.b64encode(salt + iv + ct).decode('utf-8')
+        return encrypt_data(data, password)
 
     def decrypt_data(self, data, password):
-        raw = base64.b64decode(data)
-        salt, iv, ct = raw[:16], raw[16:32], raw[32:]
-        cipher, _, _ = self._cipher_factory(password, salt, iv)
-        decryptor = cipher.decryptor()
-        try:
-            pt = decryptor.update(ct) + decryptor.finalize()
-            return pt[:-ord(pt[-1:])].decode('utf-8')
-        except Exception:  # Correctly handle decryption errors
-            return None
+        return decrypt_data(data, password)
 
     def show_themed_password_dialog(self, title, message):
         dialog = PasswordDialog(self.main_window, title, message)
@@ -369,8 +342,7 @@ class EncryptionManager:
                 if self.password is None:
                     return None
             plaintext_data = self.data_file.read_text()
-            self.encrypted_data_file.write_text(self.encrypt_data(plaintext_data, self.password))
-            self.data_file.unlink()
+            self.vault.write(plaintext_data, self.password)
             return plaintext_data
 
         # Encrypted file exists
@@ -398,9 +370,6 @@ class EncryptionManager:
             self.main_window.close()
             return
         try:
-            encrypted_data = self.encrypt_data(data, self.password)
-            if self.encrypted_data_file.exists():
-                self.encrypted_data_file.replace(self.encrypted_data_file.with_suffix(".enc.bak"))
-            self.encrypted_data_file.write_text(encrypted_data)
+            self.vault.write(data, self.password)
         except Exception as e:
             QMessageBox.critical(self.main_window, "Error", f"Failed to save data: {e}")
\ No newline at end of file
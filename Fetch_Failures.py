@@ -0,0 +1,67 @@
+# Fetch_Failures.py
+import threading
+from time import time
+from Config import CONFIG_DIR, write_json_atomic, read_json_file
+from Title_Matcher import title_key
+
+FETCH_FAILURES_FILE = CONFIG_DIR / "fetch_failures.json"
+
+class FailureCache:
+    """
+    Persisted negative cache of titles the store search can't find and AppIDs Steam reports as invalid,
+    so "Fetch Missing Data" doesn't request them again on every run. Entries are keyed by the title, case and
+    spacing aside, or the app_id itself, so editing either one makes the game eligible again. Entries expire after ttl_seconds.
+    """
+    def __init__(self, ttl_seconds, path=FETCH_FAILURES_FILE):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._dirty = False
+        self.load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _key(kind, value):
+        return f"{kind}:{title_key(value) if kind == 'title' else value.strip()}"
+
+    def load(self):
+        data = read_json_file(self.path, {})
+        self._entries = data if isinstance(data, dict) else {}
+
+    def get(self, kind, value):
+        """
+        Args:
+            kind: "title" or "app_id"
+
+        Returns:
+            The recorded failure reason, or None if there is no unexpired entry
+        """
+        with self._lock:
+            entry = self._entries.get(self._key(kind, value))
+            if entry is None or time() - entry["failed_at"] > self.ttl_seconds:
+                return None
+            return entry["reason"]
+
+    def record(self, kind, value, reason):
+        with self._lock:
+            self._entries[self._key(kind, value)] = {"reason": reason, "failed_at": int(time())}
+            self._dirty = True
+
+    def save(self):
+        """Write the cache to disk if it changed, dropping expired entries"""
+        with self._lock:
+            if not self._dirty:
+                return
+            cutoff = time() - self.ttl_seconds
+            self._entries = {key: entry for key, entry in self._entries.items() if entry["failed_at"] >= cutoff}
+            write_json_atomic(self.path, self._entries)
+            self._dirty = False
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._dirty = True
+        self.save()
@@ -0,0 +1,144 @@
+# Fetch_Jobs.py
+import threading
+import logging
+from time import time
+from Config import CONFIG_DIR, write_json_atomic, read_json_file
+
+FETCH_JOBS_FILE = CONFIG_DIR / "fetch_jobs.json"
+FETCH_STAGES = ("search", "appdetails", "icon", "reviews", "developer")
+SAVE_INTERVAL = 2.0  # Seconds between job file writes while a fetch is running
+
+class FetchJobStore:
+    """
+    Persists the progress of a Steam fetch run so an interrupted run can resume.
+    Every completed stage (search, appdetails, icon, reviews, developer) is recorded per game
+    together with its result, so finished work is never requested again.
+    """
+    def __init__(self, path=FETCH_JOBS_FILE):
+        self.path = path
+        self._lock = threading.RLock()
+        self._job = None
+        self._dirty = False
+        self._last_save = 0.0
+        self.load()
+
+    def load(self):
+        """Load an interrupted job from disk, if there is one"""
+        data = read_json_file(self.path)
+        if isinstance(data, dict) and isinstance(data.get("games"), dict):
+            self._job = data
+        else:
+            self._job = None
+
+    def has_pending_job(self):
+        with self._lock:
+            return bool(self._job and self._job["games"])
+
+    @property
+    def mode(self):
+        with self._lock:
+            return self._job.get("mode") if self._job else None
+
+    def pending_game_ids(self):
+        with self._lock:
+            return list(self._job["games"]) if self._job else []
+
+    def recorded_app_ids(self):
+        """AppIDs the job was given or resolved, which the library may not have saved yet"""
+        with self._lock:
+            if not self._job:
+                return set()
+            app_ids = set()
+            for entry in self._job["games"].values():
+                for app_id in (entry.get("app_id"), entry["stages"].get("search")):
+                    if isinstance(app_id, str) and app_id:
+                        app_ids.add(app_id)
+            return app_ids
+
+    def start_job(self, mode, games_dict):
+        """Begin tracking a new fetch run, replacing any earlier job"""
+        with self._lock:
+            self._job = {
+                "mode": mode,
+                "created": time(),
+                "games": {
+                    game_id: {
+                        "title": game_data.get("title", ""),
+                        "app_id": game_data.get("app_id", "").strip(),
+                        "stages": {}
+                    }
+                    for game_id, game_data in games_dict.items()
+                }
+            }
+            self._dirty = True
+            self.flush()
+
+    def resume_job(self, games):
+        """
+        Reattach to the interrupted job. Games that were removed, or whose title or app_id
+        were edited since the job was recorded, lose their recorded stages.
+
+        Returns:
+            Dict of the games from the job that still exist
+        """
+        with self._lock:
+            if not self._job:
+                return {}
+            resumed = {}
+            for game_id, entry in list(self._job["games"].items()):
+                game_data = games.get(game_id)
+                if game_data is None:
+                    del self._job["games"][game_id]
+                    continue
+                if (entry.get("title") != game_data.get("title", "")
+                        or entry.get("app_id") != game_data.get("app_id", "").strip()):
+                    entry.update(title=game_data.get("title", ""), app_id=game_data.get("app_id", "").strip(), stages={})
+                resumed[game_id] = game_data
+            self._dirty = True
+            self.flush()
+            return resumed
+
+    def get_stage(self, game_id, stage):
+        """
+        Returns:
+            Tuple of (stage completed, recorded result)
+        """
+        with self._lock:
+            if not self._job:
+                return False, None
+            stages = self._job["games"].get(game_id, {}).get("stages", {})
+            if stage in stages:
+                return True, stages[stage]
+            return False, None
+
+    def mark_stage(self, game_id, stage, result=None):
+        """Record a completed stage and its result, writing to disk at most every SAVE_INTERVAL seconds"""
+        with self._lock:
+            if not self._job or game_id not in self._job["games"]:
+                return
+            self._job["games"][game_id]["stages"][stage] = result
+            self._dirty = True
+            if time() - self._last_save >= SAVE_INTERVAL:
+                self.flush()
+
+    def flush(self):
+        """Write pending changes to disk"""
+        with self._lock:
+            if not self._dirty:
+                return
+            if self._job is None:
+                try:
+                    self.path.unlink(missing_ok=True)
+                except OSError as e:
+                    logging.error(f" removing fetch job file: {e}")
+            else:
+                write_json_atomic(self.path, self._job)
+            self._dirty = False
+            self._last_save = time()
+
+    def finish_job(self):
+        """Drop the job once its results have been saved to the game library"""
+        with self._lock:
+            self._job = None
+            self._dirty = True
+            self.flush()
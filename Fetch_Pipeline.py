@@ -0,0 +1,912 @@
+# Fetch_Pipeline.py
+import os
+import heapq
+import queue
+import logging
+import itertools
+import threading
+import requests
+from time import perf_counter
+from pathlib import Path
+from contextlib import contextmanager
+from Steam_App_Index import get_app_index, is_app_id
+from Title_Matcher import best_match
+from Fetch_Planner import group_by_title, missing_fields, build_fetch_plan
+from Fetch_Telemetry import FetchTelemetry
+from Icon_Store import IconStore
+from Store_Page_Parser import StorePageParser, page_data, get_parse_pool, parse_page_in_pool, STREAM_CHUNK_SIZE
+
+STAGES = ("resolve", "details", "icon", "reviews", "developer")
+DEFAULT_STAGE_WORKERS = {"resolve": 2, "details": 2, "icon": 4, "reviews": 4, "developer": 2}
+DEFAULT_REQUESTS_PER_SECOND = 5
+# Test servers are set through STEAMKM_STEAM_STORE_URL only, never the importable config
+STORE_URL = os.environ.get("STEAMKM_STEAM_STORE_URL", "https://store.steampowered.com")
+MAX_RETRIES = 3  # Retries of a request that was answered with 429 or 503
+MAX_RETRY_DELAY = 30.0
+CANCEL_TIMEOUT = 2.0  # Seconds a cancel waits for in-flight work before reporting partial results
+
+# Priority hints, higher is fetched first. Games without a hint keep their library order
+PRIORITY_NEW = 1
+PRIORITY_EDITED = 2
+PRIORITY_VISIBLE = 3
+
+STORE_PAGE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+class FetchCanceled(Exception):
+    """Raised inside worker threads when the run was canceled, to abandon the current request"""
+
+class RateLimiter:
+    """Spaces requests evenly across all worker threads, at most requests_per_second (0 for no limit)"""
+    def __init__(self, requests_per_second):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._next_time = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self, cancel_event):
+        """Wait for the next request slot, returning early with False if cancel_event is set"""
+        if not self.interval:
+            return True
+        with self._lock:
+            now = perf_counter()
+            slot = max(now, self._next_time)
+            self._next_time = slot + self.interval
+        if slot > now:
+            return not cancel_event.wait(slot - now)
+        return True
+
+    def backoff(self, seconds):
+        """Hold every request for seconds, used when Steam answers with 429"""
+        with self._lock:
+            self._next_time = max(self._next_time, perf_counter() + seconds)
+
+def retry_delay(response, attempt):
+    """Seconds to wait before retrying: the server's Retry-After if it sent one, otherwise exponential"""
+    try:
+        delay = float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        delay = 2.0 ** attempt
+    return min(max(delay, 0.0), MAX_RETRY_DELAY)
+
+def response_bytes(response):
+    """Bytes read off the wire so far, which for a streamed page the parser stopped early is less than the page"""
+    try:
+        return int(response.raw.tell())
+    except Exception:
+        return 0
+
+class FetchItem:
+    """A group of games sharing a title or app_id on its way through the pipeline"""
+    def __init__(self, game_ids, app_id="", search=False):
+        self.game_ids = game_ids
+        self.app_id = app_id
+        self.search = search  # The app_id still has to be (or was) found by title
+        self.validated_by = ""  # Local source the plan validated the app_id against, the appdetails request is skipped
+        self.stages = set(STAGES)  # Stages this item still has to pass through
+        self.details = None
+        self.icon_missing = True
+        self.review_missing = True
+        self.developer_missing = True
+        self.icon_path = ""
+        self.review_data = None
+        self.developer = ""
+        self.failed = False
+        self.replaced = False  # Split into title groups and sent back to the resolve stage
+        self.canceled = False
+        self.reported = False
+
+class PriorityWorkQueue:
+    """
+    Blocking queue that hands out the item with the highest priority, ties in the order they were put.
+    Priorities come from priority_of and are re-read for every queued item after reprioritize().
+    """
+    def __init__(self, priority_of):
+        self.priority_of = priority_of
+        self._heap = []
+        self._order = itertools.count()
+        self._stale = False
+        self._condition = threading.Condition()
+
+    def _entry(self, order, item):
+        # None is the shutdown marker and always goes last
+        priority = float("-inf") if item is None else self.priority_of(item)
+        return (-priority, order, item)
+
+    def put(self, item):
+        with self._condition:
+            heapq.heappush(self._heap, self._entry(next(self._order), item))
+            self._condition.notify()
+
+    def get(self):
+        with self._condition:
+            while not self._heap:
+                self._condition.wait()
+            if self._stale:
+                self._heap = [self._entry(order, item) for _, order, item in self._heap]
+                heapq.heapify(self._heap)
+                self._stale = False
+            return heapq.heappop(self._heap)[2]
+
+    def reprioritize(self):
+        with self._condition:
+            self._stale = True
+
+    def qsize(self):
+        with self._condition:
+            return len(self._heap)
+
+class PipelineStage:
+    """One step of the fetch with its own queue, worker threads and metrics"""
+    def __init__(self, name, handler, workers, priority_of):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, int(workers))
+        self.queue = PriorityWorkQueue(priority_of)
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.max_queued = 0
+        self._lock = threading.Lock()
+
+    def put(self, item):
+        self.queue.put(item)
+        with self._lock:
+            self.max_queued = max(self.max_queued, self.queue.qsize())
+
+    def record(self, seconds, failed):
+        with self._lock:
+            self.processed += 1
+            self.failed += failed
+            self.busy_seconds += seconds
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "stage": self.name,
+                "workers": self.workers,
+                "processed": self.processed,
+                "failed": self.failed,
+                "busy_seconds": round(self.busy_seconds, 3),
+                "avg_seconds": round(self.busy_seconds / self.processed, 3) if self.processed else 0.0,
+                "max_queued": self.max_queued
+            }
+
+class SteamFetchPipeline:
+    """
+    Fetches Steam data for a set of games in explicit stages: resolve AppID → details → icon → reviews → developer.
+    Every stage has its own queue and workers, so a slow stage such as store-page scraping doesn't hold up
+    the appdetails requests of the games behind it. Plain Python with callbacks, so it runs with or without Qt;
+    the callbacks are always invoked from the thread that called run().
+    """
+    REQUEST_TIMEOUT = 10
+
+    def __init__(self, games_dict, icons_folder, update_reviews_only=False, job_store=None,
+                 stage_workers=None, requests_per_second=DEFAULT_REQUESTS_PER_SECOND, parse_processes=0,
+                 failure_cache=None, plan=None, store_url=STORE_URL, icon_store=None, icon_ingest=None,
+                 details_store=None, on_progress=None, on_status=None):
+        self.games_dict = games_dict
+        self.icons_folder = icons_folder
+        self.update_reviews_only = update_reviews_only
+        self.job_store = job_store
+        self.failure_cache = failure_cache
+        self.icon_store = icon_store or IconStore(icons_folder, path=None)
+        self.icon_ingest = icon_ingest  # Called from the icon workers with every stored header's path, force=True if it was replaced
+        self.details_store = details_store  # Keeps the full appdetails payloads for deriving fields later
+        self.plan = plan
+        self.store_url = (store_url or STORE_URL).rstrip("/")
+        self.requests_per_second = requests_per_second
+        self.parse_processes = parse_processes
+        self.on_progress = on_progress
+        self.on_status = on_status
+        self.running = True
+        self.failed_titles = []
+        self.skipped_titles = []
+        self.uncertain_matches = []
+        self.rate_limiter = RateLimiter(requests_per_second)
+        self._cancel_event = threading.Event()
+        self._resume_event = threading.Event()  # Cleared while paused
+        self._resume_event.set()
+        self._in_flight = set()
+        self._in_flight_lock = threading.Lock()
+
+        workers = dict(DEFAULT_STAGE_WORKERS, **(stage_workers or {}))
+        self.telemetry = FetchTelemetry({
+            "requests_per_second": requests_per_second,
+            "stage_workers": workers,
+            "parse_processes": parse_processes
+        })
+        handlers = {
+            "resolve": self._resolve_stage,
+            "details": self._details_stage,
+            "icon": self._icon_stage,
+            "reviews": self._reviews_stage,
+            "developer": self._developer_stage
+        }
+        self._priorities = {}
+        self.stages = [PipelineStage(name, handlers[name], workers[name], self._item_priority) for name in STAGES]
+
+        self._done = queue.Queue()
+        self._items = []
+        self._outstanding = 0
+        self._outstanding_lock = threading.Lock()
+        self._stage_results = {}
+        self._stage_lock = threading.Lock()
+        # Store writes in progress, run() closes the stores before saving them, see _writing_stores
+        self._store_condition = threading.Condition()
+        self._store_writers = 0
+        self._stores_closed = False
+
+    def cancel(self):
+        """Stop the run, aborting the requests that are in flight right now"""
+        self.running = False
+        self._cancel_event.set()
+        self._resume_event.set()
+        self._done.put(None)  # Wake run() so it starts the cancel deadline
+        with self._in_flight_lock:
+            responses = list(self._in_flight)
+        for response in responses:
+            try:
+                response.close()
+            except Exception:
+                pass
+
+    def pause(self):
+        """Hold every worker before its next request; requests already in flight still complete"""
+        if self.running:
+            self._resume_event.clear()
+
+    def resume(self):
+        self._resume_event.set()
+
+    @property
+    def paused(self):
+        return not self._resume_event.is_set()
+
+    def set_priorities(self, priorities):
+        """
+        Replace the priority hints, a dict of game_id to PRIORITY_VISIBLE, PRIORITY_EDITED or PRIORITY_NEW.
+        Safe to call from any thread while the run is in progress; queued work is reordered right away.
+        """
+        self._priorities = dict(priorities)
+        for stage in self.stages:
+            stage.queue.reprioritize()
+
+    def _item_priority(self, item):
+        priorities = self._priorities
+        return max((priorities.get(game_id, 0) for game_id in item.game_ids), default=0)
+
+    def stage_metrics(self):
+        return [stage.metrics() for stage in self.stages]
+
+    def _status(self, text):
+        if self.on_status:
+            self.on_status(text)
+
+    def run(self):
+        """Fetch everything and block until the last item left the pipeline"""
+        Path(self.icons_folder).mkdir(parents=True, exist_ok=True)
+        start = perf_counter()
+
+        if self.plan is None:
+            self.plan = build_fetch_plan(self.games_dict, "reviews" if self.update_reviews_only else "missing",
+                                         self.job_store, self.failure_cache, get_app_index(), self.requests_per_second,
+                                         self.icon_store, self.details_store)
+        items = []
+        for planned in self.plan.items:
+            item = FetchItem(planned.game_ids, planned.app_id, search=planned.search)
+            item.validated_by = planned.validated_by
+            if self.update_reviews_only:
+                item.stages = {"reviews"}
+            elif self.plan.icons_only:
+                item.stages = {"details", "icon"}
+            items.append(item)
+        self._mark_skipped(list(self.plan.skipped))
+        # Titles the plan already resolved from the app index never reach _find_app_id_by_title
+        index_hits = sum(1 for planned in self.plan.items if planned.search and ("storesearch", "app index") in planned.cache_hits)
+        if index_hits:
+            self.telemetry.record_cache("app index", True, index_hits)
+        if self.plan.skipped:
+            self.telemetry.record_cache("known failures", True, len(self.plan.skipped))
+        self._items = list(items)
+
+        threads = []
+        for index, stage in enumerate(self.stages):
+            for _ in range(stage.workers):
+                thread = threading.Thread(target=self._worker, args=(index,), daemon=True)
+                thread.start()
+                threads.append(thread)
+
+        self._outstanding = len(items)
+        for item in items:
+            self._forward(item, 0)
+
+        total_games = len(self.games_dict)
+        finished_games = 0
+        remaining = len(items)
+        cancel_deadline = None
+        while remaining > 0:
+            if self.running:
+                item = self._done.get()
+            else:
+                # Queued items drain immediately after a cancel, only a stuck request can hold up the rest
+                if cancel_deadline is None:
+                    cancel_deadline = perf_counter() + CANCEL_TIMEOUT
+                try:
+                    item = self._done.get(timeout=max(0.0, cancel_deadline - perf_counter()))
+                except queue.Empty:
+                    logging.error(f" {remaining} fetch items still busy after cancel, abandoning them")
+                    for stuck_item in self._items:
+                        if not stuck_item.reported and not stuck_item.replaced:
+                            stuck_item.canceled = True
+                            self._complete(stuck_item)
+                    break
+            if item is None:
+                continue
+            if not item.replaced:
+                finished_games += len(item.game_ids)
+                self._complete(item)
+                if self.running:
+                    title = self.games_dict[item.game_ids[0]].get("title", "Unknown")
+                    self._status(f"Fetching ({finished_games}/{total_games}):\n{title}")
+            with self._outstanding_lock:
+                self._outstanding -= 1
+                remaining = self._outstanding
+
+        if not self.running:
+            self._status("Fetch operation canceled!")
+
+        for stage in self.stages:
+            for _ in range(stage.workers):
+                stage.queue.put(None)
+        if self.running:
+            for thread in threads:
+                thread.join()
+
+        # Workers abandoned after a cancel may still be running, their store writes are dropped from here on
+        self._close_stores()
+        if self.job_store:
+            self.job_store.flush()
+        if self.failure_cache is not None:
+            self.failure_cache.save()
+        self.icon_store.save()
+        if self.details_store is not None:
+            self.details_store.save()
+
+        self.telemetry.finish(self.stage_metrics())
+        logging.info(f"Fetch pipeline finished {total_games} games in {perf_counter() - start:.1f}s")
+        for metrics in self.stage_metrics():
+            logging.info(" {stage}: {processed} processed, {failed} failed, {avg_seconds}s avg, "
+                         "{workers} workers, {max_queued} max queued".format(**metrics))
+
+    def _worker(self, index):
+        stage = self.stages[index]
+        while True:
+            item = stage.queue.get()
+            if item is None:
+                return
+            if not self.running:
+                item.canceled = True
+                self._done.put(item)
+                continue
+            if stage.name not in item.stages:
+                self._forward(item, index + 1)
+                continue
+
+            started = perf_counter()
+            try:
+                stage.handler(item)
+            except FetchCanceled:
+                item.canceled = True
+            except Exception as e:
+                title = self.games_dict[item.game_ids[0]].get("title", "Unknown")
+                logging.error(f" {stage.name} stage for {title}: {e}")
+                self.telemetry.record_error(f"{stage.name} stage for {title}", e)
+                item.failed = True
+            stage.record(perf_counter() - started, item.failed)
+
+            if not self.running:
+                item.canceled = True
+            if item.failed or item.replaced or item.canceled:
+                self._done.put(item)
+            else:
+                self._forward(item, index + 1)
+
+    def _forward(self, item, index):
+        if index < len(self.stages):
+            self.stages[index].put(item)
+        else:
+            self._done.put(item)
+
+    def _split(self, item, new_items):
+        # Count the new items before the replaced one is reported done, so run() never sees zero early
+        with self._outstanding_lock:
+            self._outstanding += len(new_items)
+            self._items.extend(new_items)
+        for new_item in new_items:
+            self._forward(new_item, 0)
+        item.replaced = True
+
+    def _complete(self, item):
+        """Report a finished item to on_progress, or record its titles as failed"""
+        item.reported = True
+        if item.canceled:
+            # Report whatever the item collected before the cancel
+            if self.on_progress and item.app_id and (item.icon_path or item.review_data or item.developer):
+                for game_id in item.game_ids:
+                    self.on_progress(game_id, item.app_id, item.icon_path, item.review_data or {}, item.developer)
+            return
+        if item.failed:
+            self._mark_failed(item.game_ids)
+            return
+        if not self.on_progress:
+            return
+
+        if self.update_reviews_only:
+            for game_id in item.game_ids:
+                self.on_progress(game_id, item.app_id, "", item.review_data, "")
+        elif item.search:
+            for game_id in item.game_ids:
+                self.on_progress(game_id, item.app_id, item.icon_path, item.review_data or {}, item.developer)
+        elif item.review_data is not None:
+            for game_id in item.game_ids:
+                self.on_progress(game_id, item.app_id, item.icon_path, item.review_data, item.developer)
+        elif (item.icon_missing and item.icon_path) or item.developer_missing:
+            for game_id in item.game_ids:
+                self.on_progress(game_id, item.app_id, item.icon_path, {}, item.developer)
+
+    @contextmanager
+    def _writing_stores(self):
+        """
+        Wrap every write to the job, failure, icon and appdetails stores. Yields False once run() has closed
+        the stores, the write must then be skipped. Only local file work may happen inside, never a request.
+        """
+        with self._store_condition:
+            writable = not self._stores_closed
+            if writable:
+                self._store_writers += 1
+        try:
+            yield writable
+        finally:
+            if writable:
+                with self._store_condition:
+                    self._store_writers -= 1
+                    self._store_condition.notify_all()
+
+    def _close_stores(self):
+        """Wait for the store writes in progress, which are quick, and refuse any later ones"""
+        with self._store_condition:
+            self._stores_closed = True
+            self._store_condition.wait_for(lambda: self._store_writers == 0)
+
+    def _record_failure(self, kind, value, reason):
+        if self.failure_cache is None:
+            return
+        with self._writing_stores() as writable:
+            if writable and self.running:
+                self.failure_cache.record(kind, value, reason)
+
+    def _mark_skipped(self, game_ids):
+        for game_id in game_ids:
+            title = self.games_dict[game_id].get("title", "Unknown")
+            if title not in self.skipped_titles:
+                self.skipped_titles.append(title)
+
+    def _mark_failed(self, game_ids):
+        for game_id in game_ids:
+            title = self.games_dict[game_id].get("title", "Unknown")
+            # Only add to failed_titles if not already present
+            if title not in self.failed_titles:
+                self.failed_titles.append(title)
+
+    def _run_stage(self, game_ids, stage, fetch, key):
+        """
+        Run a single fetch step once for a group of games sharing a title or app_id.
+        The result is reused from an interrupted run's job record if there is one, or from
+        another group that already resolved to the same entity during this run. Groups that
+        reach the same step concurrently wait for the first one instead of requesting it again.
+        """
+        if self.job_store:
+            for game_id in game_ids:
+                done, result = self.job_store.get_stage(game_id, stage)
+                if done:
+                    self.telemetry.record_cache("interrupted run", True)
+                    return result
+            self.telemetry.record_cache("interrupted run", False)
+
+        with self._stage_lock:
+            entry = self._stage_results.get((stage, key))
+            owner = entry is None
+            if owner:
+                entry = self._stage_results[(stage, key)] = [threading.Event(), None, None]
+        self.telemetry.record_cache("this run", not owner)
+        if owner:
+            try:
+                entry[1] = fetch(key)
+            except Exception as e:
+                entry[2] = e
+                raise
+            finally:
+                entry[0].set()
+        else:
+            entry[0].wait()
+            if entry[2] is not None:
+                raise entry[2]
+        result = entry[1]
+
+        # Empty results are not recorded, so transient failures are retried when resuming.
+        # Neither are results that arrive after a cancel, the job may already belong to a new run
+        if self.job_store and result:
+            with self._writing_stores() as writable:
+                if writable and self.running:
+                    for game_id in game_ids:
+                        self.job_store.mark_stage(game_id, stage, result)
+        return result
+
+    # Stages
+
+    def _resolve_stage(self, item):
+        # Titles the plan already resolved from the local app index skip the search
+        if not item.search or item.app_id:
+            return
+        title = self.games_dict[item.game_ids[0]]["title"]
+        item.app_id = self._run_stage(item.game_ids, "search", self._find_app_id_by_title, title)
+        if not item.app_id:
+            self._record_failure("title", title, "No store search results")
+            item.failed = True
+
+    def _details_stage(self, item):
+        if self.plan.icons_only:
+            # A refresh re-validates the header image at the URL it was downloaded from, appdetails only for new ones
+            url = self.icon_store.url(item.app_id) if item.app_id else ""
+            if url:
+                item.details = {"header_image": url, "developers": []}
+            elif item.app_id:
+                item.details = self._run_stage(item.game_ids, "appdetails", self.fetch_app_details, item.app_id)
+            item.review_missing = item.developer_missing = False
+            item.failed = not item.details
+            return
+
+        try:
+            item.details = self._local_app_details(item)
+            if item.details is None:
+                item.details = self._run_stage(item.game_ids, "appdetails", self.fetch_app_details, item.app_id)
+            if item.details is None and not item.search:
+                self._record_failure("app_id", item.app_id, "Steam reports the AppID as invalid (success: false)")
+        except FetchCanceled:
+            raise
+        except Exception as e:
+            logging.error(f" fetching details for app_id {item.app_id}: {e}")
+            self.telemetry.record_error(f"fetching details for app_id {item.app_id}", e)
+            item.details = None
+
+        if item.search:
+            return
+        if item.details is None:
+            # The stored AppID is invalid, look the games up by title instead
+            self._split(item, [FetchItem(game_ids, search=True)
+                               for game_ids in group_by_title(item.game_ids, self.games_dict)])
+            return
+
+        games = []
+        for game_id in item.game_ids:
+            member_data = self.games_dict[game_id]
+            # Only decides what to fetch here, apply_fetched_data records the same change in the saved library
+            old_app_id = member_data.get("_previous_app_id", "")
+            member_data["_previous_app_id"] = item.app_id
+            if old_app_id and old_app_id != item.app_id and "review_data" in member_data:
+                member_data.pop("review_data", None)
+            games.append(member_data)
+
+        # Only fetch whatever any game in the group is missing, then fan the results out to all of them
+        item.icon_missing, item.review_missing, item.developer_missing = missing_fields(games)
+
+    def _local_app_details(self, item):
+        """Details for an app_id the plan validated locally, None if it has to be requested after all"""
+        if not item.validated_by or item.search:
+            if not item.search:
+                self.telemetry.record_cache("local validation", False)
+            return None
+        details = None
+        if item.validated_by == "stored details":
+            stored = self.details_store.get(item.app_id) if self.details_store is not None else None
+            if stored is not None:
+                details = {"header_image": stored.get("header_image", ""), "developers": stored.get("developers", [])}
+        else:
+            # The app index only confirms the AppID, fine as long as no game in the group needs the details
+            icon_missing, _, developer_missing = missing_fields([self.games_dict[game_id] for game_id in item.game_ids])
+            if not (icon_missing or developer_missing):
+                details = {"header_image": "", "developers": []}
+        self.telemetry.record_cache("local validation", details is not None)
+        return details
+
+    def _icon_stage(self, item):
+        if item.icon_missing:
+            item.icon_path = self._run_stage(item.game_ids, "icon", lambda app_id: self.fetch_game_icon(app_id, item.details), item.app_id) or ""
+            if self.plan.icons_only and not item.icon_path:
+                item.failed = True
+
+    def _reviews_stage(self, item):
+        if not item.app_id:
+            item.failed = True
+            return
+        if item.search or item.review_missing or (item.icon_missing and item.icon_path):
+            item.review_data = self._run_stage(item.game_ids, "reviews", self.fetch_steam_reviews, item.app_id) or {}
+            if self.update_reviews_only and not item.review_data:
+                item.failed = True
+
+    def _developer_stage(self, item):
+        if item.developer_missing:
+            item.developer = self._run_stage(item.game_ids, "developer", lambda app_id: self.fetch_game_developer(app_id, item.details), item.app_id) or ""
+
+    # Steam requests
+
+    def _wait_until_runnable(self):
+        """Block while the run is paused, raise FetchCanceled once it was canceled"""
+        self._resume_event.wait()
+        if not self.running:
+            raise FetchCanceled()
+
+    @contextmanager
+    def _request(self, url, endpoint, session=None, rate_limited=True, **kwargs):
+        """
+        Stream a GET request that cancel() can abort: the response is tracked while it is
+        open and closed from the canceling thread, which ends any read in progress.
+        Latency, status, retries and bytes are recorded in the run's telemetry under endpoint.
+        """
+        telemetry = self.telemetry
+        for attempt in range(MAX_RETRIES + 1):
+            self._wait_until_runnable()
+            if rate_limited:
+                wait_start = perf_counter()
+                if not self.rate_limiter.wait(self._cancel_event):
+                    raise FetchCanceled()
+                telemetry.record_wait(endpoint, perf_counter() - wait_start)
+            self._wait_until_runnable()
+            request_start = perf_counter()
+            try:
+                response = (session or requests).get(url, timeout=self.REQUEST_TIMEOUT, stream=True, **kwargs)
+            except Exception as e:
+                if self.running:
+                    telemetry.record_error(f"{endpoint} {url}", e, endpoint)
+                raise
+            telemetry.record_request(endpoint, perf_counter() - request_start, response.status_code)
+            if response.status_code not in (429, 503) or attempt == MAX_RETRIES:
+                break
+            telemetry.record_retry(endpoint)
+            delay = retry_delay(response, attempt)
+            response.close()
+            if rate_limited:
+                self.rate_limiter.backoff(delay)
+            elif self._cancel_event.wait(delay):
+                raise FetchCanceled()
+        with self._in_flight_lock:
+            self._in_flight.add(response)
+        transfer_start = perf_counter()
+        try:
+            if not self.running:
+                raise FetchCanceled()
+            yield response
+        except Exception:
+            if not self.running:
+                raise FetchCanceled()
+            raise
+        finally:
+            with self._in_flight_lock:
+                self._in_flight.discard(response)
+            telemetry.record_transfer(endpoint, perf_counter() - transfer_start, response_bytes(response))
+            response.close()
+
+    def _find_app_id_by_title(self, title):
+        # Resolve from the local app index first, storesearch is only used for misses
+        app_index = get_app_index()
+        if app_index:
+            app_id, _ = app_index.lookup(title)
+            self.telemetry.record_cache("app index", bool(app_id))
+            if app_id:
+                return app_id
+
+        search_url = f"{self.store_url}/api/storesearch/?term={title}&l=english&cc=US"
+        with self._request(search_url, "storesearch") as response:
+            data = response.json()
+
+        if data.get("total", 0) <= 0:
+            return None
+
+        items = [item for item in data["items"] if is_app_id(item.get("id", ""))]
+        if not items:
+            return None
+        match = best_match(title, [(str(item["id"]), item["name"]) for item in items])
+        if match is None:
+            # Nothing resembles the title, still take the top search result but let the user verify it
+            self.uncertain_matches.append(f"{title} → {items[0]['name']} (no close match)")
+            return str(items[0]["id"])
+        if not match.confident:
+            self.uncertain_matches.append(f"{title} → {match.name} ({match.score:.0%} match)")
+        return match.key
+
+    def fetch_app_details(self, app_id):
+        """
+        Returns:
+            Dict with the header_image and developers the later stages need, or None if the AppID is invalid
+        """
+        if not is_app_id(app_id):
+            return None
+        url = f"{self.store_url}/api/appdetails?appids={app_id}"
+        with self._request(url, "appdetails") as response:
+            data = response.json()
+        if app_id in data and data[app_id]["success"]:
+            details = data[app_id]["data"]
+            if self.details_store is not None:
+                with self._writing_stores() as writable:
+                    if writable:
+                        self.details_store.put(app_id, details)
+            return {
+                "header_image": details.get("header_image", ""),
+                "developers": details.get("developers", [])
+            }
+        return None
+
+    def fetch_game_icon(self, app_id, details=None):
+        if not app_id or not is_app_id(app_id):
+            return None
+
+        try:
+            if details is None:
+                details = self.fetch_app_details(app_id)
+            if details and details["header_image"]:
+                url = details["header_image"]
+                headers = self.icon_store.conditional_headers(app_id, url)
+                with self._request(url, "header image", rate_limited=False, headers=headers) as icon_response:
+                    replaced = False
+                    if icon_response.status_code == 304:
+                        self.telemetry.record_cache("icon validators", True)
+                        icon_path = self.icon_store.icon_path(app_id)
+                    elif icon_response.status_code != 200:
+                        return None
+                    else:
+                        if headers:
+                            self.telemetry.record_cache("icon validators", False)
+                        download = self.icon_store.download(app_id, icon_response)
+                        with self._writing_stores() as writable:
+                            if not writable:
+                                self.icon_store.discard_download(download)
+                                raise FetchCanceled()
+                            icon_path, outcome = self.icon_store.commit_download(app_id, url, icon_response, download)
+                        # Unchanged or identical to another game's image, nothing new was stored
+                        self.telemetry.record_cache("icon content", outcome != "new")
+                        replaced = outcome != "unchanged"
+                self._ingest_icon(app_id, icon_path, replaced)
+                return icon_path
+        except FetchCanceled:
+            raise
+        except Exception as e:
+            logging.error(f" fetching icon for app_id {app_id}: {e}")
+            self.telemetry.record_error(f"fetching icon for app_id {app_id}", e)
+
+        return None
+
+    def _ingest_icon(self, app_id, icon_path, replaced=False):
+        if not self.icon_ingest:
+            return
+        try:
+            # A replaced header's old variants would otherwise be kept as they are
+            self.icon_ingest(icon_path, force=replaced)
+            with self._writing_stores() as writable:
+                if writable:
+                    self.icon_store.refresh_local_size(app_id)
+        except Exception as e:
+            # The downloaded header is still usable as it is
+            logging.error(f" creating display variants for app_id {app_id}: {e}")
+            self.telemetry.record_error(f"creating display variants for app_id {app_id}", e)
+
+    def fetch_steam_reviews(self, app_id):
+        try:
+            api_url = f"{self.store_url}/appreviews/{app_id}?json=1&purchase_type=all&language=all&review_type=all&filter_by=summary"
+            with self._request(api_url, "appreviews") as api_response:
+                status_code = api_response.status_code
+                api_data = api_response.json() if status_code == 200 else {}
+
+            if status_code == 200:
+
+                if api_data.get('success') == 1 and 'query_summary' in api_data:
+                    summary = api_data['query_summary']
+                    review_count = summary.get('total_reviews', 0)
+                    rating_text = summary.get('review_score_desc', '')
+
+                    if rating_text:
+                        return {
+                            'rating_text': rating_text,
+                            'review_count': review_count
+                        }
+
+            status_code, page = self._fetch_store_page(app_id, want_developer=False)
+
+            if page['age_gate']:
+                session = self._bypass_age_gate(app_id)
+                status_code, page = self._fetch_store_page(app_id, want_developer=False, session=session)
+
+                if page['age_gate']:
+                    return {
+                        'rating_text': 'Age Restricted (Unable to Bypass)',
+                        'review_count': None,
+                        'age_restricted': True
+                    }
+
+            if status_code != 200:
+                return None
+
+            return page['review_data']
+
+        except FetchCanceled:
+            raise
+        except Exception as e:
+            logging.error(f" fetching reviews for app_id {app_id}: {e}")
+            self.telemetry.record_error(f"fetching reviews for app_id {app_id}", e)
+
+        return None
+
+    def fetch_game_developer(self, app_id, details=None):
+        if not app_id or app_id.strip() == "":
+            return None
+
+        try:
+            if details is None:
+                details = self.fetch_app_details(app_id)
+            if details and details["developers"]:
+                return ", ".join(details["developers"])
+
+            status_code, page = self._fetch_store_page(app_id, want_reviews=False)
+            if status_code == 200 and page['developer']:
+                return page['developer']
+
+        except FetchCanceled:
+            raise
+        except Exception as e:
+            logging.error(f" fetching developer for app_id {app_id}: {e}")
+            self.telemetry.record_error(f"fetching developer for app_id {app_id}", e)
+
+        return None
+
+    def _fetch_store_page(self, app_id, want_reviews=True, want_developer=True, session=None):
+        """
+        Stream the store page, only parsing it until the requested rows have been found.
+        With parse processes configured the whole page is downloaded and parsed in the process pool instead.
+
+        Returns:
+            Tuple of (status_code, page_data dict with age_gate, review_data and developer)
+        """
+        url = f"{self.store_url}/app/{app_id}/"
+        pool = get_parse_pool(self.parse_processes)
+        with self._request(url, "store page", session=session, headers=STORE_PAGE_HEADERS) as response:
+            if pool is not None:
+                return response.status_code, parse_page_in_pool(pool, response.content, want_reviews, want_developer, response.encoding or "utf-8")
+            parser = StorePageParser(want_reviews, want_developer)
+            parser.feed_chunks(response.iter_content(STREAM_CHUNK_SIZE), response.encoding)
+            return response.status_code, page_data(parser)
+
+    def _bypass_age_gate(self, app_id):
+        session = requests.Session()
+
+        session.cookies.set('birthtime', '-473392799')
+        session.cookies.set('mature_content', '1')
+
+        data = {
+            'snr': '1_agecheck_agecheck__age-gate',
+            'ageDay': '1',
+            'ageMonth': '1',
+            'ageYear': '1970'
+        }
+
+        verify_url = f'{self.store_url}/agecheckset/app/{app_id}/'
+        self._wait_until_runnable()
+        wait_start = perf_counter()
+        if not self.rate_limiter.wait(self._cancel_event):
+            raise FetchCanceled()
+        self.telemetry.record_wait("age check", perf_counter() - wait_start)
+        request_start = perf_counter()
+        response = session.post(verify_url, data=data, timeout=self.REQUEST_TIMEOUT)
+        self.telemetry.record_request("age check", perf_counter() - request_start, response.status_code)
+        self.telemetry.record_transfer("age check", 0.0, len(response.content))
+
+        return session
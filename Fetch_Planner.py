@@ -0,0 +1,317 @@
+# Fetch_Planner.py
+import os
+from time import time
+from collections import Counter
+from Title_Matcher import title_key
+
+FETCHED_AT_FIELDS = ("reviews", "icon", "developer")
+
+# Endpoints a fetch run can request, and whether they count against the Steam rate limit
+ENDPOINTS = {
+    "storesearch": True,
+    "appdetails": True,
+    "appreviews": True,
+    "header image": False
+}
+# Job-store stage that records each endpoint's result in an interrupted run
+ENDPOINT_STAGES = {"storesearch": "search", "appdetails": "appdetails", "appreviews": "reviews", "header image": "icon"}
+# Stored appdetails older than this don't validate an AppID any more, it is requested again
+DEFAULT_DETAILS_MAX_AGE_SECONDS = 30 * 86400
+
+class FetchGroup:
+    """Games that resolve to the same Steam entity and are therefore fetched once"""
+    def __init__(self, key, game_ids):
+        self.key = key
+        self.game_ids = game_ids
+
+    def __len__(self):
+        return len(self.game_ids)
+
+def group_games(games_dict):
+    """
+    Group games by app_id, or by title (case and spacing aside) for games without one, so duplicate keys
+    from bundles and several keys for the same app share a single set of requests. Editions of a game
+    keep their own groups, they are separate Steam apps.
+
+    Returns:
+        List of FetchGroup in the order their first game appears in games_dict
+    """
+    groups = {}
+    for game_id, game_data in games_dict.items():
+        app_id = game_data.get("app_id", "").strip()
+        if app_id:
+            key = ("app_id", app_id)
+        else:
+            key = ("title", title_key(game_data.get("title", "")))
+        groups.setdefault(key, []).append(game_id)
+    return [FetchGroup(key, game_ids) for key, game_ids in groups.items()]
+
+def group_by_title(game_ids, games_dict):
+    """Split game_ids into lists that share a title, case and spacing aside"""
+    groups = {}
+    for game_id in game_ids:
+        groups.setdefault(title_key(games_dict[game_id].get("title", "")), []).append(game_id)
+    return list(groups.values())
+
+def mark_fetched(game_data, field, timestamp=None):
+    """Record when a data field (reviews, icon, developer) was last fetched for a game"""
+    game_data.setdefault("fetched_at", {})[field] = int(timestamp if timestamp is not None else time())
+
+def apply_fetched_data(game_data, app_id, icon_path, review_data, developer, timestamp=None):
+    """
+    Apply fetched Steam data to a game, stamping each field that was fetched with its fetch time.
+    Reviews of a previous AppID are dropped, so they are never kept when the new AppID has none.
+    """
+    previous_app_id = game_data.get("_previous_app_id", "")
+    game_data["_previous_app_id"] = app_id
+    if previous_app_id and previous_app_id != app_id:
+        game_data.pop("review_data", None)
+    game_data["app_id"] = app_id
+    if icon_path:
+        game_data["icon_path"] = icon_path
+        mark_fetched(game_data, "icon", timestamp)
+    if review_data:
+        game_data["review_data"] = review_data
+        mark_fetched(game_data, "reviews", timestamp)
+    if developer:
+        game_data["developer"] = developer
+        mark_fetched(game_data, "developer", timestamp)
+
+def incomplete_games(games_dict):
+    """The games missing an AppID, header image, reviews or developer, what "Fetch Missing Data" fetches"""
+    incomplete = {}
+    for game_id, game_data in games_dict.items():
+        app_id_missing = not game_data.get("app_id", "").strip()
+        icon_path = game_data.get("icon_path", "")
+        icon_missing = not icon_path or not os.path.exists(icon_path)
+        review_missing = "review_data" not in game_data
+        developer_missing = "developer" not in game_data or not game_data.get("developer", "").strip()
+        if app_id_missing or icon_missing or review_missing or developer_missing:
+            incomplete[game_id] = game_data
+    return incomplete
+
+def get_fetched_at(game_data, field):
+    """Returns the epoch timestamp the field was last fetched at, 0 if it never was"""
+    return game_data.get("fetched_at", {}).get(field, 0)
+
+def select_stale_games(games_dict, field, max_age_seconds, order="stalest", now=None):
+    """
+    Pick the games whose field was fetched longer than max_age_seconds ago (or never).
+
+    Args:
+        order: "stalest" to refresh the oldest records first, "popular" to refresh
+               games with the most reviews first (their ratings change fastest)
+
+    Returns:
+        Dict of the stale games, in refresh order
+    """
+    cutoff = (now if now is not None else time()) - max_age_seconds
+    stale = [(game_id, game_data) for game_id, game_data in games_dict.items()
+             if get_fetched_at(game_data, field) <= cutoff]
+    if order == "popular":
+        stale.sort(key=lambda item: -((item[1].get("review_data") or {}).get("review_count") or 0))
+    else:
+        stale.sort(key=lambda item: get_fetched_at(item[1], field))
+    return dict(stale)
+
+def missing_fields(games):
+    """
+    Returns:
+        Tuple of (icon missing, reviews missing, developer missing) for any of the games
+    """
+    icon_missing = any(not game_data.get("icon_path", "") or not os.path.exists(game_data["icon_path"]) for game_data in games)
+    review_missing = any("review_data" not in game_data for game_data in games)
+    developer_missing = any("developer" not in game_data for game_data in games)
+    return icon_missing, review_missing, developer_missing
+
+class PlannedFetch:
+    """One group of games in a fetch plan with the endpoints it is expected to request"""
+    def __init__(self, game_ids, app_id="", search=False):
+        self.game_ids = game_ids
+        self.app_id = app_id
+        self.search = search  # The app_id comes from the title search (or the local app index)
+        self.endpoints = []
+        self.cache_hits = []  # Endpoints answered without a request, with what answered them
+        self.validated_by = ""  # "stored details" or "app index" when the app_id needs no appdetails request
+
+class FetchPlan:
+    """
+    The full request plan of a fetch run: which endpoints each group of games needs, what is answered
+    from local caches, how many requests grouping saves and how long the run should take at the rate limit.
+    The pipeline executes the plan's items as they are.
+    """
+    def __init__(self, mode, games_dict, requests_per_second):
+        self.mode = mode
+        self.games_dict = games_dict
+        self.requests_per_second = requests_per_second
+        self.items = []
+        self.skipped = {}  # game_id -> reason of the known failure
+        self.dedupe_saved = 0
+
+    @property
+    def reviews_only(self):
+        return self.mode == "reviews"
+
+    @property
+    def icons_only(self):
+        return self.mode == "icons"
+
+    def request_counts(self):
+        return Counter(endpoint for item in self.items for endpoint in item.endpoints)
+
+    def cache_hit_counts(self):
+        return Counter(source for item in self.items for _, source in item.cache_hits)
+
+    def rate_limited_requests(self):
+        return sum(count for endpoint, count in self.request_counts().items() if ENDPOINTS[endpoint])
+
+    def estimated_seconds(self):
+        """Time the rate-limited requests need at requests_per_second, None without a rate limit"""
+        if not self.requests_per_second:
+            return None
+        return self.rate_limited_requests() / self.requests_per_second
+
+    def summary_lines(self):
+        total_games = sum(len(item.game_ids) for item in self.items) + len(self.skipped)
+        counts = self.request_counts()
+        lines = [
+            f"Games: {total_games} in {len(self.items)} fetch groups",
+            "Requests: " + (", ".join(f"{counts[endpoint]} {endpoint}" for endpoint in ENDPOINTS if counts[endpoint]) or "none"),
+        ]
+        hits = self.cache_hit_counts()
+        if hits:
+            lines.append("Cache hits: " + ", ".join(f"{count} from {source}" for source, count in hits.items()))
+        if self.skipped:
+            lines.append(f"Skipped: {len(self.skipped)} known failures")
+        if self.dedupe_saved:
+            lines.append(f"Saved by grouping duplicate titles and AppIDs: {self.dedupe_saved} requests")
+        seconds = self.estimated_seconds()
+        if seconds is None:
+            lines.append("Estimated time: no rate limit set")
+        else:
+            lines.append(f"Estimated time: about {format_duration(seconds)} at {self.requests_per_second:g} requests/s")
+        return lines
+
+    def describe(self):
+        """Summary followed by one line per fetch group, for the dry-run dialog"""
+        lines = self.summary_lines() + [""]
+        for item in self.items:
+            title = self.games_dict[item.game_ids[0]].get("title", "Unknown")
+            if len(item.game_ids) > 1:
+                title += f" (x{len(item.game_ids)})"
+            parts = list(item.endpoints) + [f"{endpoint} from {source}" for endpoint, source in item.cache_hits]
+            lines.append(f"{title}: {', '.join(parts) or 'nothing to request'}")
+        for game_id, reason in self.skipped.items():
+            lines.append(f"{self.games_dict[game_id].get('title', 'Unknown')}: skipped (known failure: {reason})")
+        return lines
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m {seconds}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes}m"
+
+def local_validation(app_id, needs_details, app_index=None, details_store=None, max_age_seconds=DEFAULT_DETAILS_MAX_AGE_SECONDS, now=None):
+    """
+    Validate an app_id without an appdetails request: stored appdetails no older than max_age_seconds
+    also answer what the later stages need, the app index only confirms the AppID exists.
+
+    Returns:
+        "stored details", "app index", or "" if the AppID is unknown or stale and has to be requested
+    """
+    if details_store is not None:
+        fetched_at = details_store.fetched_at(app_id)
+        if fetched_at is not None and (time() if now is None else now) - fetched_at <= max_age_seconds:
+            return "stored details"
+    if not needs_details and app_index is not None and app_index.has_app_id(app_id):
+        return "app index"
+    return ""
+
+def build_fetch_plan(games_dict, mode="missing", job_store=None, failure_cache=None, app_index=None, requests_per_second=0,
+                     icon_store=None, details_store=None, details_max_age_seconds=DEFAULT_DETAILS_MAX_AGE_SECONDS):
+    """
+    Plan a fetch run over games_dict. mode is "reviews" for a review refresh, "icons" to re-validate every header
+    image, anything else fetches missing data. job_store answers stages an interrupted run already finished,
+    failure_cache skips known failures, app_index resolves titles without a storesearch request and
+    icon_store knows the header image URLs of earlier downloads. Stored AppIDs are validated in bulk against
+    details_store and app_index, only unknown or stale ones get an appdetails request.
+
+    Returns:
+        FetchPlan
+    """
+    plan = FetchPlan(mode, games_dict, requests_per_second)
+    now = time()
+
+    def recorded(game_ids, endpoint):
+        if not job_store:
+            return False
+        return any(job_store.get_stage(game_id, ENDPOINT_STAGES[endpoint])[0] for game_id in game_ids)
+
+    def add(item, endpoint):
+        if recorded(item.game_ids, endpoint):
+            item.cache_hits.append((endpoint, "interrupted run"))
+        else:
+            item.endpoints.append(endpoint)
+
+    for group in group_games(games_dict):
+        app_id = games_dict[group.game_ids[0]].get("app_id", "").strip()
+
+        if plan.reviews_only:
+            item = PlannedFetch(group.game_ids, app_id)
+            if app_id:
+                add(item, "appreviews")
+            plan.items.append(item)
+            continue
+
+        if plan.icons_only:
+            item = PlannedFetch(group.game_ids, app_id)
+            if app_id:
+                if icon_store is not None and icon_store.url(app_id):
+                    item.cache_hits.append(("appdetails", "icon cache"))
+                else:
+                    add(item, "appdetails")
+                add(item, "header image")
+            plan.items.append(item)
+            continue
+
+        if app_id and not (failure_cache is not None and failure_cache.get("app_id", app_id)):
+            item = PlannedFetch(group.game_ids, app_id)
+            icon_missing, review_missing, developer_missing = missing_fields([games_dict[game_id] for game_id in group.game_ids])
+            item.validated_by = local_validation(app_id, icon_missing or developer_missing, app_index, details_store,
+                                                 details_max_age_seconds, now)
+            if item.validated_by:
+                item.cache_hits.append(("appdetails", item.validated_by))
+            else:
+                add(item, "appdetails")
+            if icon_missing:
+                add(item, "header image")
+            if review_missing or icon_missing:
+                add(item, "appreviews")
+            plan.items.append(item)
+            continue
+
+        # No AppID, or one Steam already reported as invalid: resolve by title
+        for game_ids in group_by_title(group.game_ids, games_dict):
+            title = games_dict[game_ids[0]].get("title", "")
+            reason = failure_cache.get("title", title) if failure_cache is not None else None
+            if reason:
+                plan.skipped.update(dict.fromkeys(game_ids, reason))
+                continue
+            item = PlannedFetch(game_ids, search=True)
+            indexed_app_id = app_index.lookup(title)[0] if app_index else None
+            if indexed_app_id:
+                item.app_id = indexed_app_id
+                item.cache_hits.append(("storesearch", "app index"))
+            else:
+                add(item, "storesearch")
+            for endpoint in ("appdetails", "header image", "appreviews"):
+                add(item, endpoint)
+            plan.items.append(item)
+
+    # Every group stands in for its games, which would otherwise each have requested the same endpoints
+    plan.dedupe_saved = sum((len(item.game_ids) - 1) * len(item.endpoints) for item in plan.items)
+    return plan
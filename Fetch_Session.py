@@ -0,0 +1,48 @@
+# Fetch_Session.py
+from functools import partial
+from Config import ConfigManager
+from Fetch_Planner import build_fetch_plan
+from Fetch_Pipeline import SteamFetchPipeline
+from Steam_App_Index import get_app_index
+
+def plan_fetch(games_to_process, mode, job_store=None, failure_cache=None, icon_store=None, details_store=None):
+    """Plan a fetch run with the configured rate limit and the persisted stores"""
+    config_manager = ConfigManager()
+    return build_fetch_plan(
+        games_to_process,
+        mode,
+        job_store=job_store,
+        failure_cache=failure_cache,
+        app_index=get_app_index(),
+        requests_per_second=config_manager.get("steam_requests_per_second"),
+        icon_store=icon_store,
+        details_store=details_store,
+        details_max_age_seconds=config_manager.get("stored_details_max_age_days") * 86400
+    )
+
+def create_pipeline(games_dict, icons_folder, mode, plan=None, job_store=None, failure_cache=None, icon_store=None,
+                    details_store=None, on_progress=None, on_status=None, stage_workers=None):
+    """SteamFetchPipeline set up from the config, the GUI fetcher and the command line run the same engine"""
+    config_manager = ConfigManager()
+    icon_ingest = None
+    if config_manager.get("icon_variants"):
+        # Imported here so runs without display variants never load QtGui
+        from Icon_Variants import ensure_icon_variants
+        icon_ingest = partial(ensure_icon_variants, keep_original=config_manager.get("keep_original_icons"),
+                              quality=config_manager.get("icon_variant_quality"))
+    return SteamFetchPipeline(
+        games_dict,
+        icons_folder,
+        update_reviews_only=(mode == "reviews"),
+        job_store=job_store,
+        stage_workers=stage_workers or config_manager.get("fetch_stage_workers"),
+        requests_per_second=config_manager.get("steam_requests_per_second"),
+        parse_processes=config_manager.get("parse_processes"),
+        failure_cache=failure_cache,
+        plan=plan,
+        icon_store=icon_store,
+        icon_ingest=icon_ingest,
+        details_store=details_store,
+        on_progress=on_progress,
+        on_status=on_status
+    )
@@ -0,0 +1,172 @@
+# Fetch_Telemetry.py
+import bisect
+import threading
+from time import time
+from collections import Counter, deque
+from Config import write_json_atomic
+
+# Upper bounds of the latency histogram buckets in milliseconds, the last bucket takes everything slower
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+MAX_RECENT_ERRORS = 50
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def bucket_label(index):
+    if index < len(LATENCY_BUCKETS_MS):
+        return f"≤{LATENCY_BUCKETS_MS[index]}ms"
+    return f">{LATENCY_BUCKETS_MS[-1]}ms"
+
+class EndpointStats:
+    """Request counters of a single Steam endpoint"""
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.errors = Counter()  # Exception type -> count, for requests that never got a response
+        self.status_codes = Counter()
+        self.bytes = 0
+        self.wait_seconds = 0.0  # Time spent waiting for a rate-limit slot
+        self.transfer_seconds = 0.0
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.latencies_ms = []
+
+    def to_dict(self):
+        latencies = sorted(self.latencies_ms)
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "errors": dict(self.errors),
+            "status_codes": {str(code): count for code, count in sorted(self.status_codes.items())},
+            "bytes": self.bytes,
+            "wait_seconds": round(self.wait_seconds, 3),
+            "transfer_seconds": round(self.transfer_seconds, 3),
+            "latency_ms": {
+                "p50": round(percentile(latencies, 0.5), 1),
+                "p95": round(percentile(latencies, 0.95), 1),
+                "max": round(latencies[-1], 1) if latencies else 0.0,
+                "avg": round(sum(latencies) / len(latencies), 1) if latencies else 0.0
+            },
+            "latency_histogram": {bucket_label(index): count for index, count in enumerate(self.histogram)}
+        }
+
+class FetchTelemetry:
+    """
+    Per-endpoint request statistics and cache hit ratios of one fetch run. Latency is the time until
+    the response headers arrived, transfer time runs until the body was read. Thread-safe, Qt-free.
+    """
+    def __init__(self, settings=None):
+        self.settings = dict(settings or {})  # Concurrency and rate limit the run used, for comparing runs
+        self.started_at = time()
+        self.finished_at = None
+        self.endpoints = {}
+        self.caches = {}  # Cache name -> [hits, misses]
+        self.stages = []
+        self.recent_errors = deque(maxlen=MAX_RECENT_ERRORS)
+        self._lock = threading.Lock()
+
+    def _endpoint(self, endpoint):
+        stats = self.endpoints.get(endpoint)
+        if stats is None:
+            stats = self.endpoints[endpoint] = EndpointStats()
+        return stats
+
+    def record_wait(self, endpoint, seconds):
+        with self._lock:
+            self._endpoint(endpoint).wait_seconds += seconds
+
+    def record_request(self, endpoint, latency_seconds, status_code):
+        latency_ms = latency_seconds * 1000
+        with self._lock:
+            stats = self._endpoint(endpoint)
+            stats.requests += 1
+            stats.status_codes[status_code] += 1
+            stats.histogram[bisect.bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+            stats.latencies_ms.append(latency_ms)
+
+    def record_transfer(self, endpoint, seconds, byte_count):
+        with self._lock:
+            stats = self._endpoint(endpoint)
+            stats.transfer_seconds += seconds
+            stats.bytes += byte_count
+
+    def record_retry(self, endpoint):
+        with self._lock:
+            self._endpoint(endpoint).retries += 1
+
+    def record_error(self, context, error, endpoint=None):
+        """Keep an error that would otherwise only be logged, counted per endpoint if it came from a request"""
+        with self._lock:
+            if endpoint:
+                self._endpoint(endpoint).errors[type(error).__name__] += 1
+            self.recent_errors.append(f"{context}: {error}")
+
+    def record_cache(self, cache, hit, count=1):
+        with self._lock:
+            counts = self.caches.setdefault(cache, [0, 0])
+            counts[0 if hit else 1] += count
+
+    def finish(self, stage_metrics=None):
+        self.finished_at = time()
+        self.stages = list(stage_metrics or [])
+
+    def to_dict(self):
+        with self._lock:
+            finished_at = self.finished_at or time()
+            return {
+                "started_at": int(self.started_at),
+                "duration_seconds": round(finished_at - self.started_at, 3),
+                "settings": self.settings,
+                "endpoints": {name: stats.to_dict() for name, stats in self.endpoints.items()},
+                "caches": {
+                    name: {"hits": hits, "misses": misses,
+                           "hit_ratio": round(hits / (hits + misses), 3) if hits + misses else 0.0}
+                    for name, (hits, misses) in self.caches.items()
+                },
+                "stages": self.stages,
+                "recent_errors": list(self.recent_errors)
+            }
+
+    def export_json(self, path) -> bool:
+        return write_json_atomic(path, self.to_dict(), indent=4)
+
+    def summary_lines(self):
+        """Readable report for the diagnostics dialog"""
+        data = self.to_dict()
+        settings = data["settings"]
+        lines = [f"Duration: {data['duration_seconds']:.1f}s"]
+        if settings:
+            lines.append("Settings: " + ", ".join(f"{key} {value}" for key, value in settings.items()))
+
+        for name, stats in data["endpoints"].items():
+            latency = stats["latency_ms"]
+            codes = ", ".join(f"{code}×{count}" for code, count in stats["status_codes"].items()) or "none"
+            lines += [
+                "",
+                f"{name}: {stats['requests']} requests, {stats['retries']} retries, {stats['bytes'] / 1024:.1f} KB",
+                f"  Latency: p50 {latency['p50']:.0f}ms, p95 {latency['p95']:.0f}ms, max {latency['max']:.0f}ms",
+                f"  Status codes: {codes}",
+                f"  Waited for rate limit: {stats['wait_seconds']:.1f}s, transferring: {stats['transfer_seconds']:.1f}s"
+            ]
+            if stats["errors"]:
+                lines.append("  Errors: " + ", ".join(f"{error}×{count}" for error, count in stats["errors"].items()))
+            histogram = [f"{label} {count}" for label, count in stats["latency_histogram"].items() if count]
+            if histogram:
+                lines.append("  Histogram: " + ", ".join(histogram))
+
+        if data["caches"]:
+            lines.append("")
+            for name, cache in data["caches"].items():
+                lookups = cache["hits"] + cache["misses"]
+                lines.append(f"Cache {name}: {cache['hits']}/{lookups} hits ({cache['hit_ratio']:.0%})")
+
+        if data["stages"]:
+            lines.append("")
+            for metrics in data["stages"]:
+                lines.append("Stage {stage}: {processed} processed, {failed} failed, {avg_seconds}s avg, "
+                             "{workers} workers, {max_queued} max queued".format(**metrics))
+
+        if data["recent_errors"]:
+            lines += ["", "Recent errors:"] + data["recent_errors"]
+        return lines
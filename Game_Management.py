@@ -9,6 +9,7 @@ from PySide6.QtGui import QPixmap
 from Config import ConfigManager, GAME_PICTURES_DIR, HORIZONTAL_SPACING, VERTICAL_SPACING, VERTICAL_SPACING_SMALL, TITLE_HEIGHT, UI_MARGIN
 from CustomWidgets import ScrollRejectionComboBox, RoundedImage, PlainTextInput, create_scrollable_message_dialog
 from Theme_Menu import DEFAULT_RADIUS
+from Icon_Variants import display_icon_path
 
 ICON_MULTIPLIER = 0.25  # Multiplier for icon size # 0.60
 ICON_HEIGHT = 215  # Actual picture height
@@ -163,7 +164,7 @@ class EditGameDialog(QDialog):
             icon_label.setFixedSize(Icon_width, Icon_height)
             icon_label.setAlignment(Qt.AlignCenter)
             if "icon_path" in game and os.path.exists(game["icon_path"]):
-                pixmap = QPixmap(game["icon_path"]).scaled(Icon_width, Icon_height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+                pixmap = QPixmap(display_icon_path(game["icon_path"], "medium")).scaled(Icon_width, Icon_height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
                 icon_label.setPixmap(pixmap)
             else:
                 icon_label.setText("._.")
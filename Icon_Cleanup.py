@@ -0,0 +1,160 @@
+# Icon_Cleanup.py
+import os
+import re
+import logging
+from time import time
+
+QUARANTINE_FOLDER = "quarantine"
+TEMP_SUFFIXES = (".part", ".link")  # Leftovers of downloads and re-encodes that were interrupted
+RECENT_SECONDS = 3600  # Files this new are never touched, a fetch may be about to reference them
+PICTURE_PATTERN = re.compile(r"^(\d+)(?:\.[a-z]+)?\.jpg$")  # {app_id}.jpg and its {app_id}.{variant}.jpg copies
+
+def referenced_pictures(games, protected_app_ids=()):
+    """
+    Snapshot of what the library references, taken on the UI thread so a sweep can run in the background.
+    protected_app_ids are kept as well, such as the AppIDs a fetch job resolved but hasn't saved to the library.
+
+    Returns:
+        Tuple of (app_ids, normalized icon paths)
+    """
+    app_ids = set(protected_app_ids)
+    paths = set()
+    for game_data in games.values():
+        app_id = game_data.get("app_id", "").strip()
+        if app_id:
+            app_ids.add(app_id)
+        icon_path = game_data.get("icon_path", "")
+        if icon_path:
+            paths.add(os.path.normcase(os.path.abspath(icon_path)))
+    return app_ids, paths
+
+def _folder_usage(folder):
+    """Files and bytes in folder, hard-linked copies counted once"""
+    files = 0
+    inodes = {}
+    try:
+        entries = list(os.scandir(folder))
+    except OSError:
+        return 0, 0
+    for entry in entries:
+        if entry.is_file():
+            stat = entry.stat()
+            files += 1
+            inodes[(stat.st_dev, stat.st_ino) if stat.st_ino else entry.path] = stat.st_size
+    return files, sum(inodes.values())
+
+def _last_changed(stat):
+    # A hard link to an older picture keeps that file's mtime, the inode change time moves with the link.
+    # On Windows st_ctime is the creation time, so only the mtime counts there
+    return stat.st_mtime if os.name == "nt" else max(stat.st_mtime, stat.st_ctime)
+
+def scan_pictures(icons_folder, app_ids, paths, now=None):
+    """
+    Account for the storage used by icons_folder and find the pictures no game references any more.
+
+    Returns:
+        Report dict with the folder's files and bytes, the orphaned pictures, stale temp files
+        and what the quarantine holds
+    """
+    now = time() if now is None else now
+    report = {"files": 0, "bytes": 0, "headers": 0, "variants": 0, "orphans": [], "orphan_bytes": 0,
+              "temp_files": [], "quarantine_files": 0, "quarantine_bytes": 0}
+    inodes = {}
+    for entry in os.scandir(icons_folder):
+        if not entry.is_file():
+            continue
+        stat = entry.stat()
+        report["files"] += 1
+        inodes[(stat.st_dev, stat.st_ino) if stat.st_ino else entry.path] = stat.st_size
+        if now - _last_changed(stat) < RECENT_SECONDS:
+            continue
+        if entry.name.endswith(TEMP_SUFFIXES):
+            report["temp_files"].append(entry.path)
+            continue
+        match = PICTURE_PATTERN.match(entry.name)
+        if not match:
+            continue  # Not ours, leave it alone
+        is_header = entry.name == f"{match.group(1)}.jpg"
+        report["headers" if is_header else "variants"] += 1
+        header_path = os.path.normcase(os.path.abspath(os.path.join(icons_folder, f"{match.group(1)}.jpg")))
+        if match.group(1) not in app_ids and header_path not in paths:
+            report["orphans"].append(entry.path)
+            report["orphan_bytes"] += stat.st_size
+    report["bytes"] = sum(inodes.values())
+    report["quarantine_files"], report["quarantine_bytes"] = _folder_usage(os.path.join(icons_folder, QUARANTINE_FOLDER))
+    return report
+
+def sweep_pictures(icons_folder, app_ids, paths, quarantine_days=30, icon_store=None, is_canceled=None):
+    """
+    Move orphaned pictures into the quarantine folder, where they are deleted after quarantine_days
+    (right away with 0), and delete stale temp files. Forgets the icon cache entries of removed headers.
+
+    Returns:
+        The scan_pictures report taken before the sweep, plus how many files were quarantined,
+        deleted and purged from the quarantine and the bytes that freed
+    """
+    report = scan_pictures(icons_folder, app_ids, paths)
+    report.update(quarantined=0, deleted=0, purged=0, freed_bytes=0)
+    quarantine_folder = os.path.join(icons_folder, QUARANTINE_FOLDER)
+    now = time()
+
+    def delete(path):
+        size = os.path.getsize(path)
+        os.unlink(path)
+        report["freed_bytes"] += size
+
+    for path in report["temp_files"]:
+        try:
+            delete(path)
+            report["deleted"] += 1
+        except OSError as e:
+            logging.error(f" removing {os.path.basename(path)}: {e}")
+
+    for path in report["orphans"]:
+        if is_canceled and is_canceled():
+            break
+        name = os.path.basename(path)
+        try:
+            if quarantine_days > 0:
+                os.makedirs(quarantine_folder, exist_ok=True)
+                target = os.path.join(quarantine_folder, name)
+                os.replace(path, target)
+                os.utime(target, (now, now))  # The quarantine period starts now
+                report["quarantined"] += 1
+            else:
+                delete(path)
+                report["deleted"] += 1
+        except OSError as e:
+            logging.error(f" removing orphaned picture {name}: {e}")
+            continue
+        if icon_store is not None and name.count(".") == 1:
+            icon_store.forget(name.split(".")[0])
+
+    if os.path.isdir(quarantine_folder):
+        for entry in os.scandir(quarantine_folder):
+            if entry.is_file() and now - entry.stat().st_mtime > quarantine_days * 86400:
+                try:
+                    delete(entry.path)
+                    report["purged"] += 1
+                except OSError as e:
+                    logging.error(f" purging quarantined picture {entry.name}: {e}")
+
+    if icon_store is not None:
+        icon_store.save()
+    return report
+
+def restore_quarantined(icons_folder):
+    """Move every quarantined picture back, unless a new picture took its place meanwhile"""
+    quarantine_folder = os.path.join(icons_folder, QUARANTINE_FOLDER)
+    restored = 0
+    if not os.path.isdir(quarantine_folder):
+        return restored
+    for entry in os.scandir(quarantine_folder):
+        target = os.path.join(icons_folder, entry.name)
+        if entry.is_file() and not os.path.exists(target):
+            try:
+                os.replace(entry.path, target)
+                restored += 1
+            except OSError as e:
+                logging.error(f" restoring quarantined picture {entry.name}: {e}")
+    return restored
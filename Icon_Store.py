@@ -0,0 +1,188 @@
+# Icon_Store.py
+import os
+import hashlib
+import logging
+import tempfile
+import threading
+from Config import CONFIG_DIR, write_json_atomic, read_json_file
+
+ICON_CACHE_FILE = CONFIG_DIR / "icon_cache.json"
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+class IconStore:
+    """
+    Tracks the header images in icons_folder: the URL each {app_id}.jpg came from, the ETag and Last-Modified
+    validators Steam sent with it, and its content hash. Downloads stream into a temp file that is renamed
+    into place, unchanged images aren't rewritten and identical images are hard-linked instead of stored twice.
+    With path None the validators only live as long as the store.
+    """
+    def __init__(self, icons_folder, path=ICON_CACHE_FILE):
+        self.icons_folder = str(icons_folder)
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}  # app_id -> {"url", "etag", "last_modified", "sha256", "size"}
+        self._by_hash = {}  # sha256 -> app_ids with that content
+        self._dirty = False
+        self.load()
+
+    def load(self):
+        if self.path is None:
+            return
+        data = read_json_file(self.path, {})
+        self._entries = data if isinstance(data, dict) else {}
+        self._by_hash = {}
+        for app_id, entry in self._entries.items():
+            self._by_hash.setdefault(entry["sha256"], set()).add(app_id)
+
+    def save(self):
+        with self._lock:
+            if not self._dirty or self.path is None:
+                return
+            write_json_atomic(self.path, self._entries)
+            self._dirty = False
+
+    def icon_path(self, app_id):
+        return os.path.join(self.icons_folder, f"{app_id}.jpg")
+
+    def url(self, app_id):
+        """Header image URL of an earlier download, so a refresh can skip the appdetails request"""
+        with self._lock:
+            entry = self._entries.get(app_id)
+            return entry["url"] if entry else ""
+
+    def _valid_entry(self, app_id):
+        # Only trust validators while the file on disk is still the one they describe
+        entry = self._entries.get(app_id)
+        if not entry:
+            return None
+        try:
+            if os.path.getsize(self.icon_path(app_id)) != entry["size"]:
+                return None
+        except OSError:
+            return None
+        return entry
+
+    def conditional_headers(self, app_id, url):
+        """If-None-Match / If-Modified-Since headers for re-requesting url, empty if there is nothing to validate"""
+        with self._lock:
+            entry = self._valid_entry(app_id)
+            if entry is None or entry["url"] != url:
+                return {}
+            headers = {}
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+            return headers
+
+    def store_response(self, app_id, url, response, chunk_size=DOWNLOAD_CHUNK_SIZE):
+        """
+        Stream a 200 response for app_id's header image to disk.
+
+        Returns:
+            Tuple of (icon path, "new", "unchanged" or "duplicate")
+        """
+        return self.commit_download(app_id, url, response, self.download(app_id, response, chunk_size))
+
+    def download(self, app_id, response, chunk_size=DOWNLOAD_CHUNK_SIZE):
+        """
+        First half of store_response, the network part: stream the body into a temp file next to the icons.
+
+        Returns:
+            Tuple of (temp file path, sha256, size) to pass to commit_download or discard_download
+        """
+        digest = hashlib.sha256()
+        size = 0
+        temp_file = tempfile.NamedTemporaryFile("wb", dir=self.icons_folder, prefix=f".{app_id}.", suffix=".part", delete=False)
+        try:
+            with temp_file:
+                for chunk in response.iter_content(chunk_size):
+                    temp_file.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+        except BaseException:
+            self.discard_download((temp_file.name, None, 0))
+            raise
+        return temp_file.name, digest.hexdigest(), size
+
+    def discard_download(self, download):
+        try:
+            os.unlink(download[0])
+        except OSError:
+            pass
+
+    def commit_download(self, app_id, url, response, download):
+        """Second half of store_response, only local files: move a finished download into place and record it"""
+        target = self.icon_path(app_id)
+        temp_name, sha256, size = download
+        try:
+            with self._lock:
+                current = self._valid_entry(app_id)
+                if current is not None and current["sha256"] == sha256:
+                    outcome = "unchanged"
+                    os.unlink(temp_name)
+                else:
+                    outcome = "new"
+                    original = self._find_content(sha256, exclude=app_id)
+                    if original and self._link(original, target):
+                        outcome = "duplicate"
+                        os.unlink(temp_name)
+                    else:
+                        os.replace(temp_name, target)
+                previous = self._entries.get(app_id)
+                if previous is not None:
+                    self._by_hash.get(previous["sha256"], set()).discard(app_id)
+                self._by_hash.setdefault(sha256, set()).add(app_id)
+                self._entries[app_id] = {
+                    "url": url,
+                    "etag": response.headers.get("ETag", ""),
+                    "last_modified": response.headers.get("Last-Modified", ""),
+                    "sha256": sha256,
+                    "size": size
+                }
+                self._dirty = True
+            return target, outcome
+        except BaseException:
+            self.discard_download(download)
+            raise
+
+    def _find_content(self, sha256, exclude):
+        for app_id in self._by_hash.get(sha256, ()):
+            entry = self._valid_entry(app_id)
+            if app_id != exclude and entry is not None and entry["sha256"] == sha256:
+                return self.icon_path(app_id)
+        return None
+
+    def _link(self, source, target):
+        """Hard-link target to an identical existing image, False where the file system can't"""
+        temp_target = f"{target}.link"
+        try:
+            if os.path.exists(temp_target):
+                os.unlink(temp_target)
+            os.link(source, temp_target)
+            os.replace(temp_target, target)
+            return True
+        except OSError as e:
+            logging.error(f" linking duplicate icon {os.path.basename(target)}: {e}")
+            return False
+
+    def forget(self, app_id):
+        with self._lock:
+            entry = self._entries.pop(app_id, None)
+            if entry is not None:
+                self._by_hash.get(entry["sha256"], set()).discard(app_id)
+                self._dirty = True
+
+    def refresh_local_size(self, app_id):
+        """Re-read the size of a header that was re-encoded in place, so its validators stay usable"""
+        with self._lock:
+            entry = self._entries.get(app_id)
+            if entry is None:
+                return
+            try:
+                size = os.path.getsize(self.icon_path(app_id))
+            except OSError:
+                return
+            if size != entry["size"]:
+                entry["size"] = size
+                self._dirty = True
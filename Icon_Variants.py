@@ -0,0 +1,140 @@
+# Icon_Variants.py
+import os
+import re
+import tempfile
+from time import perf_counter
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QImage, QImageReader
+from Config import TABLE_ICON_WIDTH, TABLE_ICON_HEIGHT
+
+# Display variants by width, twice the size they are shown at so they stay sharp on high-DPI screens.
+# "small" is the table icon, "medium" the edit dialog's. Heights follow the header's aspect ratio
+ICON_VARIANTS = {"small": TABLE_ICON_WIDTH * 2, "medium": 230}
+LARGEST_VARIANT = max(ICON_VARIANTS, key=ICON_VARIANTS.get)
+DEFAULT_QUALITY = 85
+ORIGINAL_ICON_PATTERN = re.compile(r"^(\d+)\.jpg$")
+
+def variant_path(icon_path, variant):
+    """{app_id}.jpg -> {app_id}.{variant}.jpg next to it"""
+    folder, name = os.path.split(icon_path)
+    return os.path.join(folder, f"{name.split('.')[0]}.{variant}.jpg")
+
+def display_icon_path(icon_path, variant):
+    """The variant of icon_path to load for display, icon_path itself if there is none"""
+    path = variant_path(icon_path, variant)
+    return path if os.path.exists(path) else icon_path
+
+def save_image_atomic(image, path, quality):
+    """
+    Returns:
+        Size of the written file in bytes
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+    os.close(fd)
+    try:
+        if not image.save(temp_path, "JPG", quality):
+            raise OSError(f"Couldn't encode {os.path.basename(path)}")
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+    return os.path.getsize(path)
+
+def needs_variants(icon_path, keep_original=True):
+    paths = [variant_path(icon_path, variant) for variant in ICON_VARIANTS if keep_original or variant != LARGEST_VARIANT]
+    if any(not os.path.exists(path) for path in paths):
+        return True
+    # A header replaced after its variants were written. Only comparable while the header is kept as downloaded,
+    # re-encoding it below makes it newer than its variants
+    if keep_original and any(os.path.getmtime(path) < os.path.getmtime(icon_path) for path in paths):
+        return True
+    # Without the original, the file itself becomes the largest variant
+    return not keep_original and QImageReader(icon_path).size().width() > ICON_VARIANTS[LARGEST_VARIANT]
+
+def ensure_icon_variants(icon_path, keep_original=True, quality=DEFAULT_QUALITY, force=False):
+    """
+    Ingest step for a downloaded header: write the display variants next to it. Without keep_original the header
+    itself is re-encoded at the largest variant's size, so every path that points at it stays valid.
+    Safe to call again, images that are already done are left alone unless force is set, which the fetch does for
+    headers it just replaced (a hard link to another game's header keeps that file's older mtime).
+    Needs no QApplication, so it runs in any thread.
+
+    Returns:
+        Tuple of (bytes before, bytes after) of the header and its variants, None if nothing had to be done
+    """
+    if not force and not needs_variants(icon_path, keep_original):
+        return None
+    paths = [icon_path] + [variant_path(icon_path, variant) for variant in ICON_VARIANTS]
+    bytes_before = sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+
+    image = QImage(icon_path)
+    if image.isNull():
+        return None
+    for variant, width in ICON_VARIANTS.items():
+        scaled = image.scaledToWidth(width, Qt.SmoothTransformation) if image.width() > width else image
+        if keep_original or variant != LARGEST_VARIANT:
+            save_image_atomic(scaled, variant_path(icon_path, variant), quality)
+        elif image.width() > width:
+            save_image_atomic(scaled, icon_path, quality)
+            stale_path = variant_path(icon_path, variant)
+            if os.path.exists(stale_path):
+                os.unlink(stale_path)
+
+    bytes_after = sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+    return bytes_before, bytes_after
+
+def load_seconds(path, width=TABLE_ICON_WIDTH, height=TABLE_ICON_HEIGHT):
+    """Time to decode an image and scale it for the table, the work every row does when it is drawn"""
+    start = perf_counter()
+    QImage(path).scaled(width, height, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+    return perf_counter() - start
+
+def migrate_icons(icons_folder, keep_original=True, quality=DEFAULT_QUALITY, icon_store=None, progress=None, is_canceled=None):
+    """
+    Create the display variants for every header already in icons_folder.
+
+    Args:
+        icon_store: IconStore whose validators are updated for re-encoded headers
+        progress: Called with (done, total) after every header
+        is_canceled: Returns True to stop early
+
+    Returns:
+        Report dict with the headers converted, folder bytes before and after and the average table load time
+        of a header before and after
+    """
+    names = sorted(name for name in os.listdir(icons_folder) if ORIGINAL_ICON_PATTERN.match(name))
+    report = {"total": len(names), "converted": 0, "failed": 0, "bytes_before": 0, "bytes_after": 0,
+              "load_ms_before": 0.0, "load_ms_after": 0.0}
+    load_before = load_after = 0.0
+    for index, name in enumerate(names):
+        if is_canceled and is_canceled():
+            break
+        icon_path = os.path.join(icons_folder, name)
+        try:
+            if needs_variants(icon_path, keep_original):
+                before = load_seconds(icon_path)
+                sizes = ensure_icon_variants(icon_path, keep_original, quality)
+                if sizes is None:
+                    report["failed"] += 1
+                else:
+                    load_before += before
+                    load_after += load_seconds(display_icon_path(icon_path, "small"))
+                    report["converted"] += 1
+                    report["bytes_before"] += sizes[0]
+                    report["bytes_after"] += sizes[1]
+                    if icon_store is not None:
+                        icon_store.refresh_local_size(ORIGINAL_ICON_PATTERN.match(name).group(1))
+        except OSError:
+            report["failed"] += 1
+        if progress:
+            progress(index + 1, len(names))
+
+    if report["converted"]:
+        report["load_ms_before"] = round(load_before * 1000 / report["converted"], 2)
+        report["load_ms_after"] = round(load_after * 1000 / report["converted"], 2)
+    if icon_store is not None:
+        icon_store.save()
+    return report
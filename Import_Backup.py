@@ -1,15 +1,161 @@
 # SteamKM_Import_Export.py
-import re
-import uuid
 import json
-import logging
 import shutil
-import os
 from pathlib import Path
-from PySide6.QtWidgets import QFileDialog, QMessageBox, QInputDialog, QLineEdit, QDialogButtonBox, QDialog
+from PySide6.QtWidgets import (QFileDialog, QMessageBox, QInputDialog, QDialogButtonBox, QDialog, QVBoxLayout, QLabel,
+                               QProgressBar, QPushButton)
+from PySide6.QtCore import Qt, QThread, Signal
 from CustomWidgets import create_scrollable_message_dialog
 from Encryption import PasswordDialog
-from Config import GAME_PICTURES_DIR
+from Library_Formats import (parse_input_line_global, merge_games_from_txt, merge_games_data, read_encrypted_backup, import_file_type,
+                             commit_staged_games, export_games, ImportCanceled)
+
+class ImportThread(QThread):
+    """
+    Reads an import file into a staging dict off the UI thread, decrypting .enc files here too. The library
+    itself is only changed by commit_staged_games once the thread has finished.
+    """
+    progress_signal = Signal(int, int)
+    status_signal = Signal(str)
+    finished_signal = Signal(dict)
+
+    def __init__(self, import_file, file_type, games, categories, password=None):
+        super().__init__()
+        self.import_file = import_file
+        self.file_type = file_type
+        # Snapshot the keys and categories here, on the UI thread, so the thread never reads the library
+        self.known_keys = {game["key"] for game in games.values()}
+        self.categories = list(categories)
+        self.password = password
+
+    def run(self):
+        staged_games = {}
+        result = {"games": staged_games, "categories": self.categories, "invalid_lines": [], "invalid_count": 0}
+        merge_args = dict(known_keys=self.known_keys, progress=self.progress_signal.emit, is_canceled=self.isInterruptionRequested)
+        try:
+            if self.file_type == "txt":
+                _, _, _, result["invalid_lines"], result["invalid_count"] = merge_games_from_txt(
+                    self.import_file, staged_games, self.categories, **merge_args)
+            else:
+                if self.file_type == "enc":
+                    self.status_signal.emit("Decrypting...")
+                    imported_data = read_encrypted_backup(self.import_file, self.password)
+                    if imported_data is None:
+                        result["wrong_password"] = True
+                        self.finished_signal.emit(result)
+                        return
+                else:
+                    self.status_signal.emit("Reading...")
+                    with open(self.import_file, 'r') as f:
+                        imported_data = json.load(f)
+                self.status_signal.emit("Merging...")
+                merge_games_data(imported_data, staged_games, self.categories, **merge_args)
+        except ImportCanceled:
+            result["canceled"] = True
+        except Exception as e:
+            result["error"] = f"{self.file_type.upper()}: {e}"
+        self.finished_signal.emit(result)
+
+class ImportProgressDialog(QDialog):
+    """Runs an ImportThread behind a progress bar, Cancel stops it at the next check without changing the library"""
+    def __init__(self, parent, import_file, file_type, password=None):
+        super().__init__(parent)
+        self.setWindowTitle("Importing Games")
+        self.setMinimumWidth(400)
+        self.result_data = None
+        layout = QVBoxLayout(self)
+        self.status_label = QLabel(f"Reading {import_file.name}...")
+        layout.addWidget(self.status_label)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 0)
+        layout.addWidget(self.progress_bar)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.reject)
+        layout.addWidget(self.cancel_button, alignment=Qt.AlignRight)
+
+        self.import_thread = ImportThread(import_file, file_type, parent.games, parent.categories, password)
+        self.import_thread.progress_signal.connect(self.update_progress)
+        self.import_thread.status_signal.connect(self.status_label.setText)
+        self.import_thread.finished_signal.connect(self.import_finished)
+        self.import_thread.start()
+
+    def update_progress(self, done, total):
+        if total:
+            self.progress_bar.setRange(0, total)
+            self.progress_bar.setValue(done)
+        else:
+            self.progress_bar.setRange(0, 0)
+
+    def import_finished(self, result):
+        self.import_thread.wait()
+        self.result_data = result
+        # A cancel that came in after the last check still discards the staged games
+        if result.get("canceled") or self.import_thread.isInterruptionRequested():
+            super().reject()
+        else:
+            self.accept()
+
+    def reject(self):
+        # Also reached through Escape and the close button, the dialog closes once the thread has stopped
+        if self.import_thread.isRunning():
+            self.import_thread.requestInterruption()
+            self.status_label.setText("Canceling...")
+            self.cancel_button.setEnabled(False)
+        else:
+            super().reject()
+
+def run_import_dialog(main_window, import_file, file_type):
+    """
+    Returns:
+        The ImportThread result, or None if the import was canceled or no password was accepted
+    """
+    if file_type != "enc":
+        dialog = ImportProgressDialog(main_window, import_file, file_type)
+        return dialog.result_data if dialog.exec() == QDialog.Accepted else None
+
+    max_attempts = 3
+    for attempt in range(max_attempts):
+        password_dialog = PasswordDialog(
+            main_window,
+            "Importing Encrypted File",
+            f"Enter Imported File Password (Attempt {attempt + 1} of {max_attempts}):"
+        )
+        if password_dialog.exec() != QDialog.Accepted:
+            return None
+        password = password_dialog.get_password()
+        if not password:
+            QMessageBox.warning(main_window, "Error", f"Empty Password ({attempt + 1}/{max_attempts} attempts used)")
+            continue
+
+        # The key derivation takes a moment, so it runs in the thread along with the merge
+        dialog = ImportProgressDialog(main_window, import_file, file_type, password)
+        if dialog.exec() != QDialog.Accepted:
+            return None
+        if not dialog.result_data.get("wrong_password"):
+            return dialog.result_data
+        QMessageBox.warning(main_window, "Error",
+                            f"Invalid password or corrupted data. ({attempt + 1}/{max_attempts} attempts used)")
+    raise RuntimeError(f"ENC: Failed after {max_attempts} attempts")
+
+def show_invalid_lines(main_window, invalid_lines, invalid_count):
+    error_text = []
+    for line, error in invalid_lines:
+        error_text.append(f"Line: {line.rstrip()}")
+        error_text.append(f"Error: {error}")
+        error_text.append("") # Add empty line for spacing
+    if invalid_count > len(invalid_lines):
+        error_text.append(f"...and {invalid_count - len(invalid_lines)} more lines with problems")
+
+    # Use scrollable dialog for showing import problems
+    error_dialog, _ = create_scrollable_message_dialog(
+        parent=main_window,
+        title="Imported TXT File Problem",
+        message="The following lines had problems:",
+        content=error_text,
+        min_width=500,
+        min_height=250
+    )
+    error_dialog.exec()
 
 def import_games(main_window):
     file_paths, _ = QFileDialog.getOpenFileNames(
@@ -23,20 +169,25 @@ def import_games(main_window):
 
     import_file = Path(file_paths[0])
     try:
-        if import_file.suffix.lower() == '.json' or (import_file.suffix.lower() == '.bak' and import_file.stem.endswith('.json')):
-            added_count, added_titles, added_ids = merge_imported_games_from_json(import_file, main_window.games, main_window.categories)
-        elif import_file.suffix.lower() == '.txt':
-            added_count, added_titles, added_ids = merge_imported_games_from_txt(import_file, main_window.games, main_window.categories, main_window)
-        elif import_file.suffix.lower() == '.enc' or (import_file.suffix.lower() == '.bak' and import_file.stem.endswith('.enc')):
-            added_count, added_titles, added_ids = merge_imported_games_from_enc(
-                import_file, main_window.games, main_window.categories, main_window.encryption_manager
-            )
-            # Check for import cancellation
-            if added_count == -1:  # Special code for cancellation
-                return  # Just return without showing any error message
-        else:
+        file_type = import_file_type(import_file)
+        if file_type is None:
             raise ValueError("Unsupported file type")
 
+        result = run_import_dialog(main_window, import_file, file_type)
+        if result is None:
+            return  # Canceled, the library wasn't touched
+        if "error" in result:
+            raise RuntimeError(result["error"])
+        if result["invalid_lines"]:
+            show_invalid_lines(main_window, result["invalid_lines"], result["invalid_count"])
+
+        # One merge into the library and one save for the whole import
+        added_ids = commit_staged_games(result["games"], main_window.games)
+        for category in result["categories"]:
+            if category not in main_window.categories:
+                main_window.categories.append(category)
+        added_count = len(added_ids)
+
         if added_count > 0:
             main_window.save_key_data()
             main_window.refresh_game_list()
@@ -46,7 +197,7 @@ def import_games(main_window):
                 parent=main_window,
                 title="Import Success",
                 message=f"Successfully imported {added_count} game(s):",
-                content=added_titles,
+                content=[main_window.games[id]["title"] for id in added_ids],
                 buttons=QDialogButtonBox.Yes | QDialogButtonBox.No,
                 footer_text="Would you like to fetch Steam data for these games now?"
             )
@@ -78,260 +229,6 @@ def import_games(main_window):
         )
         error_dialog.exec()
 
-def parse_input_line_global(line): # Robust parsing with auto-correction
-    line = line.strip()
-    if not line:
-        return None, None, "Line is empty"
-
-    # 1. Try standard format: Title SPACE KEY (with dashes) - No correction needed
-    standard_match = re.match(r'(.+?)\s+([A-Za-z0-9]{5}-[A-Za-z0-9]{5}-[A-Za-z0-9]{5})$', line)
-    if standard_match:
-        title, key = standard_match.groups()
-        title = title.strip()
-        if title.endswith(':'):
-            title = title[:-1]
-        return title, key.upper(), None # No error, standard format
-
-    # 2. Try "no space" format BUT with dashed key: TitleKEY-DASHED - Auto-correct space
-    no_space_dashed_key_match = re.match(r'(.+?)([A-Za-z0-9]{5}-[A-Za-z0-9]{5}-[A-Za-z0-9]{5})$', line)
-    if no_space_dashed_key_match:
-        title_part, key = no_space_dashed_key_match.groups()
-        return title_part.strip(), key.upper(), "Auto-corrected format by adding a space between title and key"
-
-    # 3. Try "no space" format: TitleKEY (with key as 15 chars no dash) - Auto-correct space and dashes
-    no_space_match = re.match(r'(.+?)([A-Za-z0-9]{15})$', line)
-    if no_space_match:
-        title_part, key_part = no_space_match.groups()
-        formatted_key = f"{key_part[:5]}-{key_part[5:10]}-{key_part[10:]}".upper()
-        return title_part.strip(), formatted_key, "Auto-corrected format by adding space and dashes, and key to uppercase"
-
-    # 4. Lenient key match (for "long key" or "extra dash") - Auto-correct by cleaning key
-    lenient_key_match = re.match(r'(.+?)\s+([A-Za-z0-9]{5}-[A-Za-z0-9]{5}-[A-Za-z0-9]{5}.*)$', line)
-    if lenient_key_match:
-        title_part, key_part = lenient_key_match.groups()
-        key_candidate = "".join(filter(str.isalnum, key_part))[:15]
-        if len(key_candidate) == 15:
-            formatted_key = f"{key_candidate[:5]}-{key_candidate[5:10]}-{key_candidate[10:]}".upper()
-            return title_part.strip(), formatted_key, "Auto-corrected key with extra characters by cleaning and formatting"
-
-    # 5. Check for key only line (dashed or no-dash) - Title missing error
-    key_only_dashed = re.fullmatch(r"[A-Za-z0-9]{5}-[A-Za-z0-9]{5}-[A-Za-z0-9]{5}$", line)
-    key_only_nodash = re.fullmatch(r"[A-Za-z0-9]{15}$", line)
-    if key_only_dashed or key_only_nodash:
-        return None, None, "Game title is missing"
-
-    # 6. Check for key pattern present but unclear title - Unclear format error (more specific than just "invalid")
-    key_pattern_present = re.search(r"([A-Za-z0-9]{5}-[A-Za-z0-9]{5}-[A-Za-z0-9]{5}|[A-Za-z0-9]{15})", line)
-    if key_pattern_present:
-        return None, None, "Couldn't clearly identify title. Ensure format is 'Title KEY'"
-
-    # 7. Generic error - No key found at all
-    return None, None, "Didn't find a valid key"
-
-def _add_game(title, code, category, games, categories, added_titles, added_ids, app_id=None, icon_path=None, review_data=None, developer=None):
-    if category and category not in categories:
-        categories.append(category)
-    if title and code and not any(game["key"] == code for game in games.values()):
-        unique_id = str(uuid.uuid4())
-        game_data = {
-            "title": title,
-            "key": code,
-            "category": category if category in categories else "New"
-        }
-        
-        # Add Steam data if provided
-        if app_id:
-            game_data["app_id"] = app_id
-        if icon_path and os.path.exists(icon_path):
-            game_data["icon_path"] = icon_path
-        if review_data:
-            game_data["review_data"] = review_data
-        if developer:
-            game_data["developer"] = developer
-
-        games[unique_id] = game_data
-        added_titles.append(title)
-        added_ids.append(unique_id)
-        return 1
-    return 0
-
-def merge_imported_games_from_txt(import_file, games, categories, main_window):
-    try:
-        with open(import_file, 'r') as f:
-            lines = f.readlines()
-
-        added_count = 0
-        added_titles = []
-        added_ids = []
-        invalid_lines = []
-
-        for line in lines:
-            title, key, error_message = parse_input_line_global(line) # Use global parse function
-            if title and key:
-                added_count += _add_game(title, key, "New", games, categories, added_titles, added_ids)
-                if error_message:
-                    logging.info(f"Line auto-corrected during import: '{line.strip()}'. Added as '{title} {key}'. Message: {error_message}") # Optional logging for import auto-correction
-            else:
-                invalid_lines.append((line, error_message if error_message else "Invalid format")) # Capture lines with errors
-
-        if invalid_lines:
-            error_text = []
-            for line, error in invalid_lines:
-                error_text.append(f"Line: {line.rstrip()}")
-                error_text.append(f"Error: {error}")
-                error_text.append("") # Add empty line for spacing
-            
-            # Use scrollable dialog for showing import problems
-            error_dialog, _ = create_scrollable_message_dialog(
-                parent=main_window,
-                title="Imported TXT File Problem",
-                message="The following lines had problems:",
-                content=error_text,
-                min_width=500,
-                min_height=250
-            )
-            error_dialog.exec()
-
-        return added_count, added_titles, added_ids
-    except Exception as e:
-        raise RuntimeError(f"TXT: {str(e)}")
-
-def merge_imported_games_from_json(import_file, games, categories):
-    try:
-        with open(import_file, 'r') as f:
-            imported_data = json.load(f)
-
-        added_count = 0
-        added_titles = []
-        added_ids = []
-        
-        games_list = imported_data if isinstance(imported_data, list) else imported_data.values()
-        for game in games_list:
-            # Extract potential Steam data
-            app_id = game.get("app_id")
-            icon_path = game.get("icon_path")
-            review_data = game.get("review_data")
-            developer = game.get("developer")
-            
-            # If icon_path exists but is from a different location, adjust it
-            if icon_path and os.path.exists(icon_path):
-                # Keep using the existing icon
-                pass
-            elif app_id:
-                # Check if we have this app_id's icon locally
-                local_icon = os.path.join(GAME_PICTURES_DIR, f"{app_id}.jpg")
-                if os.path.exists(local_icon):
-                    icon_path = local_icon
-
-            added_count += _add_game(
-                game.get("title"),
-                game.get("key" if isinstance(imported_data, dict) else "code"),
-                game.get("category", "New"),
-                games,
-                categories,
-                added_titles,
-                added_ids,
-                app_id,
-                icon_path,
-                review_data,
-                developer
-            )
-           
-        return added_count, added_titles, added_ids
-    except Exception as e:
-        raise RuntimeError(f"JSON: {str(e)}")
-
-def merge_imported_games_from_enc(import_file, games, categories, encryption_manager):
-    try:
-        max_attempts = 3
-        attempt_count = 0
-        
-        # Get the theme from main_window (parent of encryption_manager)
-        while attempt_count < max_attempts:
-            password_dialog = PasswordDialog(
-                encryption_manager.main_window,
-                "Importing Encrypted File",
-                f"Enter Imported File Password (Attempt {attempt_count + 1} of {max_attempts}):"
-            )
-            
-            result = password_dialog.exec()
-            if result != QDialog.Accepted:
-                return -1, [], []  # Return -1 to indicate cancellation
-                
-            password = password_dialog.get_password()
-            
-            if not password:
-                QMessageBox.warning(encryption_manager.main_window, "Error", 
-                                   f"Empty Password ({attempt_count + 1}/{max_attempts} attempts used)")
-                attempt_count += 1
-                continue
-
-            try:
-                encrypted_text = import_file.read_text()
-                decrypted_data = encryption_manager.decrypt_data(encrypted_text, password)
-                
-                if decrypted_data is None:
-                    QMessageBox.warning(encryption_manager.main_window, "Error", 
-                                       f"Invalid password or corrupted data. ({attempt_count + 1}/{max_attempts} attempts used)")
-                    attempt_count += 1
-                    continue
-                
-                # Try to parse the JSON to validate it
-                imported_data = json.loads(decrypted_data)
-                break  # Password was correct and JSON is valid - exit the loop
-                
-            except json.JSONDecodeError:
-                QMessageBox.warning(encryption_manager.main_window, "Error", 
-                                   f"Invalid password - could not decode file. ({attempt_count + 1}/{max_attempts} attempts used)")
-                attempt_count += 1
-            except Exception as e:
-                QMessageBox.warning(encryption_manager.main_window, "Error", 
-                                   f"Error decrypting file: {str(e)} ({attempt_count + 1}/{max_attempts} attempts used)")
-                attempt_count += 1
-        
-        else:  # This runs if the while loop completes without a break
-            raise RuntimeError(f"Failed after {max_attempts} attempts")
-        
-        added_count = 0
-        added_titles = []
-        added_ids = []
-        
-        games_list = imported_data if isinstance(imported_data, list) else imported_data.values()
-        for game in games_list:
-            # Extract potential Steam data
-            app_id = game.get("app_id")
-            icon_path = game.get("icon_path")
-            review_data = game.get("review_data")
-            
-            # If icon_path exists but is from a different location, adjust it
-            if icon_path and os.path.exists(icon_path):
-                # Keep using the existing icon
-                pass
-            elif app_id:
-                # Check if we have this app_id's icon locally
-                local_icon = os.path.join(GAME_PICTURES_DIR, f"{app_id}.jpg")
-                if os.path.exists(local_icon):
-                    icon_path = local_icon
-
-            added_count += _add_game(
-                game.get("title"),
-                game.get("key" if isinstance(imported_data, dict) else "code"),
-                game.get("category", "New"),
-                games,
-                categories,
-                added_titles,
-                added_ids,
-                app_id,
-                icon_path,
-                review_data,
-                game.get("developer")
-            )
-
-        return added_count, added_titles, added_ids
-        
-    except Exception as e:
-        raise RuntimeError(f"ENC: {str(e)}")
-
 def manual_game_data_backup(main_window):
     backup_types = ["Regular Json (Decrypted)", "Encrypted", "Regular Text"]
     backup_type, ok = QInputDialog.getItem(main_window, "Backup Type", "Select backup type:", backup_types, 0, False)
@@ -347,21 +244,12 @@ def manual_game_data_backup(main_window):
         file_name += f".{ext}"
 
     try:
-        if backup_type == "Regular Json (Decrypted)":
-            decrypted_data = main_window.encryption_manager.load_data()
-            if decrypted_data:
-                with open(file_name, "w") as f:
-                    json.dump(json.loads(decrypted_data), f, indent=4)
-            else:
-                raise ValueError("Could not decrypt data for backup")
-        elif backup_type == "Encrypted":
+        if backup_type == "Encrypted":
             shutil.copy(main_window.encryption_manager.encrypted_data_file, file_name)
-        elif backup_type == "Regular Text":
+        else:
             decrypted_data = main_window.encryption_manager.load_data()
             if decrypted_data:
-                with open(file_name, "w") as f:
-                    for unique_id, game_data in json.loads(decrypted_data).items():
-                        f.write(f"{game_data['title']}: {game_data['key']}\n")
+                export_games(json.loads(decrypted_data), file_name, ext)
             else:
                 raise ValueError("Could not decrypt data for backup")
                 
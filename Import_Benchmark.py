@@ -0,0 +1,149 @@
+# Import_Benchmark.py
+import os
+import re
+import random
+import argparse
+import tempfile
+import tracemalloc
+from time import perf_counter
+from Library_Formats import parse_input_line_global, merge_games_from_txt
+
+WORDS = ("Half", "Life", "Portal", "Dark", "Souls", "Stardew", "Valley", "Hollow", "Knight", "Factorio", "Civilization",
+         "Terraria", "Celeste", "Hades", "Doom", "Eternal", "Witcher", "Wild", "Hunt", "Edition", "Remastered", "II", "3")
+KEY_CHARACTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+
+def legacy_parse_input_line(line):
+    """The line parser before the combined pattern, one regex call per format. Only kept to check and time against"""
+    line = line.strip()
+    if not line:
+        return None, None, "Line is empty"
+    standard_match = re.match(r'(.+?)\s+([A-Za-z0-9]{5}-[A-Za-z0-9]{5}-[A-Za-z0-9]{5})$', line)
+    if standard_match:
+        title, key = standard_match.groups()
+        title = title.strip()
+        if title.endswith(':'):
+            title = title[:-1]
+        return title, key.upper(), None
+    no_space_dashed_key_match = re.match(r'(.+?)([A-Za-z0-9]{5}-[A-Za-z0-9]{5}-[A-Za-z0-9]{5})$', line)
+    if no_space_dashed_key_match:
+        title_part, key = no_space_dashed_key_match.groups()
+        return title_part.strip(), key.upper(), "Auto-corrected format by adding a space between title and key"
+    no_space_match = re.match(r'(.+?)([A-Za-z0-9]{15})$', line)
+    if no_space_match:
+        title_part, key_part = no_space_match.groups()
+        formatted_key = f"{key_part[:5]}-{key_part[5:10]}-{key_part[10:]}".upper()
+        return title_part.strip(), formatted_key, "Auto-corrected format by adding space and dashes, and key to uppercase"
+    lenient_key_match = re.match(r'(.+?)\s+([A-Za-z0-9]{5}-[A-Za-z0-9]{5}-[A-Za-z0-9]{5}.*)$', line)
+    if lenient_key_match:
+        title_part, key_part = lenient_key_match.groups()
+        key_candidate = "".join(filter(str.isalnum, key_part))[:15]
+        if len(key_candidate) == 15:
+            formatted_key = f"{key_candidate[:5]}-{key_candidate[5:10]}-{key_candidate[10:]}".upper()
+            return title_part.strip(), formatted_key, "Auto-corrected key with extra characters by cleaning and formatting"
+    key_only_dashed = re.fullmatch(r"[A-Za-z0-9]{5}-[A-Za-z0-9]{5}-[A-Za-z0-9]{5}$", line)
+    key_only_nodash = re.fullmatch(r"[A-Za-z0-9]{15}$", line)
+    if key_only_dashed or key_only_nodash:
+        return None, None, "Game title is missing"
+    key_pattern_present = re.search(r"([A-Za-z0-9]{5}-[A-Za-z0-9]{5}-[A-Za-z0-9]{5}|[A-Za-z0-9]{15})", line)
+    if key_pattern_present:
+        return None, None, "Couldn't clearly identify title. Ensure format is 'Title KEY'"
+    return None, None, "Didn't find a valid key"
+
+def _key(rng, dashes=True, lower=False):
+    key = "".join(rng.choice(KEY_CHARACTERS) for _ in range(15))
+    if lower:
+        key = key.lower()
+    return f"{key[:5]}-{key[5:10]}-{key[10:]}" if dashes else key
+
+def _title(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4)))
+
+# Line shapes of real key dumps with how often they appear, valid ones first
+LINE_SHAPES = (
+    (40, lambda rng: f"{_title(rng)} {_key(rng)}"),
+    (10, lambda rng: f"{_title(rng)}: {_key(rng)}"),
+    (6, lambda rng: f"{_title(rng)}{_key(rng)}"),
+    (6, lambda rng: f"{_title(rng)}{_key(rng, dashes=False)}"),
+    (5, lambda rng: f"{_title(rng)}\t{_key(rng, lower=True)}"),
+    (5, lambda rng: f"{_title(rng)} {_key(rng)}-{rng.randint(10, 99)} (gift)"),
+    (6, lambda rng: _key(rng, dashes=rng.random() < 0.5)),
+    (6, lambda rng: f"{_key(rng)} {_title(rng)}"),
+    (8, lambda rng: f"{_title(rng)} (no key yet)"),
+    (4, lambda rng: ""),
+    (4, lambda rng: f"{_title(rng)} {'x' * rng.randint(200, 2000)} {_key(rng)}"),
+)
+
+def write_corpus(path, line_count, seed=0):
+    """Write line_count lines of mixed valid and malformed "Title KEY" lines to path"""
+    rng = random.Random(seed)
+    weights = [weight for weight, _ in LINE_SHAPES]
+    shapes = [shape for _, shape in LINE_SHAPES]
+    with open(path, "w") as f:
+        for shape in rng.choices(shapes, weights, k=line_count):
+            f.write(shape(rng) + "\n")
+
+def _time_parser(path, parse):
+    start = perf_counter()
+    with open(path, "r") as f:
+        for line in f:
+            parse(line)
+    return perf_counter() - start
+
+def _peak_memory(function):
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def run_benchmark(path):
+    """Check the combined parser against the legacy one on every line of path, then time both and the full import"""
+    line_count = 0
+    with open(path, "r") as f:
+        for line in f:
+            line_count += 1
+            expected = legacy_parse_input_line(line)
+            if parse_input_line_global(line) != expected:
+                raise AssertionError(f"Parsers disagree on line {line_count}: {line.rstrip()!r}")
+    size_mb = os.path.getsize(path) / 1048576
+    print(f"{line_count} lines ({size_mb:.1f} MB), both parsers agree on every line")
+
+    legacy_seconds = _time_parser(path, legacy_parse_input_line)
+    combined_seconds = _time_parser(path, parse_input_line_global)
+    print(f"Legacy parser: {legacy_seconds:.2f}s ({line_count / legacy_seconds:,.0f} lines/s)")
+    print(f"Combined pattern: {combined_seconds:.2f}s ({line_count / combined_seconds:,.0f} lines/s, {legacy_seconds / combined_seconds:.1f}x)")
+
+    games = {}
+    start = perf_counter()
+    added_count, _, _, _, invalid_count = merge_games_from_txt(path, games, ["New"])
+    print(f"Import: {perf_counter() - start:.2f}s, {added_count} games added, {invalid_count} lines with problems")
+
+    def read_all():
+        with open(path, "r") as f:
+            f.readlines()
+    streaming_peak = _peak_memory(lambda: _time_parser(path, parse_input_line_global))
+    readlines_peak = _peak_memory(read_all)
+    print(f"Peak memory parsing the file: {streaming_peak / 1024:.0f} KB streamed, {readlines_peak / 1048576:.1f} MB with readlines()")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the TXT import on a synthetic key dump")
+    parser.add_argument("--lines", type=int, default=200000, help="Lines in the generated corpus")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--corpus", metavar="PATH", help="Keep the generated corpus here, or benchmark this file if it exists")
+    args = parser.parse_args()
+
+    if args.corpus and os.path.exists(args.corpus):
+        run_benchmark(args.corpus)
+        return
+    path = args.corpus or os.path.join(tempfile.mkdtemp(), "key_dump.txt")
+    write_corpus(path, args.lines, args.seed)
+    try:
+        run_benchmark(path)
+    finally:
+        if not args.corpus:
+            os.unlink(path)
+            os.rmdir(os.path.dirname(path))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+# Library_Formats.py
+import re
+import uuid
+import json
+import logging
+import os
+from Config import GAME_PICTURES_DIR
+from Vault import encrypt_data, decrypt_data
+
+EXPORT_FORMATS = ("json", "txt", "enc")
+MAX_REPORTED_LINES = 1000  # Problem lines kept for the import report, any beyond are only counted
+PROGRESS_INTERVAL = 2000  # Lines or games between progress callbacks and cancel checks
+
+_KEY = r"[A-Za-z0-9]{5}-[A-Za-z0-9]{5}-[A-Za-z0-9]{5}"
+_KEY_NO_DASHES = r"[A-Za-z0-9]{15}"
+KEY_LENGTH = 17
+# Keys sit at the end of almost every line, so lines are classified by their last characters with
+# fullmatch(line, pos) instead of scanning for a title first. Only lines that don't end in a key are searched
+KEY_PATTERN = re.compile(_KEY)
+KEY_NO_DASHES_PATTERN = re.compile(_KEY_NO_DASHES)
+SPACED_KEY_PATTERN = re.compile(rf"\s+({_KEY})")
+ANY_KEY_PATTERN = re.compile(rf"{_KEY}|{_KEY_NO_DASHES}")
+
+class ImportCanceled(Exception):
+    """Raised out of a merge when its is_canceled callback returns True"""
+
+def format_key(key):
+    """15 key characters as the dashed, uppercase XXXXX-XXXXX-XXXXX form"""
+    return f"{key[:5]}-{key[5:10]}-{key[10:]}".upper()
+
+def parse_input_line_global(line): # Robust parsing with auto-correction
+    """
+    Returns:
+        Tuple of (title, key, message): the message says what was auto-corrected, or why the line couldn't be read
+    """
+    line = line.strip()
+    if not line:
+        return None, None, "Line is empty"
+    length = len(line)
+
+    # 1. Title SPACE KEY (with dashes) - No correction needed. 2. TitleKEY-DASHED - Auto-correct space
+    if length >= KEY_LENGTH and KEY_PATTERN.fullmatch(line, length - KEY_LENGTH):
+        if length == KEY_LENGTH:
+            return None, None, "Game title is missing"
+        key = line[-KEY_LENGTH:].upper()
+        title = line[:-KEY_LENGTH]
+        if not title[-1].isspace():
+            return title.strip(), key, "Auto-corrected format by adding a space between title and key"
+        title = title.strip()
+        if title.endswith(':'):
+            title = title[:-1]
+        return title, key, None # No error, standard format
+
+    # 3. TitleKEY (with key as 15 chars no dash) - Auto-correct space and dashes
+    if length >= 15 and KEY_NO_DASHES_PATTERN.fullmatch(line, length - 15):
+        if length == 15:
+            return None, None, "Game title is missing"
+        return line[:-15].strip(), format_key(line[-15:]), "Auto-corrected format by adding space and dashes, and key to uppercase"
+
+    # 4. Lenient key match (for "long key" or "extra dash") - Auto-correct by cleaning key
+    lenient_key_match = SPACED_KEY_PATTERN.search(line)
+    if lenient_key_match:
+        return line[:lenient_key_match.start()].strip(), lenient_key_match.group(1).upper(), "Auto-corrected key with extra characters by cleaning and formatting"
+
+    # 5. Key pattern present but unclear title - Unclear format error (more specific than just "invalid")
+    if ANY_KEY_PATTERN.search(line):
+        return None, None, "Couldn't clearly identify title. Ensure format is 'Title KEY'"
+
+    # 6. Generic error - No key found at all
+    return None, None, "Didn't find a valid key"
+
+def add_game(title, code, category, games, categories, added_titles, added_ids, app_id=None, icon_path=None, review_data=None, developer=None,
+             known_keys=None):
+    """known_keys is the set of keys games already has, kept up to date so bulk imports don't rescan games for every line"""
+    if category and category not in categories:
+        categories.append(category)
+    if known_keys is None:
+        duplicate = any(game["key"] == code for game in games.values())
+    else:
+        duplicate = code in known_keys
+    if title and code and not duplicate:
+        if known_keys is not None:
+            known_keys.add(code)
+        unique_id = str(uuid.uuid4())
+        game_data = {
+            "title": title,
+            "key": code,
+            "category": category if category in categories else "New"
+        }
+
+        # Add Steam data if provided
+        if app_id:
+            game_data["app_id"] = app_id
+        if icon_path and os.path.exists(icon_path):
+            game_data["icon_path"] = icon_path
+        if review_data:
+            game_data["review_data"] = review_data
+        if developer:
+            game_data["developer"] = developer
+
+        games[unique_id] = game_data
+        added_titles.append(title)
+        added_ids.append(unique_id)
+        return 1
+    return 0
+
+def import_file_type(import_file):
+    """"txt", "json" or "enc" for a supported import file, backups (.json.bak, .enc.bak) included, else None"""
+    name = str(import_file).lower()
+    if name.endswith(".txt"):
+        return "txt"
+    if name.endswith((".json", ".json.bak")):
+        return "json"
+    if name.endswith((".enc", ".enc.bak")):
+        return "enc"
+    return None
+
+def _check_canceled(is_canceled):
+    if is_canceled is not None and is_canceled():
+        raise ImportCanceled()
+
+def merge_games_from_txt(import_file, games, categories, known_keys=None, progress=None, is_canceled=None):
+    """
+    Stream a text file of "Title KEY" lines into games. Lines are read one at a time, so memory
+    only grows with the games added, however large the file is.
+
+    Args:
+        known_keys: Keys to treat as duplicates, defaults to the keys in games. Pass the library's keys
+            with an empty games dict to stage an import without touching the library
+        progress: Called with (KB read, file size in KB) every PROGRESS_INTERVAL lines
+        is_canceled: Checked as often as progress, ImportCanceled is raised once it returns True
+    Returns:
+        Tuple of (added count, added titles, added ids, list of (line, error) for the first MAX_REPORTED_LINES
+        lines that couldn't be read, total number of lines that couldn't be read)
+    """
+    added_count = 0
+    added_titles = []
+    added_ids = []
+    invalid_lines = []
+    invalid_count = 0
+    if known_keys is None:
+        known_keys = {game["key"] for game in games.values()}
+    total_kb = os.path.getsize(import_file) // 1024
+    read_chars = 0
+
+    with open(import_file, 'r') as f:
+        for line_number, line in enumerate(f, 1):
+            if line_number % PROGRESS_INTERVAL == 0:
+                _check_canceled(is_canceled)
+                if progress is not None:
+                    progress(min(read_chars // 1024, total_kb), total_kb) # Characters, close enough to bytes for a progress bar
+            read_chars += len(line)
+            title, key, error_message = parse_input_line_global(line) # Use global parse function
+            if title and key:
+                added_count += add_game(title, key, "New", games, categories, added_titles, added_ids, known_keys=known_keys)
+                if error_message:
+                    logging.info(f"Line auto-corrected during import: '{line.strip()}'. Added as '{title} {key}'. Message: {error_message}") # Optional logging for import auto-correction
+            else:
+                invalid_count += 1
+                if len(invalid_lines) < MAX_REPORTED_LINES:
+                    invalid_lines.append((line, error_message if error_message else "Invalid format")) # Capture lines with errors
+    if progress is not None:
+        progress(total_kb, total_kb)
+    return added_count, added_titles, added_ids, invalid_lines, invalid_count
+
+def merge_games_data(imported_data, games, categories, known_keys=None, progress=None, is_canceled=None):
+    """
+    Merge a decoded JSON backup, the library's own dict format or the older list format, into games.
+    known_keys, progress and is_canceled work as in merge_games_from_txt, progress counting games.
+
+    Returns:
+        Tuple of (added count, added titles, added ids)
+    """
+    added_count = 0
+    added_titles = []
+    added_ids = []
+    if known_keys is None:
+        known_keys = {game["key"] for game in games.values()}
+
+    games_list = imported_data if isinstance(imported_data, list) else imported_data.values()
+    total = len(games_list)
+    for index, game in enumerate(games_list):
+        if index % PROGRESS_INTERVAL == 0:
+            _check_canceled(is_canceled)
+            if progress is not None:
+                progress(index, total)
+        # Extract potential Steam data
+        app_id = game.get("app_id")
+        icon_path = game.get("icon_path")
+
+        # If icon_path exists but is from a different location, adjust it
+        if icon_path and os.path.exists(icon_path):
+            # Keep using the existing icon
+            pass
+        elif app_id:
+            # Check if we have this app_id's icon locally
+            local_icon = os.path.join(GAME_PICTURES_DIR, f"{app_id}.jpg")
+            if os.path.exists(local_icon):
+                icon_path = local_icon
+
+        added_count += add_game(
+            game.get("title"),
+            game.get("key" if isinstance(imported_data, dict) else "code"),
+            game.get("category", "New"),
+            games,
+            categories,
+            added_titles,
+            added_ids,
+            app_id,
+            icon_path,
+            game.get("review_data"),
+            game.get("developer"),
+            known_keys=known_keys
+        )
+    if progress is not None:
+        progress(total, total)
+    return added_count, added_titles, added_ids
+
+def commit_staged_games(staged_games, games, known_keys=None):
+    """
+    Move games staged by a merge into the library in one step, skipping keys the library gained since
+    they were staged. Returns the ids that were added.
+    """
+    if known_keys is None:
+        known_keys = {game["key"] for game in games.values()}
+    added_ids = []
+    for game_id, game_data in staged_games.items():
+        if game_data["key"] not in known_keys:
+            known_keys.add(game_data["key"])
+            added_ids.append(game_id)
+    games.update((game_id, staged_games[game_id]) for game_id in added_ids)
+    return added_ids
+
+def read_encrypted_backup(import_file, password):
+    """
+    Returns:
+        The decoded backup, or None if the password is wrong or the file is corrupted
+    """
+    decrypted_data = decrypt_data(import_file.read_text(), password)
+    if decrypted_data is None:
+        return None
+    try:
+        return json.loads(decrypted_data)
+    except json.JSONDecodeError:
+        return None
+
+def export_format(file_name):
+    """The export format matching a file name's extension, None if there is none"""
+    ext = os.path.splitext(str(file_name))[1].lstrip(".").lower()
+    return ext if ext in EXPORT_FORMATS else None
+
+def export_games(games, file_name, fmt, password=None):
+    """Write games to file_name as decrypted JSON, "Title: KEY" text lines, or encrypted with password"""
+    if fmt == "json":
+        with open(file_name, "w") as f:
+            json.dump(games, f, indent=4)
+    elif fmt == "txt":
+        with open(file_name, "w") as f:
+            for unique_id, game_data in games.items():
+                f.write(f"{game_data['title']}: {game_data['key']}\n")
+    elif fmt == "enc":
+        with open(file_name, "w") as f:
+            f.write(encrypt_data(json.dumps(games, indent=4), password))
+    else:
+        raise ValueError(f"Unsupported export format: {fmt}")
@@ -3,7 +3,18 @@ import json
 import sys
 import os, sys
 import weakref
+import multiprocessing
 import logging
+from time import time
+
+# Commands (python Main.py fetch ...) run headless, before any Qt module is loaded
+if __name__ == "__main__" and len(sys.argv) > 1:
+    # Other arguments, like a file opened with the app, still open the window
+    from Command_Line import COMMANDS, main as command_line_main
+    if sys.argv[1] in COMMANDS:
+        multiprocessing.freeze_support()
+        sys.exit(command_line_main(sys.argv[1:]))
+
 from PySide6.QtWidgets import *
 from PySide6.QtGui import QAction, QIcon, QPixmap, QImage, QColor
 from PySide6.QtCore import Qt, QPoint, QTimer, Signal
@@ -16,12 +27,17 @@ from Icons import UPDATE_ICON, CUSTOMIZATION_ICON, CATEGORY_MANAGER_ICON, PLUS_I
 from Config import ConfigManager, CONFIG_FILE_PATH, GAME_PICTURES_DIR, ICON_BUTTON_WIDTH, HORIZONTAL_SPACING, UI_MARGIN, TABLE_ICON_WIDTH, TABLE_ICON_HEIGHT, TABLE_CELL_RADIUS, VERTICAL_SPACING, VERTICAL_SPACING_SMALL, check_old_file_structure, migrate_files
 from Game_Management import edit_selected_games, add_games, remove_selected_games, copy_selected_keys
 from Category_Menu import CategoryManagerDialog
-from Settings_Menu import SettingsMenuDialog
+from Settings_Menu import SettingsMenuDialog, PictureCleanupThread
 from Encryption import EncryptionManager
+from Vault import LibraryLock
 from Import_Backup import import_games, manual_game_data_backup, parse_input_line_global
 from Steam_API import SteamFetchManager, handle_browser_open, get_rating_color, format_rating_text
+from Icon_Variants import display_icon_path
 from UI_Handler import apply_merged_edges
 
+PICTURE_CLEANUP_STARTUP_DELAY_MS = 30000  # Let startup and the update check finish first
+PICTURE_CLEANUP_CHECK_MS = 3600000  # Long sessions check hourly whether a sweep is due
+
 class SteamKeyManager(QMainWindow):
     status_message_label = Signal(str, bool)
 
@@ -61,6 +77,7 @@ class SteamKeyManager(QMainWindow):
         self.steam_manager.set_status_label(self.fetch_status_label)
         self.steam_manager.set_fetch_button(self.fetch_steam_button)
         self._patch_fetch_button_state()
+        self.table_widget.verticalScrollBar().valueChanged.connect(self.steam_manager.schedule_priority_update)
         
         # Apply the merged edges styling based on config
         self.apply_merged_edges_style()
@@ -73,12 +90,48 @@ class SteamKeyManager(QMainWindow):
         self.message_timer = None
         self.auto_update_check = self.config_manager.get("auto_update_check")
 
+        # Sweep unused game pictures in the background once picture_cleanup_interval_days have passed
+        self.picture_cleanup_thread = None
+        self.picture_cleanup_timer = QTimer(self)
+        self.picture_cleanup_timer.timeout.connect(self.run_scheduled_picture_cleanup)
+        self.picture_cleanup_timer.start(PICTURE_CLEANUP_CHECK_MS)
+        QTimer.singleShot(PICTURE_CLEANUP_STARTUP_DELAY_MS, self.run_scheduled_picture_cleanup)
+
+    def run_scheduled_picture_cleanup(self):
+        interval_days = self.config_manager.get("picture_cleanup_interval_days")
+        if not interval_days or time() - self.config_manager.get("last_picture_cleanup") < interval_days * 86400:
+            return
+        if self.picture_cleanup_thread and self.picture_cleanup_thread.isRunning():
+            return
+        if self.steam_manager.is_fetching:
+            return  # Checked again once the fetch has finished, its headers aren't all in the library yet
+        self.picture_cleanup_thread = PictureCleanupThread(self.icons_folder, self.games, self.config_manager.get("picture_quarantine_days"),
+                                                           self.steam_manager.icon_store,
+                                                           protected_app_ids=self.steam_manager.job_store.recorded_app_ids())
+        self.picture_cleanup_thread.finished_signal.connect(self.picture_cleanup_finished)
+        self.picture_cleanup_thread.start()
+
+    def picture_cleanup_finished(self, report):
+        if report.get("canceled"):
+            return  # Runs again on the next check
+        self.config_manager.set("last_picture_cleanup", int(time()))
+        if report:
+            logging.info(f"Picture cleanup: {report['quarantined']} quarantined, {report['deleted']} deleted, "
+                         f"{report['purged']} purged, {report['freed_bytes'] / 1048576:.1f} MB freed, "
+                         f"{report['bytes'] / 1048576:.1f} MB in {report['files']} files before")
+
     def _patch_fetch_button_state(self):
         """Wrap SteamFetchManager.set_fetch_button_state to also enable/disable editing buttons."""
         orig_set_fetch_button_state = self.steam_manager.set_fetch_button_state
         def wrapped(is_fetching):
             orig_set_fetch_button_state(is_fetching)
             self.set_game_editing_enabled(not is_fetching)
+            if is_fetching:
+                # A sweep that is still running would work from a snapshot the fetch is about to change
+                if self.picture_cleanup_thread and self.picture_cleanup_thread.isRunning():
+                    self.picture_cleanup_thread.requestInterruption()
+            else:
+                QTimer.singleShot(PICTURE_CLEANUP_STARTUP_DELAY_MS, self.run_scheduled_picture_cleanup)
         self.steam_manager.set_fetch_button_state = wrapped
 
     def set_game_editing_enabled(self, enabled):
@@ -629,13 +682,20 @@ class SteamKeyManager(QMainWindow):
 
     def open_steam_fetch_menu(self):
         # Check if already fetching
-        if hasattr(self, 'steam_manager') and self.steam_manager.is_fetching:
-            self.steam_manager.cancel_steam_fetch()
-            return
-
         menu = QMenu(self)
-        self.create_menu_action(menu, "Fetch Missing Data", lambda: self.steam_manager.start_steam_fetch(False))
-        self.create_menu_action(menu, "Update Reviews", lambda: self.steam_manager.update_steam_reviews())
+        if hasattr(self, 'steam_manager') and self.steam_manager.is_fetching:
+            pause_text = "Resume Fetch" if self.steam_manager.is_fetch_paused() else "Pause Fetch"
+            self.create_menu_action(menu, pause_text, self.steam_manager.toggle_fetch_pause)
+            self.create_menu_action(menu, "Cancel Fetch", self.steam_manager.cancel_steam_fetch)
+        else:
+            self.create_menu_action(menu, "Fetch Missing Data", lambda: self.steam_manager.start_steam_fetch(False))
+            self.create_menu_action(menu, "Update Reviews", lambda: self.steam_manager.update_steam_reviews())
+            self.create_menu_action(menu, "Update All Reviews", lambda: self.steam_manager.update_steam_reviews(refresh_all=True))
+            self.create_menu_action(menu, "Refresh Icons", self.steam_manager.refresh_icons)
+            self.create_menu_action(menu, "Fill In From Stored Data", self.steam_manager.fill_from_stored_details)
+            menu.addSeparator()
+            self.create_menu_action(menu, "Preview Fetch Plan", lambda: self.steam_manager.start_steam_fetch(False, dry_run=True))
+            self.create_menu_action(menu, "Fetch Diagnostics", self.steam_manager.show_fetch_diagnostics)
         pos = self.fetch_steam_button.mapToGlobal(QPoint(0, self.fetch_steam_button.height()))
         pos.setX(pos.x() - menu.sizeHint().width() + self.fetch_steam_button.width() + 1)
         pos.setY(pos.y() + 4)  # Move the menu down by 4 pixels
@@ -770,49 +830,73 @@ class SteamKeyManager(QMainWindow):
         self.row_to_unique_id = {i: unique_id for i, (unique_id, _) in enumerate(filtered_games)}
 
         for i, (unique_id, data) in enumerate(filtered_games):
-            # Handle icon display
-            has_valid_icon = "icon_path" in data and os.path.exists(data["icon_path"])
-            
-            if has_valid_icon:
-                pixmap = QPixmap(data["icon_path"]).scaled(TABLE_ICON_WIDTH, TABLE_ICON_HEIGHT, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
-                
-                icon_column_label = RoundedImage(self, border_radius=TABLE_CELL_RADIUS, fixed_size=(TABLE_ICON_WIDTH, TABLE_ICON_HEIGHT))
-                icon_column_label.setPixmap(pixmap)
-                
-                # Use a container to center the icon label
-                container = CenteredIconContainer(self)
-                container.setWidget(icon_column_label)
-                self.table_widget.setCellWidget(i, 0, container)
-            else:
-                self.table_widget.removeCellWidget(i, 0)
-                self.table_widget.setItem(i, 0, QTableWidgetItem(""))
-            
-            # Helper function to create table items with common properties
-            def create_item(text, center_align=True):
-                item = QTableWidgetItem(text)
-                item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-                if center_align:
-                    item.setTextAlignment(Qt.AlignCenter)
-                return item
-            
-            # Create items with appropriate data
-            items = [
-                create_item(data["title"], center_align=False),
-                create_item(data["key"] if self.show_keys or unique_id in self.visible_keys else self.censor_key(data["key"])),
-                create_item(data["category"]),
-                create_item(data.get("app_id", "")),
-                create_item(format_rating_text(data.get("review_data", None))),
-                create_item(data.get("developer", ""))
-            ]
+            self.update_game_row(i, unique_id, data)
+
+        if hasattr(self, 'steam_manager'):
+            self.steam_manager.schedule_priority_update()
+
+    def visible_game_ids(self):
+        """Ids of the games in the rows currently scrolled into view"""
+        viewport_height = self.table_widget.viewport().height()
+        first_row = self.table_widget.rowAt(0)
+        last_row = self.table_widget.rowAt(viewport_height - 1)
+        if first_row < 0:
+            return []
+        if last_row < 0:
+            last_row = self.table_widget.rowCount() - 1
+        return [self.row_to_unique_id[row] for row in range(first_row, last_row + 1) if row in self.row_to_unique_id]
+
+    def refresh_game_rows(self, unique_ids):
+        """Redraw only the rows of the given games, keeping the current order and filter"""
+        unique_ids = set(unique_ids)
+        for row, unique_id in self.row_to_unique_id.items():
+            if unique_id in unique_ids and unique_id in self.games:
+                self.update_game_row(row, unique_id, self.games[unique_id])
+
+    def update_game_row(self, i, unique_id, data):
+        # Handle icon display
+        has_valid_icon = "icon_path" in data and os.path.exists(data["icon_path"])
+        
+        if has_valid_icon:
+            pixmap = QPixmap(display_icon_path(data["icon_path"], "small")).scaled(TABLE_ICON_WIDTH, TABLE_ICON_HEIGHT, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
             
-            # Set rating color if available
-            review_data = data.get("review_data", None)
-            if review_data and 'rating_text' in review_data:
-                items[4].setForeground(QColor(get_rating_color(review_data['rating_text'], review_data.get('percentage'))))
+            icon_column_label = RoundedImage(self, border_radius=TABLE_CELL_RADIUS, fixed_size=(TABLE_ICON_WIDTH, TABLE_ICON_HEIGHT))
+            icon_column_label.setPixmap(pixmap)
             
-            # Add all items to table
-            for col, item in enumerate(items, 1):
-                self.table_widget.setItem(i, col, item)
+            # Use a container to center the icon label
+            container = CenteredIconContainer(self)
+            container.setWidget(icon_column_label)
+            self.table_widget.setCellWidget(i, 0, container)
+        else:
+            self.table_widget.removeCellWidget(i, 0)
+            self.table_widget.setItem(i, 0, QTableWidgetItem(""))
+        
+        # Helper function to create table items with common properties
+        def create_item(text, center_align=True):
+            item = QTableWidgetItem(text)
+            item.setFlags(item.flags() & ~Qt.ItemIsEditable)
+            if center_align:
+                item.setTextAlignment(Qt.AlignCenter)
+            return item
+        
+        # Create items with appropriate data
+        items = [
+            create_item(data["title"], center_align=False),
+            create_item(data["key"] if self.show_keys or unique_id in self.visible_keys else self.censor_key(data["key"])),
+            create_item(data["category"]),
+            create_item(data.get("app_id", "")),
+            create_item(format_rating_text(data.get("review_data", None))),
+            create_item(data.get("developer", ""))
+        ]
+        
+        # Set rating color if available
+        review_data = data.get("review_data", None)
+        if review_data and 'rating_text' in review_data:
+            items[4].setForeground(QColor(get_rating_color(review_data['rating_text'], review_data.get('percentage'))))
+        
+        # Add all items to table
+        for col, item in enumerate(items, 1):
+            self.table_widget.setItem(i, col, item)
 
     def import_games(self):
         import_games(self)
@@ -877,12 +961,22 @@ class SteamKeyManager(QMainWindow):
     def showEvent(self, event):
         super().showEvent(event)
 
+    def closeEvent(self, event):
+        # Let a running sweep finish the picture it's on rather than being torn down mid-move
+        if self.picture_cleanup_thread and self.picture_cleanup_thread.isRunning():
+            self.picture_cleanup_thread.requestInterruption()
+            self.picture_cleanup_thread.wait()
+        super().closeEvent(event)
+
     def open_selected_in_browser(self):
         handle_browser_open(self.games, self.table_widget.selectedItems(), self.row_to_unique_id, self)
 
     def open_settings_menu(self):
-        dialog = SettingsMenuDialog(self, encryption_manager=self.encryption_manager, config_path=str(CONFIG_FILE_PATH))
+        dialog = SettingsMenuDialog(self, encryption_manager=self.encryption_manager, config_path=str(CONFIG_FILE_PATH),
+                                    icons_folder=self.icons_folder, icon_store=self.steam_manager.icon_store, games=self.games,
+                                    steam_manager=self.steam_manager)
         dialog.settings_imported.connect(self.reload_config_and_apply)
+        dialog.pictures_changed.connect(self.refresh_game_list)
         dialog.exec()
 
     def reload_config_and_apply(self):
@@ -947,10 +1041,21 @@ def main():
     #app.setStyle('Fusion') # Linux Style
     # Check for files to migrate before initializing the main window
     check_and_migrate_files()
+    # Held until the app exits, command-line fetches and imports refuse to run meanwhile
+    library_lock = LibraryLock()
+    while not library_lock.acquire():
+        answer = QMessageBox.warning(None, "Library In Use",
+                                     "SteamKM is already open, or a command-line fetch or import is writing the library.\n"
+                                     "Opening it now would overwrite that run's results.",
+                                     QMessageBox.Retry | QMessageBox.Cancel)
+        if answer != QMessageBox.Retry:
+            return
     window = SteamKeyManager()
     window.show()
     window.show_update_message_if_needed()
+    window.steam_manager.resume_interrupted_fetch()
     sys.exit(app.exec())
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,337 @@
+# Mock_Steam_Server.py
+"""
+Local stand-in for the Steam endpoints the fetcher uses, for testing and benchmarking fetches offline.
+
+Point the STEAMKM_STEAM_STORE_URL and STEAMKM_STEAM_API_URL environment variables at the server
+(http://127.0.0.1:8765 by default).
+Recorded fixtures are replayed from the fixtures folder:
+
+    appdetails/<app_id>.json    full appdetails response, or just its "data" object
+    appreviews/<app_id>.json    appreviews response
+    storesearch/<term>.json     storesearch response, term lowercased
+    store/<app_id>.html         store page
+    images/<app_id>.jpg         header image
+
+Anything without a fixture is synthesized, so the server also works with no fixtures at all.
+
+    python Mock_Steam_Server.py [--port 8765] [--latency 0.05] [--jitter 0.05] [--error-rate 0.1]
+    python Mock_Steam_Server.py --record 440 620 ...    record fixtures from the real Steam endpoints
+    python Mock_Steam_Server.py --benchmark 500         fetch 500 synthetic games through the server
+"""
+import re
+import json
+import random
+import argparse
+import tempfile
+import threading
+import zlib
+import requests
+from time import sleep, perf_counter
+from pathlib import Path
+from collections import Counter
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+DEFAULT_PORT = 8765
+DEFAULT_FIXTURES_DIR = Path(__file__).parent / "mock_fixtures"
+# 1x1 GIF, image loaders detect the format from the content so it works as a header image
+PLACEHOLDER_IMAGE = (b"GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04\x01\x00\x00\x00\x00"
+                     b",\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;")
+
+STORE_PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><title>{name} on Steam</title></head>
+<body>
+<div class="page_content">
+<div class="user_reviews">
+<div class="user_reviews_summary_row">
+<div class="subtitle column">Recent Reviews:</div>
+<div class="summary column"><span class="game_review_summary positive">Very Positive</span>
+<span class="responsive_hidden">({recent_count})</span></div>
+</div>
+<div class="user_reviews_summary_row">
+<div class="subtitle column all">All Reviews:</div>
+<div class="summary column"><span class="game_review_summary positive" data-tooltip-html="92% of the {count} user reviews for this game are positive.">Very Positive</span>
+<span class="responsive_hidden">({count})</span></div>
+</div>
+</div>
+<div class="dev_row"><div class="subtitle column">Developer:</div>
+<div class="summary column" id="developers_list"><a href="#">{developer}</a></div></div>
+{filler}
+</div>
+</body></html>
+"""
+
+def synthetic_app_id(term):
+    """Stable AppID for a search term that has no fixture"""
+    return str(100000 + zlib.crc32(term.encode("utf-8")) % 900000)
+
+class MockSteamServer:
+    """
+    Serves appdetails, storesearch, appreviews, store pages, header images and the app list.
+    latency and jitter delay every response (seconds), error_rate answers that fraction of requests
+    with 429 and a Retry-After of retry_after seconds.
+    """
+    def __init__(self, fixtures_dir=DEFAULT_FIXTURES_DIR, host="127.0.0.1", port=DEFAULT_PORT,
+                 latency=0.0, jitter=0.0, error_rate=0.0, retry_after=1, page_kb=200, seed=None):
+        self.fixtures_dir = Path(fixtures_dir)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.page_kb = page_kb
+        self.stats = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve from a background thread, returns the base URL"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server._handle(self)
+
+            def do_POST(self):
+                server._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    # Fixtures
+
+    def _fixture(self, *parts):
+        path = self.fixtures_dir.joinpath(*parts)
+        return path.read_bytes() if path.is_file() else None
+
+    def _json_fixture(self, *parts):
+        data = self._fixture(*parts)
+        return json.loads(data) if data is not None else None
+
+    def _app_name(self, app_id):
+        details = self._appdetails(app_id)
+        entry = details.get(app_id, {})
+        return entry.get("data", {}).get("name", f"App {app_id}") if entry.get("success") else f"App {app_id}"
+
+    def _appdetails(self, app_id):
+        data = self._json_fixture("appdetails", f"{app_id}.json")
+        if data is None:
+            data = {"name": f"App {app_id}", "developers": ["Mock Developer"], "publishers": ["Mock Publisher"],
+                    "genres": [{"id": "1", "description": "Action"}], "release_date": {"coming_soon": False, "date": "1 Jan, 2020"}}
+        if app_id not in data:
+            data = {app_id: {"success": True, "data": data}}
+        entry = data[app_id]
+        if entry.get("success"):
+            # Header images are served by this server too
+            entry["data"]["header_image"] = f"{self.url}/images/{app_id}.jpg"
+        return data
+
+    def _storesearch(self, term):
+        data = self._json_fixture("storesearch", f"{term.lower()}.json")
+        if data is not None:
+            return data
+        items = []
+        appdetails_dir = self.fixtures_dir / "appdetails"
+        if appdetails_dir.is_dir():
+            words = term.lower().split()
+            for path in appdetails_dir.glob("*.json"):
+                name = self._app_name(path.stem)
+                if words and all(word in name.lower() for word in words):
+                    items.append({"id": int(path.stem), "name": name})
+        if not items:
+            items = [{"id": int(synthetic_app_id(term)), "name": term}]
+        return {"total": len(items), "items": items}
+
+    def _appreviews(self, app_id):
+        data = self._json_fixture("appreviews", f"{app_id}.json")
+        if data is not None:
+            return data
+        count = 1000 + int(app_id) % 50000 if app_id.isdigit() else 1000
+        return {"success": 1, "query_summary": {"total_reviews": count, "review_score_desc": "Very Positive"}}
+
+    def _store_page(self, app_id):
+        page = self._fixture("store", f"{app_id}.html")
+        if page is not None:
+            return page
+        count = 1000 + int(app_id) % 50000 if app_id.isdigit() else 1000
+        filler = "<div class=\"filler\">" + "Lorem ipsum dolor sit amet. " * (self.page_kb * 1024 // 28) + "</div>"
+        return STORE_PAGE_TEMPLATE.format(name=self._app_name(app_id), count=f"{count:,}",
+                                          recent_count=count // 20, developer="Mock Developer", filler=filler).encode("utf-8")
+
+    def _app_list(self):
+        apps = []
+        appdetails_dir = self.fixtures_dir / "appdetails"
+        if appdetails_dir.is_dir():
+            apps = [{"appid": int(path.stem), "name": self._app_name(path.stem)} for path in appdetails_dir.glob("*.json")]
+        return {"applist": {"apps": apps}}
+
+    # Requests
+
+    def _handle(self, handler):
+        parts = urlsplit(handler.path)
+        query = parse_qs(parts.query)
+        path = parts.path
+
+        if self.latency or self.jitter:
+            sleep(self.latency + self._random.uniform(0, self.jitter))
+
+        with self._lock:
+            self.stats["requests"] += 1
+            throttled = self.error_rate and self._random.random() < self.error_rate
+        if throttled:
+            with self._lock:
+                self.stats["429"] += 1
+            return self._send(handler, 429, b"Too Many Requests", "text/plain", {"Retry-After": str(self.retry_after)})
+
+        match = re.fullmatch(r"/app/(\d+)/?", path)
+        if path == "/api/appdetails":
+            app_id = query.get("appids", [""])[0]
+            return self._send_json(handler, "appdetails", self._appdetails(app_id))
+        if path.rstrip("/") == "/api/storesearch":
+            return self._send_json(handler, "storesearch", self._storesearch(query.get("term", [""])[0]))
+        if path.startswith("/appreviews/"):
+            return self._send_json(handler, "appreviews", self._appreviews(path.rsplit("/", 1)[-1]))
+        if match:
+            with self._lock:
+                self.stats["store page"] += 1
+            return self._send(handler, 200, self._store_page(match.group(1)), "text/html; charset=UTF-8")
+        if path.startswith("/agecheckset/"):
+            return self._send_json(handler, "agecheckset", {"success": 1})
+        if path.startswith("/images/"):
+            app_id = Path(path).stem
+            image = self._fixture("images", f"{app_id}.jpg") or PLACEHOLDER_IMAGE
+            etag = f'"{zlib.crc32(image):08x}"'
+            if handler.headers.get("If-None-Match") == etag:
+                with self._lock:
+                    self.stats["304"] += 1
+                return self._send(handler, 304, b"", "image/jpeg", {"ETag": etag})
+            with self._lock:
+                self.stats["header image"] += 1
+            return self._send(handler, 200, image, "image/jpeg", {"ETag": etag})
+        if path.rstrip("/") == "/ISteamApps/GetAppList/v2":
+            return self._send_json(handler, "applist", self._app_list())
+        return self._send(handler, 404, b"Not Found", "text/plain")
+
+    def _send_json(self, handler, endpoint, data):
+        with self._lock:
+            self.stats[endpoint] += 1
+        return self._send(handler, 200, json.dumps(data).encode("utf-8"), "application/json")
+
+    def _send(self, handler, status, body, content_type, headers=None):
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(body)
+
+def record_fixtures(app_ids, fixtures_dir=DEFAULT_FIXTURES_DIR, store_url="https://store.steampowered.com"):
+    """Record appdetails, appreviews, store page and header image fixtures from the real endpoints"""
+    fixtures_dir = Path(fixtures_dir)
+    for folder in ("appdetails", "appreviews", "store", "images"):
+        (fixtures_dir / folder).mkdir(parents=True, exist_ok=True)
+    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
+    for app_id in app_ids:
+        details = requests.get(f"{store_url}/api/appdetails?appids={app_id}", timeout=10).json()
+        (fixtures_dir / "appdetails" / f"{app_id}.json").write_text(json.dumps(details), encoding="utf-8")
+        reviews = requests.get(f"{store_url}/appreviews/{app_id}?json=1&purchase_type=all&language=all"
+                               f"&review_type=all&filter_by=summary", timeout=10).json()
+        (fixtures_dir / "appreviews" / f"{app_id}.json").write_text(json.dumps(reviews), encoding="utf-8")
+        page = requests.get(f"{store_url}/app/{app_id}/", headers=headers, timeout=10)
+        (fixtures_dir / "store" / f"{app_id}.html").write_bytes(page.content)
+        entry = details.get(app_id, {})
+        if entry.get("success") and entry["data"].get("header_image"):
+            image = requests.get(entry["data"]["header_image"], timeout=10)
+            (fixtures_dir / "images" / f"{app_id}.jpg").write_bytes(image.content)
+        print(f"Recorded {app_id}")
+
+def run_benchmark(game_count, server, requests_per_second=0, stage_workers=None, parse_processes=0, telemetry_path=None):
+    """Fetch game_count synthetic games (half with an AppID, half by title) through a running server"""
+    from Fetch_Pipeline import SteamFetchPipeline
+    from Fetch_Planner import build_fetch_plan
+
+    games = {}
+    for i in range(game_count):
+        app_id = str(200000 + i) if i % 2 == 0 else ""
+        games[str(i)] = {"title": f"Benchmark Game {i}", "app_id": app_id, "key": "", "category": "New"}
+
+    results = []
+    with tempfile.TemporaryDirectory() as icons_folder:
+        plan = build_fetch_plan(games, "missing", requests_per_second=requests_per_second)
+        pipeline = SteamFetchPipeline(games, icons_folder, stage_workers=stage_workers,
+                                      requests_per_second=requests_per_second, parse_processes=parse_processes,
+                                      plan=plan, store_url=server.url, on_progress=lambda *args: results.append(args))
+        start = perf_counter()
+        pipeline.run()
+        elapsed = perf_counter() - start
+
+    print(f"{game_count} games in {elapsed:.2f}s ({game_count / elapsed:.1f} games/s), {len(results)} updated, "
+          f"{len(pipeline.failed_titles)} failed")
+    for line in pipeline.telemetry.summary_lines():
+        print(" " + line if line else "")
+    print("Server: " + ", ".join(f"{count} {name}" for name, count in server.stats.items()))
+    if telemetry_path:
+        pipeline.telemetry.export_json(telemetry_path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Steam store endpoints")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--fixtures", default=str(DEFAULT_FIXTURES_DIR), help="Folder with recorded fixtures")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra latency of up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with a 429")
+    parser.add_argument("--page-kb", type=int, default=200, help="Size of synthesized store pages")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--record", nargs="+", metavar="APP_ID", help="Record fixtures for these AppIDs and exit")
+    parser.add_argument("--benchmark", type=int, metavar="GAMES", help="Fetch this many synthetic games and exit")
+    parser.add_argument("--rate", type=float, default=0.0, help="Requests per second for --benchmark, 0 for no limit")
+    parser.add_argument("--parse-processes", type=int, default=0, help="Parse processes for --benchmark")
+    parser.add_argument("--telemetry", metavar="PATH", help="Export the --benchmark telemetry as JSON")
+    args = parser.parse_args()
+
+    if args.record:
+        record_fixtures(args.record, args.fixtures)
+        return
+
+    server = MockSteamServer(args.fixtures, args.host, 0 if args.benchmark else args.port, args.latency, args.jitter,
+                             args.error_rate, args.retry_after, args.page_kb, args.seed)
+    if args.benchmark:
+        server.start()
+        try:
+            run_benchmark(args.benchmark, server, args.rate, parse_processes=args.parse_processes, telemetry_path=args.telemetry)
+        finally:
+            server.stop()
+        return
+
+    print(f"Mock Steam server on {server.url} (fixtures: {args.fixtures})")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print("Served: " + ", ".join(f"{count} {name}" for name, count in server.stats.items()))
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,96 @@
 # Settings_Menu.py
-from PySide6.QtWidgets import QDialog, QVBoxLayout, QPushButton, QFileDialog, QMessageBox, QGroupBox, QHBoxLayout, QLabel
-from PySide6.QtCore import Qt, Signal
-from Config import UI_MARGIN, BUTTON_HEIGHT, VERTICAL_SPACING
+from PySide6.QtWidgets import QDialog, QVBoxLayout, QPushButton, QFileDialog, QMessageBox, QGroupBox, QHBoxLayout, QLabel, QCheckBox
+from PySide6.QtCore import Qt, Signal, QThread
+from Config import ConfigManager, UI_MARGIN, BUTTON_HEIGHT, VERTICAL_SPACING
+from Steam_App_Index import get_app_index, import_app_list, download_app_list, APP_LIST_URL
+from Icon_Variants import migrate_icons
+from Icon_Cleanup import referenced_pictures, scan_pictures, sweep_pictures, restore_quarantined, QUARANTINE_FOLDER
 import os
+import logging
+from time import time
+
+class AppListDownloadThread(QThread):
+    """Downloads the Steam app list in the background, the file is several megabytes"""
+    finished_signal = Signal(int)
+    error_signal = Signal(str)
+
+    def __init__(self, url):
+        super().__init__()
+        self.url = url
+
+    def run(self):
+        try:
+            app_count = download_app_list(self.url, is_canceled=self.isInterruptionRequested)
+            if app_count is not None:
+                self.finished_signal.emit(app_count)
+        except Exception as e:
+            self.error_signal.emit(str(e))
+
+class IconMigrationThread(QThread):
+    """Creates the display variants of every header already in the pictures folder"""
+    progress_signal = Signal(int, int)
+    finished_signal = Signal(dict)
+
+    def __init__(self, icons_folder, keep_original, quality, icon_store=None):
+        super().__init__()
+        self.icons_folder = icons_folder
+        self.keep_original = keep_original
+        self.quality = quality
+        self.icon_store = icon_store
+
+    def run(self):
+        report = migrate_icons(self.icons_folder, self.keep_original, self.quality, self.icon_store,
+                               progress=self.progress_signal.emit, is_canceled=self.isInterruptionRequested)
+        self.finished_signal.emit(report)
+
+class PictureCleanupThread(QThread):
+    """Sweeps pictures no game references any more, with dry_run it only accounts for the storage used"""
+    finished_signal = Signal(dict)
+
+    def __init__(self, icons_folder, games, quarantine_days=30, icon_store=None, dry_run=False, protected_app_ids=()):
+        super().__init__()
+        self.icons_folder = icons_folder
+        # Snapshot the library here, on the UI thread, so the sweep never reads the games while they change
+        self.app_ids, self.paths = referenced_pictures(games, protected_app_ids)
+        self.quarantine_days = quarantine_days
+        self.icon_store = icon_store
+        self.dry_run = dry_run
+
+    def run(self):
+        try:
+            if self.dry_run:
+                report = scan_pictures(self.icons_folder, self.app_ids, self.paths)
+            else:
+                report = sweep_pictures(self.icons_folder, self.app_ids, self.paths, self.quarantine_days,
+                                        self.icon_store, is_canceled=self.isInterruptionRequested)
+                report["canceled"] = self.isInterruptionRequested()
+        except OSError as e:
+            logging.error(f" sweeping game pictures: {e}")
+            report = {}
+        self.finished_signal.emit(report)
+
+def format_picture_storage(report):
+    text = f"{report['files']:,} files, {report['bytes'] / 1048576:.1f} MB"
+    if report["orphans"]:
+        text += f" · {len(report['orphans'])} unused ({report['orphan_bytes'] / 1048576:.1f} MB)"
+    if report["quarantine_files"]:
+        text += f" · {report['quarantine_bytes'] / 1048576:.1f} MB quarantined"
+    return text
 
 class SettingsMenuDialog(QDialog):
     settings_imported = Signal()  # Signal to notify import
+    pictures_changed = Signal()  # Display variants were created, the table should reload its icons
 
-    def __init__(self, parent=None, encryption_manager=None, config_path=None):
+    def __init__(self, parent=None, encryption_manager=None, config_path=None, icons_folder=None, icon_store=None, games=None,
+                 steam_manager=None):
         super().__init__(parent)
         self.setWindowTitle("Settings Menu")
-        self.setMinimumSize(350, 200) # Add an extra 35px to the height when using an extra row of buttons in a groupbox
+        self.setMinimumSize(350, 300) # Add an extra 35px to the height when using an extra row of buttons in a groupbox
         self.encryption_manager = encryption_manager
+        self.icons_folder = icons_folder
+        self.icon_store = icon_store
+        self.games = games if games is not None else {}
+        self.steam_manager = steam_manager
         self.config_path = config_path or os.path.join(os.getcwd(), "manager_settings.json")
         layout = QVBoxLayout(self)
         layout.setContentsMargins(*UI_MARGIN)
@@ -58,6 +137,226 @@ class SettingsMenuDialog(QDialog):
         actions_layout.addLayout(actions_buttons_layout)
         layout.addWidget(actions_group)
 
+        # Spacing between GroupBoxes
+        layout.addSpacing(VERTICAL_SPACING)
+
+        # Steam App Index GroupBox
+        app_index_group = QGroupBox()
+        app_index_layout = QVBoxLayout(app_index_group)
+        app_index_label = QLabel("Steam App Index", objectName="Title", fixedHeight=BUTTON_HEIGHT)
+        app_index_label.setAlignment(Qt.AlignCenter)
+        app_index_layout.addWidget(app_index_label)
+
+        self.app_index_status_label = QLabel()
+        self.app_index_status_label.setAlignment(Qt.AlignCenter)
+        app_index_layout.addWidget(self.app_index_status_label)
+
+        app_index_buttons_layout = QHBoxLayout()
+        self.download_app_list_button = QPushButton("Download App List")
+        self.download_app_list_button.setToolTip("Download the Steam app list so titles can be matched to AppIDs offline")
+        self.download_app_list_button.clicked.connect(self.download_app_list)
+        app_index_buttons_layout.addWidget(self.download_app_list_button)
+
+        self.import_app_list_button = QPushButton("Import App List")
+        self.import_app_list_button.setToolTip("Import a previously downloaded Steam app list JSON file")
+        self.import_app_list_button.clicked.connect(self.import_app_list)
+        app_index_buttons_layout.addWidget(self.import_app_list_button)
+
+        app_index_layout.addLayout(app_index_buttons_layout)
+        layout.addWidget(app_index_group)
+        self.app_list_thread = None
+        self.update_app_index_status()
+
+        # Spacing between GroupBoxes
+        layout.addSpacing(VERTICAL_SPACING)
+
+        # Game Pictures GroupBox
+        pictures_group = QGroupBox()
+        pictures_layout = QVBoxLayout(pictures_group)
+        pictures_label = QLabel("Game Pictures", objectName="Title", fixedHeight=BUTTON_HEIGHT)
+        pictures_label.setAlignment(Qt.AlignCenter)
+        pictures_layout.addWidget(pictures_label)
+
+        self.pictures_status_label = QLabel()
+        self.pictures_status_label.setAlignment(Qt.AlignCenter)
+        pictures_layout.addWidget(self.pictures_status_label)
+
+        self.pictures_storage_label = QLabel("Counting pictures...")
+        self.pictures_storage_label.setAlignment(Qt.AlignCenter)
+        pictures_layout.addWidget(self.pictures_storage_label)
+
+        pictures_buttons_layout = QHBoxLayout()
+        self.keep_originals_checkbox = QCheckBox("Keep Original Headers")
+        self.keep_originals_checkbox.setToolTip("Unchecked, headers are re-encoded at display size to save space")
+        self.keep_originals_checkbox.setChecked(ConfigManager().get("keep_original_icons"))
+        self.keep_originals_checkbox.stateChanged.connect(self.toggle_keep_originals)
+        pictures_buttons_layout.addWidget(self.keep_originals_checkbox)
+
+        self.optimize_pictures_button = QPushButton("Optimize Pictures")
+        self.optimize_pictures_button.setToolTip("Create compact display copies of every header that was downloaded before")
+        self.optimize_pictures_button.clicked.connect(self.optimize_pictures)
+        self.optimize_pictures_button.setEnabled(bool(icons_folder))
+        pictures_buttons_layout.addWidget(self.optimize_pictures_button)
+
+        pictures_layout.addLayout(pictures_buttons_layout)
+
+        cleanup_buttons_layout = QHBoxLayout()
+        self.clean_up_pictures_button = QPushButton("Clean Up")
+        self.clean_up_pictures_button.setToolTip("Move pictures of games that were removed or got a new AppID into the quarantine folder")
+        self.clean_up_pictures_button.clicked.connect(lambda: self.scan_pictures(dry_run=False))
+        cleanup_buttons_layout.addWidget(self.clean_up_pictures_button)
+
+        self.restore_pictures_button = QPushButton("Restore Quarantined")
+        self.restore_pictures_button.setToolTip("Move every quarantined picture back")
+        self.restore_pictures_button.clicked.connect(self.restore_pictures)
+        cleanup_buttons_layout.addWidget(self.restore_pictures_button)
+
+        pictures_layout.addLayout(cleanup_buttons_layout)
+        layout.addWidget(pictures_group)
+        self.icon_migration_thread = None
+        self.picture_cleanup_thread = None
+        self.update_pictures_status()
+        if icons_folder:
+            self.scan_pictures(dry_run=True)
+        else:
+            self.pictures_storage_label.setText("")
+            self.clean_up_pictures_button.setEnabled(False)
+            self.restore_pictures_button.setEnabled(False)
+
+    def update_app_index_status(self):
+        app_index = get_app_index()
+        if app_index:
+            self.app_index_status_label.setText(f"{len(app_index):,} apps available offline")
+        else:
+            self.app_index_status_label.setText("No app list imported, titles are searched online")
+
+    def download_app_list(self):
+        self.download_app_list_button.setEnabled(False)
+        self.import_app_list_button.setEnabled(False)
+        self.app_index_status_label.setText("Downloading app list...")
+        self.app_list_thread = AppListDownloadThread(APP_LIST_URL)
+        self.app_list_thread.finished_signal.connect(self.app_list_ready)
+        self.app_list_thread.error_signal.connect(self.app_list_failed)
+        self.app_list_thread.start()
+
+    def app_list_ready(self, app_count):
+        self.download_app_list_button.setEnabled(True)
+        self.import_app_list_button.setEnabled(True)
+        self.update_app_index_status()
+
+    def app_list_failed(self, error_message):
+        self.download_app_list_button.setEnabled(True)
+        self.import_app_list_button.setEnabled(True)
+        self.update_app_index_status()
+        QMessageBox.critical(self, "Download Failed", f"Error: {error_message}")
+
+    def import_app_list(self):
+        file_path, _ = QFileDialog.getOpenFileName(self, "Import Steam App List", "", "JSON Files (*.json)")
+        if file_path:
+            try:
+                app_count = import_app_list(file_path)
+                QMessageBox.information(self, "Import Successful", f"Imported {app_count:,} apps.")
+            except Exception as e:
+                QMessageBox.critical(self, "Import Failed", f"Error: {e}")
+            self.update_app_index_status()
+
+    def update_pictures_status(self):
+        if self.keep_originals_checkbox.isChecked():
+            self.pictures_status_label.setText("Headers are kept at full size with small copies for display")
+        else:
+            self.pictures_status_label.setText("Headers are re-encoded at display size")
+
+    def toggle_keep_originals(self, state):
+        ConfigManager().set("keep_original_icons", bool(state))
+        self.update_pictures_status()
+
+    def optimize_pictures(self):
+        # Re-encoding rewrites headers in place, a running fetch may be downloading the same files
+        if self.steam_manager is not None and self.steam_manager.is_fetching:
+            QMessageBox.information(self, "Fetch Running", "Pictures can be optimized once the Steam fetch has finished.")
+            return
+        config_manager = ConfigManager()
+        self.optimize_pictures_button.setEnabled(False)
+        self.keep_originals_checkbox.setEnabled(False)
+        self.pictures_status_label.setText("Optimizing pictures...")
+        self.icon_migration_thread = IconMigrationThread(self.icons_folder, config_manager.get("keep_original_icons"),
+                                                         config_manager.get("icon_variant_quality"), self.icon_store)
+        self.icon_migration_thread.progress_signal.connect(self.pictures_progress)
+        self.icon_migration_thread.finished_signal.connect(self.pictures_optimized)
+        self.icon_migration_thread.start()
+
+    def scan_pictures(self, dry_run):
+        if self.picture_cleanup_thread and self.picture_cleanup_thread.isRunning():
+            return
+        protected_app_ids = set()
+        if self.steam_manager is not None:
+            if not dry_run and self.steam_manager.is_fetching:
+                QMessageBox.information(self, "Fetch Running", "Pictures can be cleaned up once the Steam fetch has finished.")
+                return
+            protected_app_ids = self.steam_manager.job_store.recorded_app_ids()
+        self.clean_up_pictures_button.setEnabled(False)
+        self.restore_pictures_button.setEnabled(False)
+        if not dry_run:
+            self.pictures_storage_label.setText("Cleaning up pictures...")
+        self.picture_cleanup_thread = PictureCleanupThread(self.icons_folder, self.games, ConfigManager().get("picture_quarantine_days"),
+                                                           self.icon_store, dry_run=dry_run, protected_app_ids=protected_app_ids)
+        self.picture_cleanup_thread.finished_signal.connect(self.pictures_scanned)
+        self.picture_cleanup_thread.start()
+
+    def pictures_scanned(self, report):
+        self.clean_up_pictures_button.setEnabled(True)
+        self.restore_pictures_button.setEnabled(True)
+        if not report:
+            self.pictures_storage_label.setText("Couldn't read the pictures folder")
+            return
+        if "quarantined" not in report:
+            self.pictures_storage_label.setText(format_picture_storage(report))
+            return
+
+        ConfigManager().set("last_picture_cleanup", int(time()))
+        lines = [f"Quarantined {report['quarantined']} unused pictures, deleted {report['deleted']} files",
+                 f"Freed {report['freed_bytes'] / 1048576:.1f} MB"]
+        if report["purged"]:
+            lines.append(f"Purged {report['purged']} pictures whose quarantine ran out")
+        if report["quarantined"]:
+            lines.append(f"Quarantined pictures stay in {os.path.join(self.icons_folder, QUARANTINE_FOLDER)} "
+                         f"for {ConfigManager().get('picture_quarantine_days')} days")
+        QMessageBox.information(self, "Pictures Cleaned Up", "\n".join(lines))
+        self.scan_pictures(dry_run=True)
+
+    def restore_pictures(self):
+        restored = restore_quarantined(self.icons_folder)
+        QMessageBox.information(self, "Pictures Restored", f"Restored {restored} pictures.")
+        if restored:
+            self.pictures_changed.emit()
+        self.scan_pictures(dry_run=True)
+
+    def pictures_progress(self, done, total):
+        self.pictures_status_label.setText(f"Optimizing pictures ({done}/{total})...")
+
+    def pictures_optimized(self, report):
+        self.optimize_pictures_button.setEnabled(True)
+        self.keep_originals_checkbox.setEnabled(True)
+        self.update_pictures_status()
+        if report["converted"]:
+            self.pictures_changed.emit()
+
+        lines = [f"Optimized {report['converted']} of {report['total']} headers"]
+        if report["failed"]:
+            lines.append(f"{report['failed']} couldn't be read")
+        if report["converted"]:
+            lines.append(f"Picture folder: {report['bytes_before'] / 1048576:.1f} MB → {report['bytes_after'] / 1048576:.1f} MB")
+            lines.append(f"Table icon load time: {report['load_ms_before']:.2f} ms → {report['load_ms_after']:.2f} ms per icon")
+        QMessageBox.information(self, "Pictures Optimized", "\n".join(lines))
+
+    def reject(self):
+        # Threads stop at their next check, an optimization finishes the header it's on instead of leaving a half-written file
+        for thread in (self.icon_migration_thread, self.picture_cleanup_thread, self.app_list_thread):
+            if thread and thread.isRunning():
+                thread.requestInterruption()
+                thread.wait()
+        super().reject()
+
     def import_settings(self):
         file_path, _ = QFileDialog.getOpenFileName(self, "Import manager_settings.json", "", "JSON Files (*.json)")
         if file_path:
@@ -1,13 +1,17 @@
-import os
-import requests
 import webbrowser
-import re
-import logging
-import difflib
-from pathlib import Path
-from bs4 import BeautifulSoup
-from PySide6.QtCore import QThread, Signal, QMutex
+from time import time
+from collections import Counter
+from PySide6.QtCore import QThread, Signal, QMutex, QTimer
+from PySide6.QtWidgets import QDialog, QDialogButtonBox, QPushButton, QFileDialog, QMessageBox
 from CustomWidgets import create_scrollable_message_dialog
+from Fetch_Jobs import FetchJobStore
+from Fetch_Failures import FailureCache
+from Icon_Store import IconStore
+from Appdetails_Store import AppDetailsStore, backfill
+from Fetch_Planner import select_stale_games, incomplete_games, apply_fetched_data
+from Fetch_Pipeline import PRIORITY_NEW, PRIORITY_EDITED, PRIORITY_VISIBLE
+from Fetch_Session import plan_fetch, create_pipeline
+from Config import ConfigManager
 
 class SteamFetchManager:
     def __init__(self, parent, table_widget, games, icons_folder):
@@ -21,7 +25,28 @@ class SteamFetchManager:
         self.is_fetching = False
         
         self.pending_updates = {}
+        self.progress_updates = {}
+        self.rows_changed = False
         self.update_mutex = QMutex()
+        self.job_store = FetchJobStore()
+        self.failure_cache = FailureCache(ConfigManager().get("failure_cache_days") * 86400)
+        self.icon_store = IconStore(icons_folder)
+        self.details_store = AppDetailsStore()
+        self.plan_thread = None
+        
+        # Non-batch progress is collected and applied a few times per second instead of once per game
+        self.progress_timer = QTimer()
+        self.progress_timer.timeout.connect(self.on_progress_timer)
+        self.last_checkpoint = 0.0
+        
+        # Games added or edited this session are fetched before the rest, visible rows before everything
+        self.new_game_ids = set()
+        self.edited_game_ids = set()
+        self.priority_timer = QTimer()
+        self.priority_timer.setSingleShot(True)
+        self.priority_timer.timeout.connect(self.update_fetch_priorities)
+        
+        self.last_telemetry = None  # Request statistics of the last finished run, for the diagnostics dialog
     
     def set_status_label(self, label):
         """Set the status label that will display fetch progress"""
@@ -37,6 +62,38 @@ class SteamFetchManager:
             self.steam_fetcher.stop()
             self.update_status_text("Canceling fetch operation...\nPlease wait.")
     
+    def schedule_priority_update(self):
+        """Re-evaluate fetch priorities shortly, called whenever the table is scrolled or filtered"""
+        if self.is_fetching:
+            self.priority_timer.start(200)
+    
+    def update_fetch_priorities(self):
+        if not self.steam_fetcher:
+            return
+        priorities = dict.fromkeys(self.new_game_ids, PRIORITY_NEW)
+        priorities.update(dict.fromkeys(self.edited_game_ids, PRIORITY_EDITED))
+        if hasattr(self.parent, 'visible_game_ids'):
+            priorities.update(dict.fromkeys(self.parent.visible_game_ids(), PRIORITY_VISIBLE))
+        self.steam_fetcher.set_priorities(priorities)
+    
+    def is_fetch_paused(self):
+        return bool(self.steam_fetcher and self.steam_fetcher.isRunning() and self.steam_fetcher.paused)
+    
+    def toggle_fetch_pause(self):
+        """Pause an active fetch operation, or resume a paused one"""
+        if not self.steam_fetcher or not self.steam_fetcher.isRunning():
+            return
+        if self.steam_fetcher.paused:
+            self.steam_fetcher.resume()
+            self.update_status_text("Resuming fetch operation...")
+            if self.fetch_button:
+                self.fetch_button.setText("Fetching...")
+        else:
+            self.steam_fetcher.pause()
+            self.update_status_text("Fetch operation paused")
+            if self.fetch_button:
+                self.fetch_button.setText("Fetch Paused")
+    
     def update_status_text(self, text):
         """Update the status label with current fetch status"""
         if self.status_label:
@@ -47,10 +104,8 @@ class SteamFetchManager:
         if self.fetch_button:
             self.is_fetching = is_fetching
             if is_fetching:
-                self.fetch_button.setText("Cancel Fetch")
-                self.fetch_button.setToolTip("Cancel the current Steam data fetch operation")
-                self.fetch_button.clicked.disconnect()
-                self.fetch_button.clicked.connect(self.cancel_steam_fetch)
+                self.fetch_button.setText("Fetching...")
+                self.fetch_button.setToolTip("Pause, resume or cancel the current Steam data fetch operation")
             else:
                 self.fetch_button.setText("Fetch Steam Data")
                 self.fetch_button.setToolTip("Fetch or update Steam data for games")
@@ -58,30 +113,23 @@ class SteamFetchManager:
                 self.fetch_button.clicked.connect(self.parent.open_steam_fetch_menu)
     
     def filter_incomplete_games(self):
-        incomplete_games = {}
-
-        for game_id, game_data in self.games.items():
-            app_id_missing = not game_data.get("app_id", "").strip()
-            icon_path = game_data.get("icon_path", "")
-            icon_missing = not icon_path or not os.path.exists(icon_path)
-            review_missing = "review_data" not in game_data
-            developer_missing = "developer" not in game_data or not game_data.get("developer", "").strip()
-            
-            if app_id_missing or icon_missing or review_missing or developer_missing:
-                incomplete_games[game_id] = game_data
-                
-        return incomplete_games
+        return incomplete_games(self.games)
     
-    def start_steam_fetch(self, update_reviews_only=False, specific_games=None):
-        self.update_mutex.lock()
-        self.pending_updates.clear()
-        self.update_mutex.unlock()
-
+    def start_steam_fetch(self, update_reviews_only=False, specific_games=None, dry_run=False):
+        """
+        Plan and start a fetch run. With dry_run the plan (requests, cache hits, estimated time)
+        is shown first, and the run only starts, with that same plan, if the user confirms it.
+        Plans are built off the UI thread, in the fetch thread or a FetchPlanThread for the preview.
+        """
+        if self.plan_thread and self.plan_thread.isRunning():
+            return
+        if update_reviews_only:
+            games_to_process = specific_games if specific_games is not None else self.games
         # Always filter for incomplete games, even for imported/new games
-        if specific_games is not None:
+        elif specific_games is not None:
             # Only fetch for incomplete games among the provided set
             games_to_process = self.filter_incomplete_games_from_dict(specific_games)
-        elif not update_reviews_only:
+        else:
             games_to_process = self.filter_incomplete_games()
             if not games_to_process:
                 self.update_status_text("")
@@ -95,72 +143,197 @@ class SteamFetchManager:
                 )
                 dialog.exec()
                 return
+
+        if update_reviews_only:
+            mode = "reviews"
+        elif specific_games is not None:
+            mode = "specific"
         else:
-            games_to_process = self.games
+            mode = "missing"
+        
+        if dry_run:
+            self.update_status_text("Planning fetch...")
+            self.plan_thread = FetchPlanThread(games_to_process, mode, self.job_store, self.failure_cache, self.icon_store,
+                                               self.details_store)
+            self.plan_thread.finished_signal.connect(lambda plan: self.confirm_plan(games_to_process, mode, plan))
+            self.plan_thread.start()
+            return
+        self._start_job(games_to_process, mode)
+
+    def confirm_plan(self, games_to_process, mode, plan):
+        self.update_status_text("")
+        dialog, _ = create_scrollable_message_dialog(
+            parent=self.parent,
+            title="Fetch Plan",
+            message=f"Fetch plan for {len(games_to_process)} games:",
+            content=plan.describe(),
+            buttons=QDialogButtonBox.Yes | QDialogButtonBox.No,
+            footer_text="Start this fetch now?"
+        )
+        if dialog.exec() == QDialog.Accepted and not self.is_fetching:
+            self._start_job(games_to_process, mode, plan)
+
+    def _start_job(self, games_to_process, mode, plan=None):
+        self.update_mutex.lock()
+        self.pending_updates.clear()
+        self.update_mutex.unlock()
+        self.job_store.start_job(mode, games_to_process)
+        self._launch_fetcher(games_to_process, mode, plan)
 
+    def resume_interrupted_fetch(self):
+        """Offer to resume a fetch run that was interrupted by closing or crashing the app"""
+        if self.is_fetching or not self.job_store.has_pending_job():
+            return
+        games_to_process = self.job_store.resume_job(self.games)
+        if not games_to_process:
+            self.job_store.finish_job()
+            return
+
+        dialog, _ = create_scrollable_message_dialog(
+            parent=self.parent,
+            title="Resume Steam Fetch",
+            message=f"An interrupted Steam fetch was found ({len(games_to_process)} games):",
+            content=[game_data.get("title", "Unknown") for game_data in games_to_process.values()],
+            buttons=QDialogButtonBox.Yes | QDialogButtonBox.No,
+            footer_text="Would you like to resume it? Already fetched data won't be requested again."
+        )
+        if dialog.exec() != QDialog.Accepted:
+            self.job_store.finish_job()
+            return
+
+        self.update_mutex.lock()
+        self.pending_updates.clear()
+        self.update_mutex.unlock()
+        self._launch_fetcher(games_to_process, self.job_store.mode)
+
+    def _launch_fetcher(self, games_to_process, mode, plan=None):
         # Change button to Cancel mode before starting the thread
         self.set_fetch_button_state(True)
 
         self.steam_fetcher = SteamGameFetcher(
             games_to_process,
             self.icons_folder,
-            update_reviews_only=update_reviews_only,
-            batch_mode=(update_reviews_only or specific_games is not None)
+            mode=mode,
+            batch_mode=(mode in ("reviews", "specific", "icons")),
+            job_store=self.job_store,
+            failure_cache=self.failure_cache,
+            icon_store=self.icon_store,
+            details_store=self.details_store,
+            plan=plan
         )
         self.steam_fetcher.progress_signal.connect(self.update_steam_data)
         self.steam_fetcher.finished_signal.connect(self.steam_fetch_finished)
         self.steam_fetcher.update_text_signal.connect(self.update_status_text)
+        self.update_fetch_priorities()
+        
+        updates_per_second = max(1, ConfigManager().get("progress_updates_per_second"))
+        self.rows_changed = False
+        self.last_checkpoint = time()
+        self.progress_timer.start(int(1000 / updates_per_second))
         self.steam_fetcher.start()
 
     def filter_incomplete_games_from_dict(self, games_dict):
         """Filter incomplete games from a provided dictionary (used for imports/edits)"""
-        incomplete_games = {}
-        for game_id, game_data in games_dict.items():
-            app_id_missing = not game_data.get("app_id", "").strip()
-            icon_path = game_data.get("icon_path", "")
-            icon_missing = not icon_path or not os.path.exists(icon_path)
-            review_missing = "review_data" not in game_data
-            developer_missing = "developer" not in game_data or not game_data.get("developer", "").strip()
-            if app_id_missing or icon_missing or review_missing or developer_missing:
-                incomplete_games[game_id] = game_data
-        return incomplete_games
+        return incomplete_games(games_dict)
 
     # Remove fetch_for_new_games and fetch_for_edited_games, or make them thin wrappers:
     def fetch_for_new_games(self, new_games_dict):
+        self.new_game_ids.update(new_games_dict)
         self.start_steam_fetch(specific_games=new_games_dict)
 
     def fetch_for_edited_games(self, modified_games_dict):
+        self.edited_game_ids.update(modified_games_dict)
         self.start_steam_fetch(specific_games=modified_games_dict)
     
     def update_steam_data(self, game_id, app_id, icon_path, review_data, developer):
         if game_id in self.games:
             self.update_mutex.lock()
             
-            game_data = self.games[game_id]
+            update_data = {
+                "app_id": app_id,
+                "icon_path": icon_path,
+                "review_data": review_data,
+                "developer": developer,
+                "fetched_at": int(time())
+            }
             
             if self.steam_fetcher and self.steam_fetcher.batch_mode:
-                self.pending_updates[game_id] = {
-                    "app_id": app_id,
-                    "icon_path": icon_path if icon_path else game_data.get("icon_path", ""),
-                    "review_data": review_data if review_data else game_data.get("review_data", {}),
-                    "developer": developer if developer else game_data.get("developer", "")
-                }
+                self.pending_updates[game_id] = update_data
             else:
-                game_data["app_id"] = app_id
-                if icon_path:
-                    game_data["icon_path"] = icon_path
-                if review_data:
-                    game_data["review_data"] = review_data
-                if developer:
-                    game_data["developer"] = developer
-                
-                if hasattr(self.parent, 'save_key_data'):
-                    self.parent.save_key_data()
-                if hasattr(self.parent, 'refresh_game_list'):
-                    self.parent.refresh_game_list()
+                self.progress_updates[game_id] = update_data
             
             self.update_mutex.unlock()
     
+    def _apply_updates(self, updates):
+        """Apply collected updates to the games, returning the ids of the games that changed"""
+        changed = []
+        for game_id, update_data in updates.items():
+            if game_id in self.games:
+                apply_fetched_data(
+                    self.games[game_id],
+                    update_data["app_id"],
+                    update_data["icon_path"],
+                    update_data["review_data"],
+                    update_data["developer"],
+                    update_data["fetched_at"]
+                )
+                changed.append(game_id)
+        updates.clear()
+        return changed
+    
+    def on_progress_timer(self):
+        self.flush_progress_updates()
+        self.checkpoint_pending_updates()
+    
+    def checkpoint_pending_updates(self):
+        """
+        Commit batch-mode updates collected so far once enough games or time have accumulated,
+        so a crash mid-fetch doesn't lose them. One save covers the whole checkpoint.
+        """
+        if not self.pending_updates:
+            return
+        config_manager = ConfigManager()
+        due = (len(self.pending_updates) >= config_manager.get("checkpoint_game_count")
+               or time() - self.last_checkpoint >= config_manager.get("checkpoint_interval_seconds"))
+        if not due:
+            return
+        
+        self.update_mutex.lock()
+        try:
+            changed = self._apply_updates(self.pending_updates)
+        finally:
+            self.update_mutex.unlock()
+        self.last_checkpoint = time()
+        
+        if not changed:
+            return
+        self.rows_changed = True
+        if hasattr(self.parent, 'save_key_data'):
+            self.parent.save_key_data()
+        if hasattr(self.parent, 'refresh_game_rows'):
+            self.parent.refresh_game_rows(changed)
+    
+    def flush_progress_updates(self):
+        """Apply the progress collected since the last flush with one save, redrawing only the changed rows"""
+        if not self.progress_updates:
+            return
+        
+        self.update_mutex.lock()
+        try:
+            changed = self._apply_updates(self.progress_updates)
+        finally:
+            self.update_mutex.unlock()
+        
+        if not changed:
+            return
+        self.rows_changed = True
+        if hasattr(self.parent, 'save_key_data'):
+            self.parent.save_key_data()
+        if hasattr(self.parent, 'refresh_game_rows'):
+            self.parent.refresh_game_rows(changed)
+        elif hasattr(self.parent, 'refresh_game_list'):
+            self.parent.refresh_game_list()
+    
     def apply_pending_updates(self):
         if not self.pending_updates:
             return
@@ -168,21 +341,7 @@ class SteamFetchManager:
         self.update_mutex.lock()
         
         try:
-            for game_id, update_data in self.pending_updates.items():
-                if game_id in self.games:
-                    game_data = self.games[game_id]
-                    game_data["app_id"] = update_data["app_id"]
-                    
-                    if update_data["icon_path"]:
-                        game_data["icon_path"] = update_data["icon_path"]
-                    
-                    if update_data["review_data"]:
-                        game_data["review_data"] = update_data["review_data"]
-                    
-                    if update_data["developer"]:
-                        game_data["developer"] = update_data["developer"]
-            
-            self.pending_updates.clear()
+            self._apply_updates(self.pending_updates)
             
             if hasattr(self.parent, 'save_key_data'):
                 self.parent.save_key_data()
@@ -196,381 +355,207 @@ class SteamFetchManager:
     def steam_fetch_finished(self, failed_titles):
         was_canceled = self.steam_fetcher and not self.steam_fetcher.running
         
-        self.apply_pending_updates()
+        self.progress_timer.stop()
+        self.flush_progress_updates()
+        if self.pending_updates:
+            self.apply_pending_updates()
+        elif self.rows_changed and hasattr(self.parent, 'refresh_game_list'):
+            # Rows were redrawn in place during the fetch, re-apply sorting and filters once
+            self.parent.refresh_game_list()
+        # Results are saved to the game library now, so the job record is no longer needed
+        self.job_store.finish_job()
         
         # Change button back to Fetch mode after the thread finishes
         self.set_fetch_button_state(False)
         
-        handle_steam_fetch_finished(self, failed_titles, self.parent, was_canceled)
+        if self.steam_fetcher:
+            self.last_telemetry = self.steam_fetcher.telemetry
+        uncertain_matches = self.steam_fetcher.uncertain_matches if self.steam_fetcher else []
+        skipped_titles = self.steam_fetcher.skipped_titles if self.steam_fetcher else []
+        handle_steam_fetch_finished(self, failed_titles, self.parent, was_canceled, uncertain_matches, skipped_titles)
     
-    def update_steam_reviews(self):
-        self.start_steam_fetch(update_reviews_only=True)
+    def refresh_icons(self):
+        """
+        Re-check every game's header image. Known images are requested conditionally with their stored
+        validators, so unchanged ones are answered with 304 and move no data.
+        """
+        if self.is_fetching:
+            return
+        games_to_process = {game_id: game_data for game_id, game_data in self.games.items() if game_data.get("app_id", "").strip()}
+        if not games_to_process:
+            return
+        self._start_job(games_to_process, "icons")
+
+    def fill_from_stored_details(self):
+        """Derive the configured fields from the appdetails kept by earlier fetches, without any request"""
+        if self.is_fetching:
+            return
+        fields = ConfigManager().get("stored_detail_fields")
+        changes = backfill(self.games, self.details_store, fields)
+        if changes:
+            if hasattr(self.parent, 'save_key_data'):
+                self.parent.save_key_data()
+            if hasattr(self.parent, 'refresh_game_list'):
+                self.parent.refresh_game_list()
+
+        counts = Counter(field for updated in changes.values() for field in updated)
+        dialog, _ = create_scrollable_message_dialog(
+            parent=self.parent,
+            title="Stored Steam Data",
+            message=f"Filled in data for {len(changes)} games:" if changes else "Nothing to fill in",
+            content=[f"{field}: {counts[field]} games" for field in fields] if changes else
+                    [f"No game is missing {', '.join(fields)} with stored details for its AppID"],
+            footer_text=f"Stored details cover {len(self.details_store)} apps. Games fetched before they were kept need one more fetch.",
+            min_width=400,
+            min_height=150
+        )
+        dialog.exec()
+
+    def show_fetch_diagnostics(self):
+        """Show the last run's per-endpoint latency, status codes, retries, bytes and cache hit ratios"""
+        if self.last_telemetry is None:
+            dialog, _ = create_scrollable_message_dialog(
+                parent=self.parent,
+                title="Fetch Diagnostics",
+                message="No fetch has run yet",
+                content=["Diagnostics are collected while Steam data is fetched"],
+                min_width=400,
+                min_height=150
+            )
+            dialog.exec()
+            return
+
+        telemetry = self.last_telemetry
+        export_button = QPushButton("Export JSON")
+        dialog, _ = create_scrollable_message_dialog(
+            parent=self.parent,
+            title="Fetch Diagnostics",
+            message="Statistics of the last Steam fetch:",
+            content=telemetry.summary_lines(),
+            extra_widgets=[export_button]
+        )
+
+        def export():
+            file_path, _ = QFileDialog.getSaveFileName(dialog, "Export Fetch Diagnostics", "fetch_diagnostics.json", "JSON Files (*.json)")
+            if file_path and not telemetry.export_json(file_path):
+                QMessageBox.critical(dialog, "Export Failed", f"Couldn't write {file_path}")
+
+        export_button.clicked.connect(export)
+        dialog.exec()
+    
+    def update_steam_reviews(self, refresh_all=False):
+        """Refresh reviews, by default only for games whose reviews are older than review_max_age_days"""
+        if refresh_all:
+            self.start_steam_fetch(update_reviews_only=True)
+            return
+
+        config_manager = ConfigManager()
+        max_age_days = config_manager.get("review_max_age_days")
+        stale_games = select_stale_games(self.games, "reviews", max_age_days * 86400, config_manager.get("review_refresh_order"))
+        if not stale_games:
+            dialog, _ = create_scrollable_message_dialog(
+                parent=self.parent,
+                title="Steam Data",
+                message="All reviews are up to date",
+                content=[f"Every game's reviews were refreshed within the last {max_age_days} days"],
+                footer_text="Use 'Update All Reviews' to refresh them anyway.",
+                min_width=400,
+                min_height=150
+            )
+            dialog.exec()
+            return
+        self.start_steam_fetch(update_reviews_only=True, specific_games=stale_games)
     
     def fetch_for_new_games(self, new_games_dict):
+        self.new_game_ids.update(new_games_dict)
         self.start_steam_fetch(specific_games=new_games_dict)
     
     def fetch_for_edited_games(self, modified_games_dict):
+        self.edited_game_ids.update(modified_games_dict)
         self.start_steam_fetch(specific_games=modified_games_dict)
 
+class FetchPlanThread(QThread):
+    """Builds a fetch plan for the preview, loading the app index and looking up every title takes a while"""
+    finished_signal = Signal(object)
+
+    def __init__(self, games_to_process, mode, job_store, failure_cache, icon_store, details_store):
+        super().__init__()
+        self.games_to_process = games_to_process
+        self.mode = mode
+        self.stores = (job_store, failure_cache, icon_store, details_store)
+
+    def run(self):
+        self.finished_signal.emit(plan_fetch(self.games_to_process, self.mode, *self.stores))
+
 class SteamGameFetcher(QThread):
+    """Runs a SteamFetchPipeline in a background thread and relays its progress as signals"""
     progress_signal = Signal(str, str, str, dict, str)
     finished_signal = Signal(list)
     update_text_signal = Signal(str)
     
-    REQUEST_TIMEOUT = 10
-    
-    def __init__(self, games_dict, icons_folder, update_reviews_only=False, batch_mode=False):
+    def __init__(self, games_dict, icons_folder, mode="missing", batch_mode=False, job_store=None, failure_cache=None,
+                 icon_store=None, details_store=None, plan=None):
         super().__init__()
-        self.games_dict = games_dict
-        self.icons_folder = icons_folder
-        self.running = True
-        self.failed_titles = []
-        self.update_reviews_only = update_reviews_only
         self.batch_mode = batch_mode
+        self.games_dict = games_dict
+        self.mode = mode
+        self.stores = (job_store, failure_cache, icon_store, details_store)
+        self.pipeline = create_pipeline(
+            games_dict,
+            icons_folder,
+            mode,
+            plan=plan,
+            job_store=job_store,
+            failure_cache=failure_cache,
+            icon_store=icon_store,
+            details_store=details_store,
+            on_progress=self.progress_signal.emit,
+            on_status=self.update_text_signal.emit
+        )
+
+    @property
+    def running(self):
+        return self.pipeline.running
+
+    @property
+    def failed_titles(self):
+        return self.pipeline.failed_titles
+
+    @property
+    def skipped_titles(self):
+        return self.pipeline.skipped_titles
+
+    @property
+    def uncertain_matches(self):
+        return self.pipeline.uncertain_matches
+
+    @property
+    def telemetry(self):
+        return self.pipeline.telemetry
 
     def stop(self):
-        self.running = False
+        self.pipeline.cancel()
 
-    def run(self):
-        Path(self.icons_folder).mkdir(parents=True, exist_ok=True)
-        
-        total_games = len(self.games_dict)
-        current_game = 0
-        
-        for game_id, game_data in self.games_dict.items():
-            if not self.running:
-                self.update_text_signal.emit("Fetch operation canceled!")
-                break
-
-            current_game += 1
-            title = game_data.get("title", "Unknown")
-            self.update_text_signal.emit(f"Fetching ({current_game}/{total_games}):\n{title}")
-
-            try:
-                if self.update_reviews_only:
-                    handled, already_failed = self._process_reviews_only(game_id, game_data)
-                    if handled:
-                        continue
-                    if already_failed:
-                        # Already added to failed_titles, skip adding again
-                        continue
-                    
-                app_id, need_title_search = self._get_valid_app_id(game_data)
-                
-                if need_title_search:
-                    self._search_by_title(game_id, game_data)
-                else:
-                    icon_path = game_data.get("icon_path", "")
-                    icon_missing = not icon_path or not os.path.exists(icon_path)
-                    review_missing = "review_data" not in game_data
-                    developer_missing = "developer" not in game_data
-                    
-                    if icon_missing or review_missing or developer_missing:
-                        new_icon_path = ""
-                        if icon_missing:
-                            new_icon_path = self.fetch_game_icon(app_id) or ""
-                        
-                        developer = ""
-                        if developer_missing:
-                            developer = self.fetch_game_developer(app_id) or ""
-                        
-                        if review_missing or (icon_missing and new_icon_path):
-                            review_data = self.fetch_steam_reviews(app_id) or {}
-                            self.progress_signal.emit(game_id, app_id, new_icon_path, review_data, developer)
-                        elif (icon_missing and new_icon_path) or developer_missing:
-                            self.progress_signal.emit(game_id, app_id, new_icon_path, {}, developer)
-                    
-            except Exception as e:
-                logging.error(f" fetching data for {title}: {e}")
-                # Only add to failed_titles if not already present
-                if title not in self.failed_titles:
-                    self.failed_titles.append(title)
-
-        self.finished_signal.emit(self.failed_titles)
-    
-    def _process_reviews_only(self, game_id, game_data):
-        app_id = game_data.get("app_id", "").strip()
-        if app_id:
-            review_data = self.fetch_steam_reviews(app_id)
-            if review_data:
-                self.progress_signal.emit(game_id, app_id, game_data.get("icon_path", ""), review_data, "")
-                return True, False  # handled, not failed
-            else:
-                if game_data["title"] not in self.failed_titles:
-                    self.failed_titles.append(game_data["title"])
-                return False, True  # not handled, already failed
-        else:
-            if game_data["title"] not in self.failed_titles:
-                self.failed_titles.append(game_data["title"])
-            return False, True  # not handled, already failed
-        
-    def _get_valid_app_id(self, game_data):
-        app_id = game_data.get("app_id", "").strip()
-        if not app_id:
-            return None, True
-            
-        try:
-            url = f"https://store.steampowered.com/api/appdetails?appids={app_id}"
-            response = requests.get(url, timeout=self.REQUEST_TIMEOUT)
-            data = response.json()
-            
-            if app_id not in data or not data[app_id]["success"]:
-                return None, True
-                
-            old_app_id = game_data.get("_previous_app_id", "")
-            game_data["_previous_app_id"] = app_id
-            
-            if old_app_id and old_app_id != app_id and "review_data" in game_data:
-                game_data.pop("review_data", None)
-                
-            return app_id, False
-            
-        except Exception as e:
-            logging.error(f" validating app_id {app_id}: {e}")
-            return None, True
-    
-    def _search_by_title(self, game_id, game_data):
-        try:
-            title = game_data["title"]
-            search_url = f"https://store.steampowered.com/api/storesearch/?term={title}&l=english&cc=US"
-            response = requests.get(search_url, timeout=self.REQUEST_TIMEOUT)
-            data = response.json()
-
-            if data.get("total", 0) > 0:
-                items = data["items"]
-                # Try to find the best match
-                # 1. Exact match (case-insensitive)
-                exact_matches = [item for item in items if item["name"].strip().lower() == title.strip().lower()]
-                if exact_matches:
-                    best_item = exact_matches[0]
-                else:
-                    # 2. Closest match using difflib
-                    names = [item["name"] for item in items]
-                    close_matches = difflib.get_close_matches(title, names, n=1, cutoff=0.7)
-                    if close_matches:
-                        best_item = next(item for item in items if item["name"] == close_matches[0])
-                    else:
-                        # 3. Fallback to first result
-                        best_item = items[0]
-
-                app_id = str(best_item["id"])
-                icon_path = self.fetch_game_icon(app_id) or ""
-                review_data = self.fetch_steam_reviews(app_id) or {}
-                developer = self.fetch_game_developer(app_id) or ""
-                self.progress_signal.emit(game_id, app_id, icon_path, review_data, developer)
-            else:
-                self.failed_titles.append(title)
-        except Exception as e:
-            logging.error(f" searching for title {game_data['title']}: {e}")
-            self.failed_titles.append(game_data['title'])
-
-    def fetch_game_icon(self, app_id):
-        if not app_id or app_id.strip() == "":
-            return None
-            
-        try:
-            details_url = f"https://store.steampowered.com/api/appdetails?appids={app_id}"
-            response = requests.get(details_url, timeout=self.REQUEST_TIMEOUT)
-            details = response.json()
-            
-            if app_id in details and details[app_id]["success"]:
-                icon_url = details[app_id]["data"]["header_image"]
-                icon_path = os.path.join(self.icons_folder, f"{app_id}.jpg")
-                
-                icon_response = requests.get(icon_url, timeout=self.REQUEST_TIMEOUT)
-                with open(icon_path, 'wb') as f:
-                    f.write(icon_response.content)
-                
-                return icon_path
-        except Exception as e:
-            logging.error(f" fetching icon for app_id {app_id}: {e}")
-        
-        return None
-        
-    def fetch_steam_reviews(self, app_id):
-        try:
-            api_url = f"https://store.steampowered.com/appreviews/{app_id}?json=1&purchase_type=all&language=all&review_type=all&filter_by=summary"
-            api_response = requests.get(api_url, timeout=self.REQUEST_TIMEOUT)
-            
-            if api_response.status_code == 200:
-                api_data = api_response.json()
-                
-                if api_data.get('success') == 1 and 'query_summary' in api_data:
-                    summary = api_data['query_summary']
-                    review_count = summary.get('total_reviews', 0)
-                    rating_text = summary.get('review_score_desc', '')
-                    
-                    if rating_text:
-                        return {
-                            'rating_text': rating_text,
-                            'review_count': review_count
-                        }
-            
-            url = f"https://store.steampowered.com/app/{app_id}/"
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            
-            response = requests.get(url, headers=headers, timeout=self.REQUEST_TIMEOUT)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            if soup.select('.agegate_text_container, .agegate_birthday_selector, #app_agegate'):
-                session = bypass_age_gate(app_id)
-                response = session.get(url, headers=headers)
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                if soup.select('.agegate_text_container, .agegate_birthday_selector, #app_agegate'):
-                    return {
-                        'rating_text': 'Age Restricted (Unable to Bypass)',
-                        'review_count': None,
-                        'age_restricted': True
-                    }
-            
-            if response.status_code != 200:
-                return None
-            
-            review_summary_divs = soup.select('div.user_reviews_summary_row')
-            if not review_summary_divs:
-                review_summary_divs = soup.select('.game_review_summary')
-                if not review_summary_divs:
-                    return None
-            
-            all_reviews_div = None
-            for div in review_summary_divs:
-                if hasattr(div, 'text') and 'All Reviews' in div.text:
-                    all_reviews_div = div
-                    break
-                if hasattr(div, 'get') and div.get('data-tooltip-html'):
-                    all_reviews_div = div
-                    break
-            
-            if not all_reviews_div:
-                if len(review_summary_divs) > 1:
-                    all_reviews_div = review_summary_divs[1]
-                elif review_summary_divs:
-                    all_reviews_div = review_summary_divs[0]
-                else:
-                    return None
-            
-            review_text = all_reviews_div
-            
-            if hasattr(all_reviews_div, 'select_one'):
-                summary_span = all_reviews_div.select_one('span.game_review_summary')
-                if summary_span:
-                    review_text = summary_span
-            
-            if hasattr(review_text, 'text'):
-                rating_text = review_text.text.strip()
-            else:
-                rating_text = str(review_text).strip()
-            
-            tooltip_html = None
-            if hasattr(review_text, 'get') and review_text.get('data-tooltip-html'):
-                tooltip_html = review_text.get('data-tooltip-html')
-            
-            if not tooltip_html and hasattr(all_reviews_div, 'select_one'):
-                tooltip_elements = all_reviews_div.select('[data-tooltip-html]')
-                if tooltip_elements:
-                    tooltip_html = tooltip_elements[0].get('data-tooltip-html')
-            
-            if not tooltip_html:
-                review_stats = soup.select('.user_reviews_count')
-                for stat in review_stats:
-                    if hasattr(stat, 'text') and "reviews" in stat.text.lower():
-                        tooltip_html = stat.text
-            
-            count = None
-            
-            if tooltip_html:
-                count_patterns = [
-                    r'the ([0-9,]+) user reviews',
-                    r'([0-9,]+) reviews',
-                    r'([0-9,.]+) user reviews',
-                    r'of the ([0-9,]+) user',
-                    r'based on ([0-9,]+)'
-                ]
-                
-                for pattern in count_patterns:
-                    match = re.search(pattern, tooltip_html)
-                    if match:
-                        try:
-                            count_str = match.group(1).replace(',', '').replace('.', '')
-                            count = int(count_str)
-                            break
-                        except ValueError:
-                            continue
-            
-            if count is None:
-                count_elements = soup.select('.user_reviews_count')
-                for element in count_elements:
-                    text = element.text if hasattr(element, 'text') else str(element)
-                    match = re.search(r'([0-9,]+) reviews', text, re.IGNORECASE)
-                    if match:
-                        try:
-                            count = int(match.group(1).replace(',', ''))
-                            break
-                        except ValueError:
-                            continue
-            
-            return {
-                'rating_text': rating_text,
-                'review_count': count
-            }
-                
-        except Exception as e:
-            logging.error(f" fetching reviews for app_id {app_id}: {e}")
-            
-        return None
+    def set_priorities(self, priorities):
+        self.pipeline.set_priorities(priorities)
 
-    def fetch_game_developer(self, app_id):
-        if not app_id or app_id.strip() == "":
-            return None
-            
-        try:
-            details_url = f"https://store.steampowered.com/api/appdetails?appids={app_id}"
-            response = requests.get(details_url, timeout=self.REQUEST_TIMEOUT)
-            details = response.json()
-            
-            if app_id in details and details[app_id]["success"]:
-                developers = details[app_id]["data"].get("developers", [])
-                if developers:
-                    return ", ".join(developers)
-            
-            url = f"https://store.steampowered.com/app/{app_id}/"
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            
-            response = requests.get(url, headers=headers, timeout=self.REQUEST_TIMEOUT)
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                dev_div = soup.select_one('.dev_row .summary')
-                if dev_div:
-                    return dev_div.text.strip()
-                    
-        except Exception as e:
-            logging.error(f" fetching developer for app_id {app_id}: {e}")
-        
-        return None
+    def pause(self):
+        self.pipeline.pause()
 
-def bypass_age_gate(app_id):
-    session = requests.Session()
-    
-    session.cookies.set('birthtime', '-473392799')
-    session.cookies.set('mature_content', '1')
-    
-    data = {
-        'snr': '1_agecheck_agecheck__age-gate',
-        'ageDay': '1',
-        'ageMonth': '1',
-        'ageYear': '1970'
-    }
-    
-    verify_url = f'https://store.steampowered.com/agecheckset/app/{app_id}/'
-    session.post(verify_url, data=data)
-    
-    return session
+    def resume(self):
+        self.pipeline.resume()
+
+    @property
+    def paused(self):
+        return self.pipeline.paused
+
+    def run(self):
+        if self.pipeline.plan is None:
+            # Planned here rather than on the UI thread, see FetchPlanThread
+            self.update_text_signal.emit("Planning fetch...")
+            self.pipeline.plan = plan_fetch(self.games_dict, self.mode, *self.stores)
+        self.pipeline.run()
+        self.finished_signal.emit(self.pipeline.failed_titles)
 
 def get_rating_color(rating_text, percentage=None):
     if not rating_text:
@@ -634,7 +619,7 @@ def handle_browser_open(games_data, selected_items, row_to_unique_id, parent=Non
         )
         dialog.exec()
 
-def handle_steam_fetch_finished(fetch_manager, failed_titles, parent=None, was_canceled=False):
+def handle_steam_fetch_finished(fetch_manager, failed_titles, parent=None, was_canceled=False, uncertain_matches=None, skipped_titles=None):
     """Handle completion of Steam fetch operation"""
     fetch_manager.update_status_text("")
     
@@ -647,14 +632,17 @@ def handle_steam_fetch_finished(fetch_manager, failed_titles, parent=None, was_c
         message = "Steam Data Fetch Results:"
         footer_text = "Fetch operation was canceled.\nPartial data has been applied to your games."
     
-    if failed_titles:
+    # Games that failed on an earlier run and weren't requested again
+    skipped_list = [f"{title} - skipped (known failure)" for title in skipped_titles or []]
+    
+    if failed_titles or skipped_list:
         if was_canceled:
             # Just show the failed titles in the scrollable area
-            game_list = failed_titles
+            game_list = failed_titles + skipped_list
             footer_text = "Fetch operation was canceled.\nPartial data has been applied to your games."
         else:
             # Just show the failed titles in the scrollable area
-            game_list = failed_titles
+            game_list = failed_titles + skipped_list
             footer_text = "Don't worry! You can still add the AppID manually and try again."
         
         # Use the scrollable dialog with footer text
@@ -675,4 +663,15 @@ def handle_steam_fetch_finished(fetch_manager, failed_titles, parent=None, was_c
             content=["No games failed to process."],
             footer_text="Fetch operation was canceled.\nPartial data has been applied to your games."
         )
+        dialog.exec()
+
+    if uncertain_matches:
+        # Titles that were matched to a store entry with low confidence
+        dialog, _ = create_scrollable_message_dialog(
+            parent=parent,
+            title="Uncertain Matches",
+            message="These games were matched with low confidence:",
+            content=uncertain_matches,
+            footer_text="If an AppID looks wrong, you can correct it in the Edit menu."
+        )
         dialog.exec()
\ No newline at end of file
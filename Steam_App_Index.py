@@ -0,0 +1,211 @@
+# Steam_App_Index.py
+import os
+import re
+import gzip
+import json
+import logging
+import threading
+import requests
+from array import array
+from collections import Counter
+from pathlib import Path
+from Config import CONFIG_DIR
+from Title_Matcher import normalize_title, title_key, title_trigrams, normalized_similarity, CONFIDENT_SCORE
+
+APP_INDEX_FILE = CONFIG_DIR / "steam_app_index.json.gz"
+APP_LIST_PATH = "/ISteamApps/GetAppList/v2/"
+# Test servers are set through STEAMKM_STEAM_API_URL only, never the importable config
+API_URL = os.environ.get("STEAMKM_STEAM_API_URL", "https://api.steampowered.com")
+APP_LIST_URL = API_URL.rstrip("/") + APP_LIST_PATH
+MAX_QUERY_TRIGRAMS = 8  # Only the rarest trigrams of a title are used to collect candidates
+DOWNLOAD_CHUNK_SIZE = 262144
+_APP_ID_PATTERN = re.compile(r"[0-9]+")
+
+def is_app_id(app_id):
+    """True for an all-digit AppID, anything else from a response is never used, it ends up in file paths"""
+    return bool(_APP_ID_PATTERN.fullmatch(str(app_id)))
+
+def parse_app_list(data):
+    """
+    Extracts (app_id, name) pairs from the supported app-list layouts:
+    GetAppList ({"applist": {"apps": [...]}}), IStoreService ({"response": {"apps": [...]}}),
+    a plain list of {"appid", "name"} objects, or a {app_id: name} mapping.
+    """
+    if isinstance(data, dict):
+        if "applist" in data:
+            data = data["applist"].get("apps", [])
+        elif "response" in data:
+            data = data["response"].get("apps", [])
+        else:
+            return [(str(app_id), name) for app_id, name in data.items() if name]
+    return [(str(app["appid"]), app["name"]) for app in data if app.get("name") and "appid" in app]
+
+class SteamAppIndex:
+    """
+    Offline index of Steam app names to AppIDs, used to resolve titles without a storesearch request.
+    Exact lookups go through a hash of normalized names, near misses through a trigram candidate index.
+    """
+    def __init__(self, apps=None):
+        self.app_ids = []
+        self.names = []
+        self._by_name = {}
+        self._known_ids = set()
+        self._trigrams = None
+        self._lock = threading.Lock()
+        if apps:
+            self._build(apps)
+
+    def __len__(self):
+        return len(self.app_ids)
+
+    def _build(self, apps):
+        self.app_ids = []
+        self.names = []
+        self._by_name = {}
+        for app_id, name in apps:
+            normalized = normalize_title(name)
+            if not normalized or not is_app_id(app_id):
+                continue
+            index = len(self.app_ids)
+            self.app_ids.append(app_id)
+            self.names.append(name)
+            self._by_name.setdefault(normalized, []).append(index)
+        self._known_ids = set(self.app_ids)
+        self._trigrams = None
+
+    def _trigram_index(self):
+        # Built on first fuzzy lookup, exact lookups never need it
+        with self._lock:
+            if self._trigrams is None:
+                trigrams = {}
+                for normalized, indices in self._by_name.items():
+                    for trigram in title_trigrams(normalized):
+                        trigrams.setdefault(trigram, array("I")).append(indices[0])
+                self._trigrams = trigrams
+            return self._trigrams
+
+    def has_app_id(self, app_id):
+        return str(app_id) in self._known_ids
+
+    def lookup(self, title):
+        """
+        Resolve a title to an AppID.
+
+        Returns:
+            Tuple of (app_id, score) where score is 1.0 for an exact normalized match, edition included,
+            or (None, best score) if no candidate reaches CONFIDENT_SCORE
+        """
+        normalized = normalize_title(title)
+        if not normalized:
+            return None, 0.0
+
+        exact = self._by_name.get(normalized)
+        if exact:
+            # A literal name match beats apps that only normalize the same
+            literal = [i for i in exact if title_key(self.names[i]) == title_key(title)]
+            # Several apps can share a name (soundtracks, demos); the lowest AppID is usually the base game
+            return min((self.app_ids[i] for i in literal or exact), key=int), 1.0
+
+        query = title_trigrams(normalized)
+        trigrams = self._trigram_index()
+        postings = sorted((trigrams[t] for t in query if t in trigrams), key=len)[:MAX_QUERY_TRIGRAMS]
+        if not postings:
+            return None, 0.0
+
+        candidates = Counter()
+        for posting in postings:
+            candidates.update(posting)
+
+        best_name, best_score = None, 0.0
+        for index, _ in candidates.most_common(50):
+            candidate_name = normalize_title(self.names[index])
+            score = normalized_similarity(normalized, candidate_name)
+            if score > best_score:
+                best_name, best_score = candidate_name, score
+
+        # Uncertain offline matches fall back to the network search
+        if best_name is None or best_score < CONFIDENT_SCORE:
+            return None, best_score
+        return min((self.app_ids[i] for i in self._by_name[best_name]), key=int), best_score
+
+    def save(self, path=APP_INDEX_FILE):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix(".tmp")
+        with gzip.open(temp_path, "wt", encoding="utf-8") as f:
+            json.dump([[app_id, name] for app_id, name in zip(self.app_ids, self.names)], f, separators=(",", ":"))
+        temp_path.replace(path)
+
+    @classmethod
+    def load(cls, path=APP_INDEX_FILE):
+        """Load the saved index, returning None if it doesn't exist or is unreadable"""
+        path = Path(path)
+        if not path.exists():
+            return None
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                return cls([(str(app_id), name) for app_id, name in json.load(f)])
+        except (OSError, ValueError) as e:
+            logging.error(f" loading Steam app index: {e}")
+            return None
+
+    @classmethod
+    def from_app_list_file(cls, file_path):
+        with open(file_path, "r", encoding="utf-8") as f:
+            return cls(parse_app_list(json.load(f)))
+
+_shared_index = None
+_shared_index_mtime = None  # mtime of the index file when it was last loaded, 0 if it didn't exist, None before the first load
+_shared_lock = threading.Lock()
+
+def _index_file_mtime():
+    try:
+        return APP_INDEX_FILE.stat().st_mtime
+    except OSError:
+        return 0
+
+def get_app_index():
+    """
+    Returns the saved app index, loading it once per process and again only if the file changes.
+    None if no index has been imported, which is remembered as well until a file appears.
+    """
+    global _shared_index, _shared_index_mtime
+    mtime = _index_file_mtime()
+    with _shared_lock:
+        if mtime != _shared_index_mtime:
+            _shared_index = SteamAppIndex.load() if mtime else None
+            _shared_index_mtime = mtime
+        return _shared_index
+
+def _share_index(index):
+    global _shared_index, _shared_index_mtime
+    index.save()
+    with _shared_lock:
+        _shared_index = index
+        _shared_index_mtime = _index_file_mtime()
+
+def import_app_list(file_path):
+    """Build the app index from a locally provided app-list JSON file and save it"""
+    index = SteamAppIndex.from_app_list_file(file_path)
+    _share_index(index)
+    return len(index)
+
+def download_app_list(url=APP_LIST_URL, timeout=60, is_canceled=None):
+    """
+    Download the full Steam app list, build the app index from it and save it.
+
+    Returns:
+        Number of apps in the index, None if is_canceled returned True before it was saved
+    """
+    content = bytearray()
+    with requests.get(url, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+            if is_canceled and is_canceled():
+                return None
+            content.extend(chunk)
+    index = SteamAppIndex(parse_app_list(json.loads(content)))
+    if is_canceled and is_canceled():
+        return None
+    _share_index(index)
+    return len(index)
@@ -0,0 +1,357 @@
+# Store_Page_Parser.py
+import re
+import sys
+import codecs
+import logging
+import threading
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from html.parser import HTMLParser
+
+STREAM_CHUNK_SIZE = 16384
+AGE_GATE_CLASSES = {"agegate_text_container", "agegate_birthday_selector"}
+AGE_GATE_ID = "app_agegate"
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+COUNT_PATTERNS = [re.compile(pattern) for pattern in (
+    r'the ([0-9,]+) user reviews',
+    r'([0-9,]+) reviews',
+    r'([0-9,.]+) user reviews',
+    r'of the ([0-9,]+) user',
+    r'based on ([0-9,]+)'
+)]
+REVIEWS_COUNT_PATTERN = re.compile(r'([0-9,]+) reviews', re.IGNORECASE)
+
+class _Capture:
+    """Text and attributes of one element, collected until its end tag"""
+    def __init__(self, tag, attrs):
+        self.tag = tag
+        self.attrs = attrs
+        self.depth = 1
+        self.parts = []
+        self.children = []  # Captures of interesting descendants
+
+    @property
+    def text(self):
+        return "".join(self.parts)
+
+class StorePageParser(HTMLParser):
+    """
+    Selective tokenizer for Steam store pages. Only the review summary rows, review counts,
+    the developer row and age gate markers are captured, and feeding stops as soon as
+    everything that was asked for has been seen, so most of the page is never parsed.
+    """
+    def __init__(self, want_reviews=True, want_developer=True):
+        super().__init__(convert_charrefs=True)
+        self.want_reviews = want_reviews
+        self.want_developer = want_developer
+        self.age_gate = False
+        self.review_rows = []  # div.user_reviews_summary_row
+        self.review_summaries = []  # .game_review_summary outside of review rows
+        self.review_counts = []  # .user_reviews_count texts
+        self.developer = None  # First .dev_row .summary text
+        self._active = []
+        self._row = None
+        self._dev_row = None
+
+    @property
+    def done(self):
+        if self.age_gate:
+            return True
+        if self.want_developer and self.developer is None:
+            return False
+        if self.want_reviews:
+            # The row the review extraction will pick must be complete and carry a tooltip,
+            # otherwise the .user_reviews_count fallback further down the page is needed
+            row = _select_review_row(self.review_rows, complete_only=True)
+            if row is None or not _review_tooltip(row):
+                return False
+        return True
+
+    def _open(self, tag, attrs, parent=None):
+        capture = _Capture(tag, attrs)
+        self._active.append(capture)
+        if parent is not None:
+            parent.children.append(capture)
+        return capture
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = set((attrs.get("class") or "").split())
+        if classes & AGE_GATE_CLASSES or attrs.get("id") == AGE_GATE_ID:
+            self.age_gate = True
+
+        if tag not in VOID_TAGS:
+            for capture in self._active:
+                capture.depth += 1
+
+        if self.want_reviews:
+            if tag == "div" and "user_reviews_summary_row" in classes and self._row is None:
+                self._row = self._open(tag, attrs)
+                self.review_rows.append(self._row)
+            elif self._row is not None and ("game_review_summary" in classes or "data-tooltip-html" in attrs):
+                self._open(tag, attrs, self._row)
+            elif "game_review_summary" in classes:
+                self.review_summaries.append(self._open(tag, attrs))
+            if "user_reviews_count" in classes:
+                self.review_counts.append(self._open(tag, attrs))
+
+        if self.want_developer and self.developer is None:
+            if "dev_row" in classes and self._dev_row is None:
+                self._dev_row = self._open(tag, attrs)
+            elif self._dev_row is not None and "summary" in classes:
+                self._open(tag, attrs, self._dev_row)
+
+        if tag in VOID_TAGS:
+            # Void elements never get an end tag
+            self._close_finished()
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS:
+            return
+        for capture in self._active:
+            capture.depth -= 1
+        self._close_finished()
+
+    def _close_finished(self):
+        finished = [capture for capture in self._active if capture.depth <= 0]
+        if not finished:
+            return
+        self._active = [capture for capture in self._active if capture.depth > 0]
+        for capture in finished:
+            capture.depth = 0
+            if capture is self._row:
+                self._row = None
+            elif capture is self._dev_row:
+                self._dev_row = None
+            elif self._dev_row is not None and capture in self._dev_row.children and self.developer is None:
+                self.developer = capture.text.strip()
+
+    def handle_data(self, data):
+        for capture in self._active:
+            capture.parts.append(data)
+
+    def feed_chunks(self, chunks, encoding="utf-8"):
+        """Feed raw byte chunks until everything requested was found. Returns True if it stopped early."""
+        decoder = codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+        for chunk in chunks:
+            self.feed(decoder.decode(chunk))
+            if self.done:
+                return True
+        self.feed(decoder.decode(b"", final=True))
+        self.close()
+        return False
+
+def _select_review_row(rows, complete_only=False):
+    """The first row mentioning All Reviews or carrying a tooltip, like the store page's own layout"""
+    for row in rows:
+        if complete_only and row.depth > 0:
+            return None
+        if "All Reviews" in row.text or row.attrs.get("data-tooltip-html"):
+            return row
+    return None
+
+def _row_summary(row):
+    for child in row.children:
+        if child.tag == "span" and "game_review_summary" in (child.attrs.get("class") or "").split():
+            return child
+    return None
+
+def _review_tooltip(row):
+    # The summary span's tooltip when there is a summary span, otherwise the row's own,
+    # then the first descendant that has one
+    summary = _row_summary(row)
+    tooltip_html = (summary or row).attrs.get("data-tooltip-html")
+    if not tooltip_html:
+        for child in row.children:
+            if child.attrs.get("data-tooltip-html"):
+                return child.attrs["data-tooltip-html"]
+    return tooltip_html
+
+def parse_review_count(tooltip_html):
+    for pattern in COUNT_PATTERNS:
+        match = pattern.search(tooltip_html)
+        if match:
+            try:
+                return int(match.group(1).replace(',', '').replace('.', ''))
+            except ValueError:
+                continue
+    return None
+
+def extract_review_data(parser):
+    """
+    Build the review dict from a fed parser.
+
+    Returns:
+        Dict with rating_text and review_count, or None if the page has no review summary
+    """
+    rows = parser.review_rows or parser.review_summaries
+    if not rows:
+        return None
+
+    all_reviews_row = _select_review_row(rows)
+    if all_reviews_row is None:
+        all_reviews_row = rows[1] if len(rows) > 1 else rows[0]
+    rating_text = (_row_summary(all_reviews_row) or all_reviews_row).text.strip()
+    tooltip_html = _review_tooltip(all_reviews_row)
+
+    if not tooltip_html:
+        for count in parser.review_counts:
+            if "reviews" in count.text.lower():
+                tooltip_html = count.text
+
+    count = parse_review_count(tooltip_html) if tooltip_html else None
+
+    if count is None:
+        for element in parser.review_counts:
+            match = REVIEWS_COUNT_PATTERN.search(element.text)
+            if match:
+                try:
+                    count = int(match.group(1).replace(',', ''))
+                    break
+                except ValueError:
+                    continue
+
+    return {
+        'rating_text': rating_text,
+        'review_count': count
+    }
+
+def parse_store_page(html, want_reviews=True, want_developer=True, encoding="utf-8"):
+    """Parse a complete page given as bytes or text. Returns the fed StorePageParser."""
+    parser = StorePageParser(want_reviews, want_developer)
+    if isinstance(html, str):
+        html = html.encode(encoding)
+    parser.feed_chunks((html[i:i + STREAM_CHUNK_SIZE] for i in range(0, len(html), STREAM_CHUNK_SIZE)), encoding)
+    return parser
+
+def page_data(parser):
+    """The parsed results as a plain dict, the form they are passed between processes in"""
+    review_data = None
+    if parser.want_reviews and not parser.age_gate:
+        review_data = extract_review_data(parser)
+    return {
+        'age_gate': parser.age_gate,
+        'review_data': review_data,
+        'developer': parser.developer
+    }
+
+def parse_page_data(html, want_reviews=True, want_developer=True, encoding="utf-8"):
+    """Parse raw page bytes into page_data, used as the task of the parse pool"""
+    return page_data(parse_store_page(html, want_reviews, want_developer, encoding))
+
+_parse_pool = None
+_parse_pool_processes = 0
+_parse_pool_lock = threading.Lock()
+
+def get_parse_pool(processes):
+    """
+    Returns the shared process pool for page parsing, started on first use and restarted
+    if the number of processes changed. None when processes is 0 (parse in the calling thread).
+    """
+    global _parse_pool, _parse_pool_processes
+    with _parse_pool_lock:
+        if processes != _parse_pool_processes and _parse_pool is not None:
+            _parse_pool.shutdown(wait=False, cancel_futures=True)
+            _parse_pool = None
+        _parse_pool_processes = processes
+        if processes > 0 and _parse_pool is None:
+            _parse_pool = ProcessPoolExecutor(max_workers=processes)
+        return _parse_pool
+
+def shutdown_parse_pool():
+    global _parse_pool, _parse_pool_processes
+    with _parse_pool_lock:
+        if _parse_pool is not None:
+            _parse_pool.shutdown(wait=False, cancel_futures=True)
+        _parse_pool = None
+        _parse_pool_processes = 0
+
+def parse_page_in_pool(pool, html, want_reviews=True, want_developer=True, encoding="utf-8"):
+    """Parse a downloaded page in the process pool, falling back to this thread if the pool broke"""
+    try:
+        return pool.submit(parse_page_data, html, want_reviews, want_developer, encoding).result()
+    except (BrokenProcessPool, RuntimeError) as e:
+        logging.error(f" parsing store page in process pool: {e}")
+        shutdown_parse_pool()
+        return parse_page_data(html, want_reviews, want_developer, encoding)
+
+def _reference_extract(html):
+    """The previous BeautifulSoup html.parser extraction, kept to check the benchmark outputs match"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    dev_div = soup.select_one('.dev_row .summary')
+    developer = dev_div.text.strip() if dev_div else None
+    rows = soup.select('div.user_reviews_summary_row') or soup.select('.game_review_summary')
+    if not rows:
+        return None, developer
+    row = next((div for div in rows if 'All Reviews' in div.text or div.get('data-tooltip-html')), None)
+    if row is None:
+        row = rows[1] if len(rows) > 1 else rows[0]
+    summary = row.select_one('span.game_review_summary') or row
+    tooltip_html = summary.get('data-tooltip-html')
+    if not tooltip_html:
+        elements = row.select('[data-tooltip-html]')
+        tooltip_html = elements[0].get('data-tooltip-html') if elements else None
+    if not tooltip_html:
+        for stat in soup.select('.user_reviews_count'):
+            if 'reviews' in stat.text.lower():
+                tooltip_html = stat.text
+    count = parse_review_count(tooltip_html) if tooltip_html else None
+    if count is None:
+        for element in soup.select('.user_reviews_count'):
+            match = REVIEWS_COUNT_PATTERN.search(element.text)
+            if match:
+                count = int(match.group(1).replace(',', ''))
+                break
+    return {'rating_text': summary.text.strip(), 'review_count': count}, developer
+
+def benchmark(corpus_dir, rounds=3, processes=0):
+    """
+    Time the previous BeautifulSoup extraction against StorePageParser on a folder of
+    saved store pages (*.html) and check that both produce the same review and developer data.
+    With processes above 0 the parse pool is timed as well.
+    """
+    from pathlib import Path
+    pages = [path.read_bytes() for path in sorted(Path(corpus_dir).glob("*.html"))]
+    if not pages:
+        print(f"No .html pages found in {corpus_dir}")
+        return
+
+    def timed(extract):
+        start = perf_counter()
+        for _ in range(rounds):
+            results = [extract(page) for page in pages]
+        return (perf_counter() - start) / rounds, results
+
+    def streaming_extract(page):
+        parser = parse_store_page(page)
+        return extract_review_data(parser), parser.developer
+
+    reference_time, reference_results = timed(lambda page: _reference_extract(page.decode("utf-8", "replace")))
+    streaming_time, streaming_results = timed(streaming_extract)
+    mismatches = sum(1 for a, b in zip(reference_results, streaming_results) if a != b)
+
+    total_kb = sum(len(page) for page in pages) / 1024
+    print(f"{len(pages)} pages, {total_kb:,.0f} KB")
+    print(f"BeautifulSoup html.parser: {reference_time * 1000:,.1f} ms")
+    print(f"StorePageParser:           {streaming_time * 1000:,.1f} ms ({reference_time / streaming_time:.1f}x faster)")
+    print(f"Mismatched results: {mismatches}")
+
+    if processes > 0:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            list(pool.map(parse_page_data, pages))  # Start the worker processes before timing
+            start = perf_counter()
+            for _ in range(rounds):
+                list(pool.map(parse_page_data, pages))
+            pool_time = (perf_counter() - start) / rounds
+        print(f"Parse pool ({processes} processes): {pool_time * 1000:,.1f} ms")
+
+if __name__ == "__main__":
+    benchmark(sys.argv[1] if len(sys.argv) > 1 else ".", processes=int(sys.argv[2]) if len(sys.argv) > 2 else 0)
@@ -0,0 +1,150 @@
+# Title_Matcher.py
+import re
+import unicodedata
+from collections import namedtuple
+from functools import lru_cache
+
+CONFIDENT_SCORE = 0.9  # Matches at or above this score are taken without flagging
+EDITION_SCORE = 0.85  # Titles differing only in edition suffixes or numeral style, so never confident
+MIN_SCORE = 0.5  # Matches below this score are treated as no match at all
+
+_SYMBOLS_PATTERN = re.compile(r"[™®©]")
+_APOSTROPHE_PATTERN = re.compile(r"['’`]")
+_NON_WORD_PATTERN = re.compile(r"[^a-z0-9]+")
+_EDITION_PATTERN = re.compile(
+    r"\b(?:(?:game of the year|goty|digital deluxe|super deluxe|deluxe|ultimate|definitive|complete|gold|premium|"
+    r"collectors|enhanced|special|standard|anniversary|legendary|platinum|deluxe digital)\s+edition"
+    r"|game of the year|goty|directors cut)\b"
+)
+# "v" and "x" are left out, as standalone words they are as often letters ("Mega Man X") as numerals
+_ROMAN_NUMERALS = {"ii": "2", "iii": "3", "iv": "4", "vi": "6", "vii": "7", "viii": "8", "ix": "9"}
+
+TitleMatch = namedtuple("TitleMatch", ["title", "key", "name", "score", "confident"])
+
+@lru_cache(maxsize=65536)
+def normalize_title(title):
+    """
+    Normalize a title for exact matching: strip trademark symbols, accents and punctuation.
+    Edition suffixes and roman numerals are kept, "Special Edition" is its own Steam app.
+    """
+    title = _SYMBOLS_PATTERN.sub("", title or "")
+    title = unicodedata.normalize("NFKD", title).encode("ascii", "ignore").decode("ascii")
+    title = _APOSTROPHE_PATTERN.sub("", title.lower())
+    title = _NON_WORD_PATTERN.sub(" ", title)
+    return " ".join(title.split())
+
+@lru_cache(maxsize=65536)
+def strip_editions(normalized):
+    """A normalized title without edition suffixes ("deluxe edition", "goty"), only used for fuzzy scoring"""
+    stripped = " ".join(_EDITION_PATTERN.sub(" ", normalized).split())
+    # A title that is nothing but an edition name keeps it
+    return stripped or normalized
+
+@lru_cache(maxsize=65536)
+def base_title(normalized):
+    """A normalized title with roman numerals as digits and editions stripped, only used for fuzzy scoring"""
+    return strip_editions(" ".join(_ROMAN_NUMERALS.get(token, token) for token in normalized.split()))
+
+def title_key(title):
+    """The title with case and spacing evened out, for telling apart games whose titles were actually edited"""
+    return " ".join((title or "").split()).casefold()
+
+@lru_cache(maxsize=65536)
+def title_trigrams(normalized):
+    padded = f"  {normalized} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+@lru_cache(maxsize=65536)
+def title_tokens(normalized):
+    return frozenset(normalized.split())
+
+def _fuzzy_similarity(normalized_a, normalized_b):
+    trigrams_a, trigrams_b = title_trigrams(normalized_a), title_trigrams(normalized_b)
+    tokens_a, tokens_b = title_tokens(normalized_a), title_tokens(normalized_b)
+    trigram_score = 2 * len(trigrams_a & trigrams_b) / (len(trigrams_a) + len(trigrams_b))
+    token_score = 2 * len(tokens_a & tokens_b) / (len(tokens_a) + len(tokens_b)) if tokens_a and tokens_b else 0.0
+    # Identical titles score 1.0, so a near miss is capped just below it
+    return min(0.99, 0.5 * trigram_score + 0.5 * token_score)
+
+def normalized_similarity(normalized_a, normalized_b):
+    """Similarity between two titles that already went through normalize_title"""
+    if normalized_a == normalized_b:
+        return 1.0
+    base_a, base_b = base_title(normalized_a), base_title(normalized_b)
+    if base_a == base_b:
+        return EDITION_SCORE
+    score = _fuzzy_similarity(normalized_a, normalized_b)
+    if base_a != normalized_a or base_b != normalized_b:
+        # Editions and numerals may still explain a near miss, but only up to EDITION_SCORE so search confirms it
+        score = max(score, min(EDITION_SCORE, _fuzzy_similarity(base_a, base_b)))
+    return score
+
+def title_similarity(title_a, title_b):
+    """Similarity between two raw titles from 0.0 to 1.0"""
+    return normalized_similarity(normalize_title(title_a), normalize_title(title_b))
+
+def best_match(title, candidates, min_score=MIN_SCORE):
+    """
+    Find the best candidate for a single title.
+
+    Args:
+        title: The title to match
+        candidates: Iterable of (key, name) pairs, for example (app_id, store name)
+
+    Returns:
+        TitleMatch, or None if no candidate reaches min_score
+    """
+    return match_titles([title], candidates, min_score)[0]
+
+def match_titles(titles, candidates, min_score=MIN_SCORE):
+    """
+    Match many titles against one candidate set in a single pass. Candidate features are
+    computed once and, for larger sets, a trigram index narrows each title to likely candidates.
+
+    Returns:
+        List of TitleMatch (or None when nothing reaches min_score), in the same order as titles
+    """
+    candidates = [(key, name, normalize_title(name)) for key, name in candidates]
+    by_title = {}
+    by_name = {}
+    for position, (_, name, normalized) in enumerate(candidates):
+        by_title.setdefault(title_key(name), position)
+        by_name.setdefault(normalized, position)
+
+    trigram_index = None
+    if len(candidates) > 64:
+        trigram_index = {}
+        for normalized, position in by_name.items():
+            for trigram in title_trigrams(normalized):
+                trigram_index.setdefault(trigram, []).append(position)
+
+    results = []
+    for title in titles:
+        normalized = normalize_title(title)
+        # A literal title match wins over another candidate that only normalizes the same
+        position = by_title.get(title_key(title))
+        if position is None or candidates[position][2] != normalized:
+            position = by_name.get(normalized)
+        if position is not None:
+            key, name, _ = candidates[position]
+            results.append(TitleMatch(title, key, name, 1.0, True))
+            continue
+
+        if trigram_index is None:
+            positions = by_name.values()
+        else:
+            positions = {p for t in title_trigrams(normalized) for p in trigram_index.get(t, ())}
+
+        best_position, best_score = None, 0.0
+        for position in positions:
+            score = normalized_similarity(normalized, candidates[position][2])
+            # Ties keep the earlier candidate, which is the more relevant one in search results
+            if score > best_score or (score == best_score and best_position is not None and position < best_position):
+                best_position, best_score = position, score
+
+        if best_position is None or best_score < min_score:
+            results.append(None)
+        else:
+            key, name, _ = candidates[best_position]
+            results.append(TitleMatch(title, key, name, best_score, best_score >= CONFIDENT_SCORE))
+    return results
@@ -7,6 +7,7 @@ import tempfile
 import platform
 import subprocess
 from time import time
+from urllib.parse import urlparse
 from PySide6.QtWidgets import QMessageBox, QDialog, QVBoxLayout, QLabel, QComboBox, QPushButton, QProgressBar, QTextEdit, QApplication, QGroupBox, QHBoxLayout, QCheckBox
 from PySide6.QtCore import Qt, QThread, Signal, QTimer
 from PySide6.QtGui import QIcon, QPixmap, QImage
@@ -20,10 +21,14 @@ import re
 
 logging.basicConfig(level=logging.DEBUG)
 
-GITHUB_URL = "https://api.github.com/repos/AbelSniffel/SteamKM/releases"
-CHANGELOG_URL = "https://raw.githubusercontent.com/AbelSniffel/SteamKM/main/CHANGELOG.md"
+GITHUB_REPO = "AbelSniffel/SteamKM"
 FORCE_DEV_BRANCH_VISIBLE = False # Set to True to force show dev branch without having a github token (aka a public build)
 RUNNING_FROM_SOURCE = not getattr(sys, 'frozen', False)
+# Test servers are set through STEAMKM_GITHUB_API_URL / STEAMKM_GITHUB_RAW_URL only, never the importable config
+GITHUB_API_URL = os.environ.get("STEAMKM_GITHUB_API_URL", "https://api.github.com")
+GITHUB_RAW_URL = os.environ.get("STEAMKM_GITHUB_RAW_URL", "https://raw.githubusercontent.com")
+TOKEN_HOST = "api.github.com"
+DOWNLOAD_HOSTS = ("github.com", "objects.githubusercontent.com", "release-assets.githubusercontent.com")
 
 try:
     sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'SteamKM_DevTools'))
@@ -31,14 +36,27 @@ try:
 except ImportError:
     GITHUB_TOKEN = None
 
+def releases_url():
+    return f"{GITHUB_API_URL.rstrip('/')}/repos/{GITHUB_REPO}/releases"
+
+def changelog_url():
+    return f"{GITHUB_RAW_URL.rstrip('/')}/{GITHUB_REPO}/main/CHANGELOG.md"
+
+def _is_https_host(url, hosts):
+    parsed = urlparse(url)
+    return parsed.scheme == "https" and parsed.hostname in hosts
+
+def github_headers(url):
+    """The token is only ever sent to the GitHub API itself"""
+    return {"Authorization": f"token {GITHUB_TOKEN}"} if GITHUB_TOKEN and _is_https_host(url, (TOKEN_HOST,)) else {}
+
 def github_request(url):
-    headers = {"Authorization": f"token {GITHUB_TOKEN}"} if GITHUB_TOKEN else {}
-    resp = requests.get(url, headers=headers)
+    resp = requests.get(url, headers=github_headers(url))
     resp.raise_for_status()
     return resp
 
 def get_releases():
-    return github_request(GITHUB_URL).json()
+    return github_request(releases_url()).json()
 
 def filter_versions(releases, branch):
     if branch == "release":
@@ -61,7 +79,6 @@ def check_for_updates(config=None):
         return CURRENT_BUILD
 
 def download_update(latest_version, progress_callback):
-    headers = {"Authorization": f"token {GITHUB_TOKEN}"} if GITHUB_TOKEN else {}
     temp_dir = os.path.join(tempfile.gettempdir(), "SteamKM_Update")
     os.makedirs(temp_dir, exist_ok=True)
     try:
@@ -72,6 +89,8 @@ def download_update(latest_version, progress_callback):
                 for asset in release.get("assets", []):
                     if asset.get("name") == "SteamKM.exe":
                         download_url = asset.get("browser_download_url")
+                        if not _is_https_host(download_url or "", DOWNLOAD_HOSTS):
+                            raise Exception(f"Refusing to download the update from {download_url}")
                         file_size = asset.get("size", 0)
                         if not file_size:
                             raise Exception("Failed to get file size.")
@@ -80,8 +99,10 @@ def download_update(latest_version, progress_callback):
                             sys.executable if not RUNNING_FROM_SOURCE else os.path.join(os.path.dirname(__file__), "SteamKM.exe")
                         )
                         temp_update_path = os.path.join(temp_dir, f"SteamKM_{latest_version}.exe")
-                        with open(temp_update_path, 'wb') as f, requests.get(download_url, headers=headers, stream=True) as r:
+                        with open(temp_update_path, 'wb') as f, requests.get(download_url, stream=True) as r:
                             r.raise_for_status()
+                            if not _is_https_host(r.url, DOWNLOAD_HOSTS):
+                                raise Exception(f"Refusing to download the update from {r.url}")
                             downloaded_size = 0
                             for chunk in r.iter_content(chunk_size=8192):
                                 if chunk:
@@ -204,7 +225,7 @@ class AutomaticUpdateCheck(QThread):
                 latest_version = versions[0] if versions else CURRENT_BUILD
                 if "changelog" not in self.cache:
                     try:
-                        changelog_response = requests.get(CHANGELOG_URL)
+                        changelog_response = requests.get(changelog_url())
                         if changelog_response.status_code == 200:
                             self.cache["changelog"] = changelog_response.text
                     except Exception as e:
@@ -268,7 +289,7 @@ class ChangelogFetchThread(QThread):
         
     def run(self):
         try:
-            response = requests.get(CHANGELOG_URL)
+            response = requests.get(changelog_url())
             if response.status_code == 200:
                 self.finished_signal.emit(response.text)
             else:
@@ -0,0 +1,142 @@
+# Vault.py
+import os
+import base64
+import shutil
+import tempfile
+from pathlib import Path
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from Config import get_config_dir
+
+KDF_ITERATIONS = 480000
+LOCK_FILE_NAME = "steamkm.lock"
+
+def derive_key(password, salt=None):
+    salt = salt or os.urandom(16)
+    kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt, iterations=KDF_ITERATIONS)
+    return kdf.derive(password.encode()), salt
+
+def _cipher_factory(password, salt=None, iv=None):
+    key, salt = derive_key(password, salt)
+    iv = iv or os.urandom(16)
+    return Cipher(algorithms.AES(key), modes.CBC(iv)), salt, iv
+
+def encrypt_data(data, password):
+    cipher, salt, iv = _cipher_factory(password)
+    encryptor = cipher.encryptor()
+    padded_data = data + (16 - len(data) % 16) * chr(16 - len(data) % 16)
+    ct = encryptor.update(padded_data.encode()) + encryptor.finalize()
+    return base64.b64encode(salt + iv + ct).decode('utf-8')
+
+def decrypt_data(data, password):
+    """
+    Returns:
+        The decrypted text, or None if the password is wrong or the data is corrupted
+    """
+    raw = base64.b64decode(data)
+    salt, iv, ct = raw[:16], raw[16:32], raw[32:]
+    cipher, _, _ = _cipher_factory(password, salt, iv)
+    decryptor = cipher.decryptor()
+    try:
+        pt = decryptor.update(ct) + decryptor.finalize()
+        return pt[:-ord(pt[-1:])].decode('utf-8')
+    except Exception:  # Correctly handle decryption errors
+        return None
+
+def write_text_atomic(path, text, backup_path=None):
+    """Write text through a temp file and an atomic replace, copying the current file to backup_path first"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".part")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        if backup_path is not None and path.exists():
+            shutil.copyfile(path, backup_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+class LibraryLock:
+    """
+    Inter-process lock on the library and the fetch stores next to it, held by the app for as long as it is open
+    and by command-line runs that write. The OS releases it when the process exits, so a crash can't leave it stuck.
+    """
+    def __init__(self, data_dir=None):
+        self.path = (Path(data_dir) if data_dir else get_config_dir()) / LOCK_FILE_NAME
+        self._file = None
+
+    def acquire(self):
+        """
+        Returns:
+            True if the lock is held now, False if another process holds it
+        """
+        if self._file is not None:
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.path, "a+")
+        try:
+            if os.name == "nt":
+                import msvcrt
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._file = lock_file
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            if os.name == "nt":
+                import msvcrt
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        except OSError:
+            pass  # Closing the file releases it as well
+        self._file.close()
+        self._file = None
+
+class Vault:
+    """
+    The encrypted game library on disk, without any UI: the crypto and file handling EncryptionManager's
+    dialogs sit on top of, usable from scripts and background jobs.
+    """
+    def __init__(self, data_dir=None):
+        data_dir = Path(data_dir) if data_dir else get_config_dir()
+        self.data_file = data_dir / "steam_keys.json"
+        self.encrypted_data_file = data_dir / "steam_keys.json.enc"
+        self.backup_file = self.encrypted_data_file.with_suffix(".enc.bak")
+
+    def exists(self):
+        return self.encrypted_data_file.exists() or self.data_file.exists()
+
+    def read(self, password):
+        """
+        Returns:
+            The library JSON text, "{}" if there is no library yet, or None if the password is wrong
+        """
+        if self.encrypted_data_file.exists():
+            return decrypt_data(self.encrypted_data_file.read_text(), password)
+        if self.data_file.exists():
+            return self.data_file.read_text()
+        return "{}"
+
+    def write(self, data, password):
+        """Encrypt and replace the library atomically, keeping the previous file as the .enc.bak backup"""
+        write_text_atomic(self.encrypted_data_file, encrypt_data(data, password), self.backup_file)
+        if self.data_file.exists():
+            self.data_file.unlink()  # The unencrypted file is migrated once it's written encrypted